@@ -1,15 +1,23 @@
 """  """
 
-import ctypes
-import mathutils
+import array
 import struct
 import sys
 
+from . import dts_math
+from . import dts_stream
 from . import dts_types
 
 
 def read(fd, fmt):
-    return struct.unpack(fmt, fd.read(struct.calcsize(fmt)))
+    """ :raises :py:`EOFError`: """
+    size = struct.calcsize(fmt)
+    data = fd.read(size)
+
+    if len(data) != size:
+        raise EOFError()
+
+    return struct.unpack(fmt, data)
 
 
 def write(fd, fmt, *values):
@@ -17,11 +25,11 @@ def write(fd, fmt, *values):
 
 
 def write_quat(fd, q):
-    write(fd, "4h",
-          ctypes.c_short(int(q.x * 32767)).value,
-          ctypes.c_short(int(q.y * 32767)).value,
-          ctypes.c_short(int(q.z * 32767)).value,
-          ctypes.c_short(int(q.w * -32767)).value)
+    write_quats(fd, (q, ))
+
+
+def write_quats(fd, quats):
+    fd.write(dts_stream.quantize_quats(quats))
 
 
 def write_vec(fd, v):
@@ -29,28 +37,97 @@ def write_vec(fd, v):
 
 
 def read_quat(fd):
-    x, y, z, w = read(fd, "4h")
-    return mathutils.Quaternion((w / -32767, x / 32767, y / 32767, z / 32767))
+    return read_quats(fd, 1)[0]
+
+
+def read_quats(fd, count):
+    return dts_stream.quaternions(dts_stream.read_array(fd, count * 4, "h"))
+
+
+def pack_vecs(vecs):
+    return array.array("f", dts_stream.flatten(vecs))
+
+
+def read_vecs(fd, count):
+    return dts_stream.vectors(dts_stream.read_array(fd, count * 3, "f"))
 
 
 def read_vec(fd):
-    return mathutils.Vector(read(fd, "3f"))
+    return dts_math.Vector(read(fd, "3f"))
+
+
+def pack_pool(pool):
+    return struct.pack("<i", len(pool)) + pool.values.tobytes()
+
+
+def read_pool(fd, pool, count=None):
+    """ Fill the empty ``pool`` with ``count`` keyframes, reading the count first if it is not given.
+
+    :raises :py:`EOFError`:
+    """
+    if count is None:
+        (count, ) = read(fd, "<i")
+
+    pool.values = dts_stream.read_array(fd, count * pool.width, pool.values.typecode)
+    return pool
+
+
+def pack_names(names):
+    """ Encode a counted table of length-prefixed names. """
+    encoded = [name.encode("cp1252") for name in names]
+    return b"".join([struct.pack("<i", len(encoded))] + [struct.pack("<i", len(name)) + name for name in encoded])
+
+
+def read_names(fd):
+    """ Read a counted table of length-prefixed names.
+
+    :raises :py:`EOFError`:
+    """
+    (count, ) = read(fd, "<i")
+    names = [None] * count
+
+    for i in range(count):
+        (size, ) = read(fd, "<i")
+        names[i] = fd.read(size).decode("cp1252")
+
+    return names
 
 
 class DsqFile:
 
     def __init__(self):
         self.nodes = []
-        self.rotations = []
-        self.translations = []
-        self.uniform_scales = []
-        self.aligned_scales = []
-        self.arbitrary_scale_rots = []
-        self.arbitrary_scale_factors = []
+        self.rotations = dts_types.KeyframePool.rotations()
+        self.translations = dts_types.KeyframePool.vectors()
+        self.uniform_scales = dts_types.KeyframePool.scalars()
+        self.aligned_scales = dts_types.KeyframePool.vectors()
+        self.arbitrary_scale_rots = dts_types.KeyframePool.rotations()
+        self.arbitrary_scale_factors = dts_types.KeyframePool.vectors()
         self.ground_translations = []
         self.ground_rotations = []
         self.sequences = []
-        self.triggers = []
+        self.triggers = dts_types.RecordTable(dts_types.Trigger)
+        self.version = 24
+
+    def track(self, seq, node, channel):
+        """ Zero-copy view of the keyframes of one node in ``seq``, like
+        :py:meth:`dts_shape.Shape.track`.
+        """
+        if channel == "rotation":
+            return dts_types.keyframe_track(seq, node, seq.rotationMatters, seq.baseRotation, self.rotations)
+        elif channel == "translation":
+            return dts_types.keyframe_track(seq, node, seq.translationMatters, seq.baseTranslation, self.translations)
+        elif channel == "scale":
+            if seq.flags & dts_types.Sequence.UniformScale:
+                pool = self.uniform_scales
+            elif seq.flags & dts_types.Sequence.AlignedScale:
+                pool = self.aligned_scales
+            else:
+                pool = self.arbitrary_scale_factors
+
+            return dts_types.keyframe_track(seq, node, seq.scaleMatters, seq.baseScale, pool)
+
+        raise ValueError("unknown channel {!r}".format(channel))
 
     def write_dump(self, fd):
 
@@ -83,68 +160,63 @@ class DsqFile:
             p("    scaleMatters = {}".format("".join(
                 map(str, map(int, seq.scaleMatters)))))
 
-    def write_name(self, fd, name):
-        write(fd, "<i", len(name))
-        fd.write(name.encode("cp1252"))
+    def pack_name(self, name):
+        encoded = name.encode("cp1252")
+        return struct.pack("<i", len(encoded)) + encoded
 
-    def write(self, fd, version=24):
-        write(fd, "<i", version)
+    def pack(self, version=24):
+        """ Encode the whole file as a scatter list of bytes-like chunks. """
+        chunks = [struct.pack("<i", version)]
 
-        write(fd, "<i", len(self.nodes))
-        for node_name in self.nodes:
-            self.write_name(fd, node_name)
+        chunks.append(pack_names(self.nodes))
 
         # don't pretend to support object export
         # not even TGE does
-        write(fd, "<i", 0)
+        chunks.append(struct.pack("<i", 0))
 
-        write(fd, "<i", 0)  # old_shape_num_objects
+        chunks.append(struct.pack("<i", 0))  # old_shape_num_objects
 
         # write all the node states for keyframes
-        write(fd, "<i", len(self.rotations))
-        for quat in self.rotations:
-            write_quat(fd, quat)
-        write(fd, "<i", len(self.translations))
-        for vec in self.translations:
-            write_vec(fd, vec)
-
-        write(fd, "<i", len(self.uniform_scales))
-        for scale in self.uniform_scales:
-            write(fd, "<f", scale)
-        write(fd, "<i", len(self.aligned_scales))
-        for vec in self.aligned_scales:
-            write_vec(fd, vec)
+        chunks.append(pack_pool(self.rotations))
+        chunks.append(pack_pool(self.translations))
+
+        chunks.append(pack_pool(self.uniform_scales))
+        chunks.append(pack_pool(self.aligned_scales))
 
         assert len(self.arbitrary_scale_rots) == len(
             self.arbitrary_scale_factors)
-        write(fd, "<i", len(self.arbitrary_scale_rots))
-        for quat in self.arbitrary_scale_rots:
-            write_quat(fd, quat)
-        for vec in self.arbitrary_scale_factors:
-            write_vec(fd, vec)
+        chunks.append(pack_pool(self.arbitrary_scale_rots))
+        chunks.append(self.arbitrary_scale_factors.values)
 
         assert len(self.ground_translations) == len(self.ground_rotations)
-        write(fd, "<i", len(self.ground_translations))
-        for vec in self.ground_translations:
-            write_vec(fd, vec)
-        for quat in self.ground_rotations:
-            write_quat(fd, quat)
+        chunks.append(struct.pack("<i", len(self.ground_translations)))
+        chunks.append(pack_vecs(self.ground_translations))
+        chunks.append(dts_stream.quantize_quats(self.ground_rotations))
 
         # also legacy
-        write(fd, "<i", 0)
+        chunks.append(struct.pack("<i", 0))
 
         # actually write sequences
-        write(fd, "<i", len(self.sequences))
+        chunks.append(struct.pack("<i", len(self.sequences)))
         for seq in self.sequences:
             assert isinstance(seq.name, str)
-            self.write_name(fd, seq.name)
-            seq.write(fd, False)  # don't write name index
+            chunks.append(self.pack_name(seq.name))
+            chunks.append(seq.pack(False))  # don't write name index
 
         # now for triggers, apparently
-        write(fd, "<i", len(self.triggers))
-        for trigger in self.triggers:
-            write(fd, "<i", trigger.state)  # just a guess
-            write(fd, "<f", trigger.pos)
+        # state then position, just a guess
+        chunks.append(struct.pack("<i", len(self.triggers)))
+        chunks.append(self.triggers.words())
+
+        return chunks
+
+    def write(self, fd, version=24):
+        """ Write the whole file to ``fd`` in one call. """
+        fd.write(b"".join(self.pack(version)))
+
+    def save(self, path, version=24):
+        """ Atomically replace the file at ``path``, see :py:func:`dts_stream.write_file`. """
+        dts_stream.write_file(path, self.pack(version))
 
     def read_name(self, fd):
         (size, ) = read(fd, "<i")
@@ -153,9 +225,9 @@ class DsqFile:
     def read(self, fd):
         (version, ) = read(fd, "<i")
         assert version <= 24, "dsq >v24 not supported yet"
+        self.version = version
 
-        (num_nodes, ) = read(fd, "<i")
-        self.nodes = [self.read_name(fd) for i in range(num_nodes)]
+        self.nodes = read_names(fd)
 
         # Legacy data
         read(fd, "<i")  # sz
@@ -165,29 +237,25 @@ class DsqFile:
             assert False, "TODO: read keyframes from version < 17"
 
         if version > 21:
-            self.rotations = [read_quat(fd) for i in range(read(fd, "<i")[0])]
-            self.translations = [
-                read_vec(fd) for i in range(read(fd, "<i")[0])
-            ]
-            self.uniform_scales = [
-                read(fd, "<f") for i in range(read(fd, "<i")[0])
-            ]
-            self.aligned_scales = [
-                read_vec(fd) for i in range(read(fd, "<i")[0])
-            ]
-            (sz, ) = read(fd, "<i")
-            self.arbitrary_scale_rots = [read_quat(fd) for i in range(sz)]
-            self.arbitrary_scale_factors = [read_vec(fd) for i in range(sz)]
+            self.rotations = read_pool(fd, dts_types.KeyframePool.rotations())
+            self.translations = read_pool(fd, dts_types.KeyframePool.vectors())
+            self.uniform_scales = read_pool(fd, dts_types.KeyframePool.scalars())
+            self.aligned_scales = read_pool(fd, dts_types.KeyframePool.vectors())
+            self.arbitrary_scale_rots = read_pool(fd, dts_types.KeyframePool.rotations())
+            self.arbitrary_scale_factors = read_pool(
+                fd, dts_types.KeyframePool.vectors(), len(self.arbitrary_scale_rots))
             (sz, ) = read(fd, "<i")
-            self.ground_translations = [read_vec(fd) for i in range(sz)]
-            self.ground_rotations = [read_quat(fd) for i in range(sz)]
+            self.ground_translations = read_vecs(fd, sz)
+            self.ground_rotations = read_quats(fd, sz)
         else:
+            # Rotations and translations are interleaved per keyframe
             (sz, ) = read(fd, "<i")
-            self.rotations = [None] * sz
-            self.translations = [None] * sz
-            for i in range(sz):
-                self.rotations[i] = read_quat(fd)
-                self.translations[i] = read_vec(fd)
+            keys = dts_stream.read_array(fd, sz * 20, "B")
+            self.rotations = dts_types.KeyframePool.rotations()
+            self.translations = dts_types.KeyframePool.vectors()
+            for key in struct.iter_unpack("<4h3f", keys):
+                self.rotations.values.extend(key[:4])
+                self.translations.values.extend(key[4:])
 
         # also legacy
         read(fd, "<i")
@@ -203,8 +271,5 @@ class DsqFile:
         # and finally, triggers
         if version > 8:
             (num_sjws, ) = read(fd, "<i")
-            self.triggers = [None] * num_sjws
-            for i in range(num_sjws):
-                self.triggers[i] = dts_types.Trigger(0, 0)
-                self.triggers[i].state = read(fd, "<i")
-                self.triggers[i].pos = read(fd, "<f")
+            self.triggers = dts_types.RecordTable(
+                dts_types.Trigger, dts_stream.read_array(fd, num_sjws * 2, "i"))
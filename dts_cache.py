@@ -0,0 +1,357 @@
+""" On-disk cache of decoded shapes and sequences, keyed by file content. """
+
+import array
+import functools
+import hashlib
+import json
+import os
+import struct
+import typing
+
+from . import dsq_file
+from . import dts_codec
+from . import dts_math
+from . import dts_shape
+from . import dts_stream
+from . import dts_types
+from . import dts_utils
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Environment variables that override the defaults of every ShapeCache
+DIRECTORY_VARIABLE = "IO_SCENE_DTS_CACHE_DIR"
+MAX_BYTES_VARIABLE = "IO_SCENE_DTS_CACHE_MAX_BYTES"
+
+# A snapshot is this header, the JSON description of the objects and then the array data
+SNAPSHOT_MAGIC = b"DTSC"
+SNAPSHOT_HEADER = struct.Struct("<4sI")
+SNAPSHOT_SUFFIX = ".snapshot"
+
+# Modules whose code decides what a decoded Shape or DsqFile holds
+DECODER_MODULES = (dts_codec, dts_stream, dts_types, dts_shape, dsq_file, dts_utils)
+
+
+@functools.cache
+def snapshot_classes() -> dict[str, type]:
+    """ The only classes a snapshot may contain, by name. Reading a snapshot creates instances of
+    these and sets their attributes; it never runs any other code.
+    """
+    classes = [dts_shape.Shape, dts_shape.DecodeProfile, dsq_file.DsqFile, dts_utils.Box]
+    classes += [cls for cls in vars(dts_types).values()
+                if isinstance(cls, type) and cls.__module__ == dts_types.__name__]
+
+    return {"{}.{}".format(cls.__module__.rpartition(".")[2], cls.__qualname__): cls for cls in classes}
+
+
+@functools.cache
+def format_version() -> str:
+    """ Digest of the codec definitions, the layout of the snapshot classes and the source of the
+    decoder, so any change to what decoding produces invalidates older snapshots by itself.
+    """
+    digest = hashlib.sha256(SNAPSHOT_MAGIC)
+
+    for name, value in sorted(vars(dts_codec).items()):
+        if isinstance(value, struct.Struct):
+            digest.update("{}={};".format(name, value.format).encode("utf-8"))
+        elif name.isupper() and isinstance(value, (str, tuple)):
+            digest.update("{}={!r};".format(name, value).encode("utf-8"))
+
+    for name, cls in sorted(snapshot_classes().items()):
+        digest.update("{}:{}:{};".format(
+            name, getattr(cls, "fields", ()), slot_names(cls)).encode("utf-8"))
+
+    for module in DECODER_MODULES:
+        try:
+            with open(module.__file__, "rb") as fd:
+                digest.update(fd.read())
+        except (OSError, TypeError):
+            pass
+
+    return digest.hexdigest()
+
+
+@functools.cache
+def slot_names(cls: type) -> tuple[str, ...]:
+    """ The ``__slots__`` entries of ``cls`` and its bases that hold attributes. """
+    names = []
+
+    for base in cls.__mro__:
+        slots = base.__dict__.get("__slots__", ())
+        names += [name for name in ((slots, ) if isinstance(slots, str) else slots)
+                  if name not in ("__dict__", "__weakref__")]
+
+    return tuple(names)
+
+
+def object_state(value: typing.Any) -> dict[str, typing.Any]:
+    """ The instance attributes of ``value``, from its ``__dict__`` and every slot that is set. """
+    state = dict(getattr(value, "__dict__", {}))
+    state.update((name, getattr(value, name)) for name in slot_names(type(value)) if hasattr(value, name))
+    return state
+
+
+def dump_snapshot(value: typing.Any) -> list[typing.Any]:
+    """ Chunks of a snapshot of ``value``, an object graph of :py:func:`snapshot_classes` instances,
+    containers, numbers, strings, arrays and vectors.
+
+    :raises :py:`TypeError`: for a value of any other type.
+    """
+    names = {cls: name for name, cls in snapshot_classes().items()}
+    objects = []
+    refs = {}
+    blobs = []
+    blob_refs = {}
+    chunks = []
+    offset = 0
+
+    def encode(value):
+        nonlocal offset
+
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        elif isinstance(value, list):
+            return [encode(item) for item in value]
+        elif isinstance(value, tuple):
+            return {"tuple": [encode(item) for item in value]}
+        elif isinstance(value, frozenset):
+            return {"frozenset": [encode(item) for item in value]}
+        elif isinstance(value, dict):
+            return {"dict": [[encode(key), encode(item)] for key, item in value.items()]}
+        elif isinstance(value, dts_math.Quaternion):
+            return {"quaternion": list(value)}
+        elif isinstance(value, dts_math.Vector):
+            return {"vector": list(value)}
+        elif isinstance(value, array.array):
+            if id(value) not in blob_refs:
+                blob_refs[id(value)] = len(blobs)
+                blobs.append([value.typecode, offset, len(value) * value.itemsize])
+                chunks.append(value)
+                offset += len(value) * value.itemsize
+
+            return {"array": blob_refs[id(value)]}
+        elif isinstance(value, type) and value in names:
+            return {"class": names[value]}
+        elif type(value) in names:
+            if id(value) not in refs:
+                refs[id(value)] = len(objects)
+                entry = {"class": names[type(value)]}
+                objects.append(entry)
+                entry["state"] = {name: encode(item) for name, item in object_state(value).items()}
+
+            return {"ref": refs[id(value)]}
+
+        raise TypeError("cannot snapshot {!r}".format(type(value)))
+
+    root = encode(value)
+    header = json.dumps({"version": format_version(), "root": root, "objects": objects, "blobs": blobs},
+                        separators=(",", ":")).encode("utf-8")
+
+    return [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(header)), header] + chunks
+
+
+def load_snapshot(data: bytes) -> typing.Any:
+    """ The value :py:func:`dump_snapshot` took a snapshot of.
+
+    :raises :py:`ValueError`: if ``data`` is not a snapshot of the current :py:func:`format_version`.
+    """
+    magic, size = SNAPSHOT_HEADER.unpack_from(data)
+
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("not a snapshot")
+
+    header = json.loads(bytes(data[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + size]))
+
+    if header["version"] != format_version():
+        raise ValueError("snapshot of another decoder")
+
+    body = memoryview(data)[SNAPSHOT_HEADER.size + size:]
+    classes = snapshot_classes()
+    entries = header["objects"]
+    objects = [classes[entry["class"]].__new__(classes[entry["class"]]) for entry in entries]
+    arrays = {}
+
+    def decode(value):
+        if isinstance(value, list):
+            return [decode(item) for item in value]
+        elif not isinstance(value, dict):
+            return value
+
+        (kind, item), = value.items()
+
+        if kind == "ref":
+            return objects[item]
+        elif kind == "tuple":
+            return tuple(decode(x) for x in item)
+        elif kind == "frozenset":
+            return frozenset(decode(x) for x in item)
+        elif kind == "dict":
+            return {decode(key): decode(x) for key, x in item}
+        elif kind == "quaternion":
+            return dts_math.Quaternion(item)
+        elif kind == "vector":
+            return dts_math.Vector(item)
+        elif kind == "class":
+            return classes[item]
+        elif kind == "array":
+            if item not in arrays:
+                typecode, start, nbytes = header["blobs"][item]
+                arrays[item] = array.array(typecode)
+                arrays[item].frombytes(body[start:start + nbytes])
+
+            return arrays[item]
+
+        raise ValueError("unknown snapshot value {!r}".format(kind))
+
+    # Attributes are stored directly, bypassing any __setattr__ and property of the classes
+    for obj, entry in zip(objects, entries):
+        slots = slot_names(type(obj))
+
+        for name, value in entry["state"].items():
+            if name in slots:
+                object.__setattr__(obj, name, decode(value))
+            else:
+                obj.__dict__[name] = decode(value)
+
+    return decode(header["root"])
+
+
+def default_directory() -> str:
+    if os.environ.get(DIRECTORY_VARIABLE):
+        return os.environ[DIRECTORY_VARIABLE]
+
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "io_scene_dts")
+
+
+def default_max_bytes() -> int:
+    try:
+        return int(os.environ[MAX_BYTES_VARIABLE])
+    except (KeyError, ValueError):
+        return DEFAULT_MAX_BYTES
+
+
+class ShapeCache(object):
+    """ Snapshots of decoded files in ``directory``, one per content hash and decoder.
+
+    Entries are evicted least recently used first once the directory holds more than
+    ``max_bytes``. Every hit refreshes the modification time of its entry, which is what the
+    eviction goes by. Both default to the :py:data:`DIRECTORY_VARIABLE` and
+    :py:data:`MAX_BYTES_VARIABLE` environment variables when set.
+    """
+
+    def __init__(self, directory: None | str=None, max_bytes: None | int=None) -> None:
+        self.directory = directory or default_directory()
+        self.max_bytes = default_max_bytes() if max_bytes is None else max_bytes
+
+    def key(self, path: str, kind: str) -> str:
+        """ Hash of the contents of ``path``, the :py:func:`format_version` and ``kind``, which names the decoder. """
+        with open(path, "rb") as fd:
+            digest = hashlib.file_digest(fd, "sha256")
+
+        digest.update("{}:{}".format(format_version(), kind).encode("utf-8"))
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SNAPSHOT_SUFFIX)
+
+    def get(self, key: str) -> typing.Any:
+        """ The object stored under ``key``, or None. An entry that cannot be read back for any
+        reason is a miss, and is dropped.
+        """
+        path = self.entry_path(key)
+
+        try:
+            with open(path, "rb") as fd:
+                value = load_snapshot(fd.read())
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self.discard(key)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return value
+
+    def put(self, key: str, value: typing.Any) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        dts_stream.write_file(self.entry_path(key), dump_snapshot(value))
+        self.evict()
+
+    def discard(self, key: str) -> None:
+        try:
+            os.unlink(self.entry_path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self) -> None:
+        """ Delete the least recently used entries until the cache fits in :py:attr:`max_bytes`. """
+        entries = []
+
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(SNAPSHOT_SUFFIX):
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+            total -= size
+
+    def clear(self) -> None:
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(SNAPSHOT_SUFFIX):
+                    os.unlink(os.path.join(self.directory, name))
+
+    def load_shape(self, path: str, mesh_class: type=dts_types.Mesh) -> dts_shape.Shape:
+        """ Fully decode the DTS file at ``path`` like :py:meth:`dts_shape.Shape.load`, unless an
+        identical file was decoded into ``mesh_class`` before.
+
+        :raises :py:`EOFError`:
+        :raises :py:`AssertionError`:
+        """
+        key = self.key(path, "dts:" + mesh_class.__qualname__)
+        shape = self.get(key)
+
+        if shape is None:
+            shape = dts_shape.Shape()
+
+            with open(path, "rb") as fd:
+                shape.load(fd, mapped=True, mesh_class=mesh_class)
+
+            self.put(key, shape)
+
+        return shape
+
+    def load_dsq(self, path: str) -> dsq_file.DsqFile:
+        """ Decode the DSQ file at ``path`` like :py:meth:`dsq_file.DsqFile.read`, unless an identical
+        file was decoded before.
+
+        :raises :py:`EOFError`:
+        :raises :py:`AssertionError`:
+        """
+        key = self.key(path, "dsq")
+        dsq = self.get(key)
+
+        if dsq is None:
+            dsq = dsq_file.DsqFile()
+
+            with open(path, "rb") as fd:
+                dsq.read(fd)
+
+            self.put(key, dsq)
+
+        return dsq
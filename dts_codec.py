@@ -0,0 +1,56 @@
+""" Precompiled :py:class:`struct.Struct` codecs for the fixed-layout records of DTS and DSQ files. """
+
+import functools
+import io
+import struct
+
+INT = struct.Struct("<i")
+BYTE = struct.Struct("<b")
+
+# Versions and buffer ends that lead the tri-buffer section
+STREAM_HEADER = struct.Struct("<hhiii")
+
+# Sequence header, with and without the name index that DSQ files leave out
+SEQUENCE_FIELDS = ("nameIndex", "flags", "numKeyframes", "duration", "priority", "firstGroundFrame",
+                   "numGroundFrames", "baseRotation", "baseTranslation", "baseScale", "baseObjectState",
+                   "baseDecalState", "firstTrigger", "numTriggers", "toolBegin")
+SEQUENCE = struct.Struct("<iIifiiiiiiiiiif")
+SEQUENCE_NO_INDEX = struct.Struct("<Iifiiiiiiiiiif")
+
+# Header of a bit set: a dummy word followed by the number of words
+BIT_SET_HEADER = struct.Struct("<ii")
+
+# Records of the tri-buffer section, laid out as the words they are stored as
+NODE = struct.Struct("<iiiii")
+OBJECT = struct.Struct("<iiiiii")
+IFL_MATERIAL = struct.Struct("<iiiii")
+OBJECT_STATE = struct.Struct("<fii")
+TRIGGER = struct.Struct("<if")
+DETAIL_LEVEL = struct.Struct("<iiifffi")
+
+# Material columns that follow the names, before and after the unused version 25 column
+MATERIAL_MAPS = "Iiii"
+MATERIAL_FACTORS = "ff"
+
+
+@functools.lru_cache(maxsize=64)
+def columns(spec: str, count: int) -> struct.Struct:
+    """ Codec for column-major records: ``count`` values for each type character in ``spec``.
+
+    :param spec: One :py:mod:`struct` type character per column.
+    :param count: Number of rows.
+    """
+    return struct.Struct("<" + "".join(str(count) + column for column in spec))
+
+
+def read(buffer: io.BufferedReader, codec: struct.Struct) -> tuple:
+    """ Read and unpack one record.
+
+    :raises :py:`EOFError`:
+    """
+    data = buffer.read(codec.size)
+
+    if len(data) != codec.size:
+        raise EOFError()
+
+    return codec.unpack(data)
@@ -0,0 +1,361 @@
+""" The vector types of the codec: :py:mod:`mathutils` inside Blender, a pure Python stand-in elsewhere.
+
+Only what the codec modules need is implemented by the stand-in. Code that runs only inside
+Blender keeps using :py:mod:`mathutils` directly and gets the same types from the codec.
+"""
+
+import array
+import math
+import typing
+
+try:
+    import mathutils
+except ImportError:
+    mathutils = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class PyVector(object):
+    """ Stand-in for :py:class:`mathutils.Vector`. """
+    __slots__ = ("_values", )
+
+    def __init__(self, values: typing.Iterable[float]=(0.0, 0.0, 0.0)) -> None:
+        self._values = [float(v) for v in values]
+
+    def __reduce__(self):
+        return (type(self), (tuple(self._values), ))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> typing.Iterator[float]:
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        self._values[index] = float(value)
+
+    def __eq__(self, other) -> bool:
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return "{}(({}))".format(type(self).__name__, ", ".join("{:.4f}".format(v) for v in self._values))
+
+    def __add__(self, other):
+        return type(self)(a + b for a, b in zip(self, other))
+
+    def __sub__(self, other):
+        return type(self)(a - b for a, b in zip(self, other))
+
+    def __mul__(self, scalar: float):
+        return type(self)(a * scalar for a in self)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return type(self)(-a for a in self)
+
+    @property
+    def length(self) -> float:
+        return math.sqrt(sum(a * a for a in self._values))
+
+    def copy(self):
+        return type(self)(self._values)
+
+    def to_tuple(self) -> tuple[float, ...]:
+        return tuple(self._values)
+
+
+def _component(index: int) -> property:
+    def get(self):
+        return self._values[index]
+
+    def set(self, value):
+        self._values[index] = float(value)
+
+    return property(get, set)
+
+
+PyVector.x = _component(0)
+PyVector.y = _component(1)
+PyVector.z = _component(2)
+PyVector.w = _component(3)
+
+
+class PyQuaternion(PyVector):
+    """ Stand-in for :py:class:`mathutils.Quaternion`, stored ``w, x, y, z``. """
+    __slots__ = ()
+
+    def __init__(self, values: typing.Iterable[float]=(1.0, 0.0, 0.0, 0.0)) -> None:
+        super().__init__(values)
+
+    def to_matrix(self) -> "PyMatrix":
+        w, x, y, z = self._values
+        return PyMatrix(((1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)),
+                         (2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)),
+                         (2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y))))
+
+
+PyQuaternion.w = _component(0)
+PyQuaternion.x = _component(1)
+PyQuaternion.y = _component(2)
+PyQuaternion.z = _component(3)
+
+
+class PyMatrix(object):
+    """ Stand-in for :py:class:`mathutils.Matrix`, a list of rows. Defaults to the 4x4 identity. """
+    __slots__ = ("rows", )
+
+    def __init__(self, rows: None | typing.Iterable[typing.Iterable[float]]=None) -> None:
+        if rows is None:
+            rows = [[float(i == j) for j in range(4)] for i in range(4)]
+
+        self.rows = [[float(v) for v in row] for row in rows]
+
+    def __reduce__(self):
+        return (type(self), (self.rows, ))
+
+    @classmethod
+    def Translation(cls, vector: typing.Iterable[float]) -> "PyMatrix":
+        matrix = cls()
+
+        for i, v in enumerate(vector):
+            matrix.rows[i][3] = float(v)
+
+        return matrix
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index: int) -> PyVector:
+        return PyVector(self.rows[index])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PyMatrix):
+            return NotImplemented
+
+        return self.rows == other.rows
+
+    def __repr__(self) -> str:
+        return "Matrix({})".format(self.rows)
+
+    def __matmul__(self, other):
+        if isinstance(other, PyMatrix):
+            columns = list(zip(*other.rows))
+            return PyMatrix([[sum(a * b for a, b in zip(row, column)) for column in columns] for row in self.rows])
+
+        # Like mathutils, a 3D vector times a 4x4 matrix is treated as a point
+        values = list(other)
+
+        if len(values) == 3 and len(self.rows) == 4:
+            values.append(1.0)
+
+        result = [sum(a * b for a, b in zip(row, values)) for row in self.rows]
+        return PyVector(result[:len(other)])
+
+    def to_3x3(self) -> "PyMatrix":
+        return PyMatrix(row[:3] for row in self.rows[:3])
+
+    def to_4x4(self) -> "PyMatrix":
+        matrix = PyMatrix()
+
+        for i, row in enumerate(self.rows[:4]):
+            matrix.rows[i][:len(row)] = row[:4]
+
+        return matrix
+
+
+# Axes of the three rotations of every Euler order, and whether the order is odd, as Blender has them
+EULER_ORDERS = {
+    "XYZ": ((0, 1, 2), False),
+    "XZY": ((0, 2, 1), True),
+    "YXZ": ((1, 0, 2), True),
+    "YZX": ((1, 2, 0), False),
+    "ZXY": ((2, 0, 1), False),
+    "ZYX": ((2, 1, 0), True),
+}
+
+FLT_EPSILON = 1.1920929e-07
+
+
+def _rows(values: typing.Any, width: int):
+    return numpy.asarray(values, dtype=numpy.float64).reshape(-1, width)
+
+
+def _flat(rows) -> array.array:
+    out = array.array("d")
+    out.frombytes(numpy.ascontiguousarray(rows, dtype=numpy.float64).tobytes())
+    return out
+
+
+def translate_vectors(offset: typing.Iterable[float], values: typing.Any) -> array.array:
+    """ Add ``offset`` to every vector of a flat ``x, y, z`` array.
+
+    The track functions below take and return flat float arrays of whole keyframe tracks, and
+    use numpy when it is available.
+    """
+    offset = tuple(offset)
+
+    if numpy is not None:
+        return _flat(_rows(values, 3) + offset)
+
+    return array.array("d", [value + offset[i % 3] for i, value in enumerate(values)])
+
+
+def multiply_quaternions(left: typing.Iterable[float], values: typing.Any) -> array.array:
+    """ The product ``left * q`` of every quaternion ``q`` of a flat ``w, x, y, z`` array. """
+    aw, ax, ay, az = left
+
+    if numpy is not None:
+        w, x, y, z = _rows(values, 4).T
+        return _flat(numpy.stack((aw * w - ax * x - ay * y - az * z,
+                                  aw * x + ax * w + ay * z - az * y,
+                                  aw * y - ax * z + ay * w + az * x,
+                                  aw * z + ax * y - ay * x + az * w), axis=1))
+
+    return array.array("d", [
+        c for w, x, y, z in zip(values[0::4], values[1::4], values[2::4], values[3::4])
+        for c in (aw * w - ax * x - ay * y - az * z,
+                  aw * x + ax * w + ay * z - az * y,
+                  aw * y - ax * z + ay * w + az * x,
+                  aw * z + ax * y - ay * x + az * w)
+    ])
+
+
+def _normalized_quaternion(w: float, x: float, y: float, z: float) -> tuple[float, float, float, float]:
+    length = math.sqrt(w * w + x * x + y * y + z * z)
+
+    if length == 0.0:
+        return (0.0, 1.0, 0.0, 0.0)
+
+    return (w / length, x / length, y / length, z / length)
+
+
+def quaternions_to_axis_angle(values: typing.Any) -> array.array:
+    """ Convert a flat ``w, x, y, z`` array to flat ``angle, x, y, z`` rows, the layout of
+    ``Object.rotation_axis_angle``. Matches :py:meth:`mathutils.Quaternion.to_axis_angle`.
+    """
+    if numpy is not None:
+        q = _rows(values, 4)
+        length = numpy.linalg.norm(q, axis=1, keepdims=True)
+        q = numpy.where(length > 0.0, q / numpy.where(length > 0.0, length, 1.0), (0.0, 1.0, 0.0, 0.0))
+
+        half = numpy.arccos(numpy.clip(q[:, 0], -1.0, 1.0))
+        sin = numpy.sin(half)
+        sin[numpy.abs(sin) < FLT_EPSILON] = 1.0
+
+        axis = q[:, 1:] / sin[:, None]
+        axis_length = numpy.linalg.norm(axis, axis=1, keepdims=True)
+        axis = numpy.where(axis_length > 0.0, axis / numpy.where(axis_length > 0.0, axis_length, 1.0), (0.0, 1.0, 0.0))
+        return _flat(numpy.column_stack((2.0 * half, axis)))
+
+    out = array.array("d")
+
+    for w, x, y, z in zip(values[0::4], values[1::4], values[2::4], values[3::4]):
+        w, x, y, z = _normalized_quaternion(w, x, y, z)
+        half = math.acos(min(max(w, -1.0), 1.0))
+        sin = math.sin(half)
+
+        if abs(sin) < FLT_EPSILON:
+            sin = 1.0
+
+        axis = (x / sin, y / sin, z / sin)
+        axis_length = math.sqrt(sum(c * c for c in axis))
+        axis = tuple(c / axis_length for c in axis) if axis_length > 0.0 else (0.0, 1.0, 0.0)
+        out.extend((2.0 * half, ) + axis)
+
+    return out
+
+
+def quaternions_to_euler(values: typing.Any, order: str="XYZ") -> array.array:
+    """ Convert a flat ``w, x, y, z`` array to flat ``x, y, z`` Euler angles in ``order``.
+
+    Matches :py:meth:`mathutils.Quaternion.to_euler` without a compatible Euler: of the two
+    solutions, the one with the smaller sum of absolute angles is picked.
+    """
+    (i, j, k), odd = EULER_ORDERS[order]
+    sign = -1.0 if odd else 1.0
+
+    if numpy is not None:
+        q = _rows(values, 4)
+        length = numpy.linalg.norm(q, axis=1, keepdims=True)
+        q = numpy.where(length > 0.0, q / numpy.where(length > 0.0, length, 1.0), (0.0, 1.0, 0.0, 0.0))
+
+        # Column major, like Blender: m[:, col, row]
+        w, x, y, z = (q * math.sqrt(2.0)).T
+        m = numpy.empty((len(q), 3, 3))
+        m[:, 0, 0] = 1.0 - y * y - z * z
+        m[:, 0, 1] = w * z + x * y
+        m[:, 0, 2] = -w * y + x * z
+        m[:, 1, 0] = -w * z + x * y
+        m[:, 1, 1] = 1.0 - x * x - z * z
+        m[:, 1, 2] = w * x + y * z
+        m[:, 2, 0] = w * y + x * z
+        m[:, 2, 1] = -w * x + y * z
+        m[:, 2, 2] = 1.0 - x * x - y * y
+
+        cy = numpy.hypot(m[:, i, i], m[:, i, j])
+        regular = cy > 16.0 * FLT_EPSILON
+
+        first = numpy.empty((len(q), 3))
+        first[:, i] = numpy.where(regular, numpy.arctan2(m[:, j, k], m[:, k, k]),
+                                  numpy.arctan2(-m[:, k, j], m[:, j, j]))
+        first[:, j] = numpy.arctan2(-m[:, i, k], cy)
+        first[:, k] = numpy.where(regular, numpy.arctan2(m[:, i, j], m[:, i, i]), 0.0)
+
+        second = first.copy()
+        second[regular, i] = numpy.arctan2(-m[regular, j, k], -m[regular, k, k])
+        second[regular, j] = numpy.arctan2(-m[regular, i, k], -cy[regular])
+        second[regular, k] = numpy.arctan2(-m[regular, i, j], -m[regular, i, i])
+
+        pick = numpy.abs(first).sum(axis=1) > numpy.abs(second).sum(axis=1)
+        return _flat(numpy.where(pick[:, None], second, first) * sign)
+
+    out = array.array("d")
+
+    for w, x, y, z in zip(values[0::4], values[1::4], values[2::4], values[3::4]):
+        w, x, y, z = (c * math.sqrt(2.0) for c in _normalized_quaternion(w, x, y, z))
+        m = ((1.0 - y * y - z * z, w * z + x * y, -w * y + x * z),
+             (-w * z + x * y, 1.0 - x * x - z * z, w * x + y * z),
+             (w * y + x * z, -w * x + y * z, 1.0 - x * x - y * y))
+
+        cy = math.hypot(m[i][i], m[i][j])
+        first = [0.0, 0.0, 0.0]
+
+        if cy > 16.0 * FLT_EPSILON:
+            second = [0.0, 0.0, 0.0]
+            first[i] = math.atan2(m[j][k], m[k][k])
+            first[j] = math.atan2(-m[i][k], cy)
+            first[k] = math.atan2(m[i][j], m[i][i])
+            second[i] = math.atan2(-m[j][k], -m[k][k])
+            second[j] = math.atan2(-m[i][k], -cy)
+            second[k] = math.atan2(-m[i][j], -m[i][i])
+
+            if sum(map(abs, first)) > sum(map(abs, second)):
+                first = second
+        else:
+            first[i] = math.atan2(-m[k][j], m[j][j])
+            first[j] = math.atan2(-m[i][k], cy)
+
+        out.extend(c * sign for c in first)
+
+    return out
+
+
+if mathutils is not None:
+    Vector = mathutils.Vector
+    Quaternion = mathutils.Quaternion
+    Matrix = mathutils.Matrix
+else:
+    Vector = PyVector
+    Quaternion = PyQuaternion
+    Matrix = PyMatrix
@@ -0,0 +1,181 @@
+""" Inventory of a content tree of DTS and DSQ files as an NDJSON manifest, one record per file.
+
+Run as ``python -m <package>.dts_scan [--workers N] [--output MANIFEST] [--resume MANIFEST] PATH...``.
+With ``--resume``, files whose path, size and modification time match a record of an earlier
+manifest are not decoded again; their old record is written out as it was.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import typing
+
+from . import dsq_file
+from . import dts_shape
+from . import dts_types
+
+EXTENSIONS = (".dts", ".dsq")
+
+# Meshes are only counted, so neither keyframes nor encoded normals are decoded
+SCAN_PROFILE = dts_shape.DecodeProfile(keyframes=False, enormals=False)
+
+
+def describe_sequences(sequences: list[dts_types.Sequence], names: None | list[str]=None) -> list[dict]:
+    return [{
+        "name": seq.name if names is None else names[seq.nameIndex],
+        "duration": seq.duration,
+        "keyframes": seq.numKeyframes,
+        "cyclic": bool(seq.flags & dts_types.Sequence.Cyclic),
+        "blend": bool(seq.flags & dts_types.Sequence.Blend),
+        "triggers": seq.numTriggers,
+    } for seq in sequences]
+
+
+def scan_shape(path: str) -> dict:
+    shape = dts_shape.Shape()
+
+    with open(path, "rb") as fd:
+        shape.load(fd, mapped=True, mesh_class=dts_types.ArrayMesh, profile=SCAN_PROFILE)
+
+    meshes = [mesh for mesh in shape.meshes if mesh.get_type() != dts_types.Mesh.NullType]
+
+    return {
+        "version": shape.dtsVersion,
+        "nodes": len(shape.nodes),
+        "objects": len(shape.objects),
+        "detail_levels": [{"name": shape.names[dl.name], "size": dl.size, "polys": dl.polyCount}
+                          for dl in shape.detail_levels],
+        "meshes": len(meshes),
+        "skinned_meshes": sum(mesh.get_type() == dts_types.Mesh.SkinType for mesh in meshes),
+        "vertices": sum(mesh.vertex_count() for mesh in meshes),
+        "triangles": sum(mesh.triangle_count() for mesh in meshes),
+        "sequences": describe_sequences(shape.sequences, shape.names),
+        "materials": [material.name for material in shape.materials],
+        "radius": shape.radius,
+        "bounds": [list(shape.bounds.min), list(shape.bounds.max)],
+    }
+
+
+def scan_sequences(path: str) -> dict:
+    dsq = dsq_file.DsqFile()
+
+    with open(path, "rb") as fd:
+        dsq.read(fd)
+
+    return {
+        "version": dsq.version,
+        "nodes": len(dsq.nodes),
+        "sequences": describe_sequences(dsq.sequences),
+        "triggers": len(dsq.triggers),
+    }
+
+
+def scan_file(path: str, size: int, mtime_ns: int) -> dict:
+    """ The manifest record of one file. A file that cannot be decoded gets an ``error`` instead. """
+    kind = os.path.splitext(path)[1].lower()[1:]
+    record = {"path": path, "size": size, "mtime_ns": mtime_ns, "kind": kind}
+
+    try:
+        record.update(scan_shape(path) if kind == "dts" else scan_sequences(path))
+    except (OSError, EOFError, AssertionError, ValueError, IndexError) as e:
+        record["error"] = repr(e)
+
+    return record
+
+
+def collect(future: concurrent.futures.Future, path: str, size: int, mtime_ns: int) -> dict:
+    """ The record a worker produced for one file, or an ``error`` record if the worker itself failed. """
+    try:
+        return future.result()
+    except Exception as e:
+        kind = os.path.splitext(path)[1].lower()[1:]
+        return {"path": path, "size": size, "mtime_ns": mtime_ns, "kind": kind, "error": repr(e)}
+
+
+def find_files(paths: typing.Iterable[str]) -> typing.Iterator[tuple[str, int, int]]:
+    """ Path, size and modification time of every DTS and DSQ file under ``paths``. """
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, names in os.walk(path):
+                subdirectories.sort()
+
+                for name in sorted(names):
+                    if name.lower().endswith(EXTENSIONS):
+                        full = os.path.join(directory, name)
+                        st = os.stat(full)
+                        yield (full, st.st_size, st.st_mtime_ns)
+        else:
+            st = os.stat(path)
+            yield (path, st.st_size, st.st_mtime_ns)
+
+
+def read_manifest(path: str) -> dict[str, dict]:
+    """ Records of an earlier manifest by path. A missing manifest or a torn last line is not an error. """
+    records = {}
+
+    try:
+        with open(path, "r", encoding="utf-8") as fd:
+            for line in fd:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+
+                records[record["path"]] = record
+    except FileNotFoundError:
+        pass
+
+    return records
+
+
+def main(argv: None | list[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Write an NDJSON manifest of DTS and DSQ files.")
+    parser.add_argument("paths", nargs="+", help="files or directories to scan")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes to decode files with")
+    parser.add_argument("--output", help="manifest to write, instead of standard output")
+    parser.add_argument("--resume", help="earlier manifest whose records are reused for unchanged files")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or 1
+    previous = read_manifest(args.resume) if args.resume else {}
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    reused = scanned = failed = 0
+
+    def emit(record):
+        nonlocal failed
+        failed += "error" in record
+        out.write(json.dumps(record) + "\n")
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = []
+
+            for path, size, mtime_ns in find_files(args.paths):
+                record = previous.get(path)
+
+                if record is not None and record.get("size") == size and record.get("mtime_ns") == mtime_ns:
+                    emit(record)
+                    reused += 1
+                else:
+                    pending.append((executor.submit(scan_file, path, size, mtime_ns), path, size, mtime_ns))
+
+                # Keep memory bounded on huge trees by draining finished work as we go
+                while pending and (pending[0][0].done() or len(pending) > 4 * workers):
+                    emit(collect(*pending.pop(0)))
+                    scanned += 1
+
+            for job in pending:
+                emit(collect(*job))
+                scanned += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print("{} scanned, {} reused, {} failed".format(scanned, reused, failed), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
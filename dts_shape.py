@@ -1,37 +1,548 @@
 """  """
 
+import collections.abc
+import concurrent.futures
+import dataclasses
 import io
-import mathutils
+import itertools
+import json
+import os
 import struct
+import typing
 
+from . import dts_codec
+from . import dts_math
 from . import dts_utils
 from . import dts_stream
 from . import dts_types
 
 
+class ShapeCounts(typing.NamedTuple):
+    """ The element counts at the start of a DTS tri-buffer. """
+    node: int
+    object: int
+    decal: int
+    subshape: int
+    ifl: int
+    noderotation: int
+    nodetranslation: int
+    nodescaleuniform: int
+    nodescalealigned: int
+    nodescalearbitrary: int
+    groundframe: int
+    objectstate: int
+    decalstate: int
+    trigger: int
+    detaillevel: int
+    mesh: int
+    name: int
+
+
+def read_counts(stream: dts_stream.InStream) -> ShapeCounts:
+    """ Read the count block, normalizing the layouts of older DTS versions.
+
+    :raises :py:`EOFError`:
+    """
+    n_node = stream.read32()
+    n_object = stream.read32()
+    n_decal = stream.read32()
+    n_subshape = stream.read32()
+    n_ifl = stream.read32()
+
+    if stream.dtsVersion < 22:
+        n_noderotation = stream.read32()
+        n_noderotation -= n_node
+        n_nodetranslation = n_noderotation
+        n_nodescaleuniform = 0
+        n_nodescalealigned = 0
+        n_nodescalearbitrary = 0
+    else:
+        n_noderotation = stream.read32()
+        n_nodetranslation = stream.read32()
+        n_nodescaleuniform = stream.read32()
+        n_nodescalealigned = stream.read32()
+        n_nodescalearbitrary = stream.read32()
+
+    if stream.dtsVersion > 23:
+        n_groundframe = stream.read32()
+    else:
+        n_groundframe = 0
+
+    n_objectstate = stream.read32()
+    n_decalstate = stream.read32()
+    n_trigger = stream.read32()
+    n_detaillevel = stream.read32()
+    n_mesh = stream.read32()
+
+    if stream.dtsVersion < 23:
+        _ = stream.read32()
+
+    n_name = stream.read32()
+
+    return ShapeCounts(n_node, n_object, n_decal, n_subshape, n_ifl, n_noderotation, n_nodetranslation,
+                       n_nodescaleuniform, n_nodescalealigned, n_nodescalearbitrary, n_groundframe,
+                       n_objectstate, n_decalstate, n_trigger, n_detaillevel, n_mesh, n_name)
+
+
+@dataclasses.dataclass
+class ShapeHeader(object):
+    """ What :py:func:`probe` can tell about a DTS file without decoding its meshes or keyframes. """
+    dtsVersion: int
+    exporterVersion: int
+    counts: ShapeCounts
+    smallest_size: float
+    smallest_detail_level: int
+    radius: float
+    radius_tube: float
+    center: dts_math.Vector
+    bounds: dts_utils.Box
+    names: list[str]
+    sequence_count: int
+
+
+def skip_sections(stream: dts_stream.InStream,
+                  counts: ShapeCounts,
+                  sections: None | dict[str, dts_stream.Cursor]=None,
+                  mesh_cursors: None | list[dts_stream.Cursor]=None) -> None:
+    """ Move ``stream`` from the node table to the name table without decoding anything in between.
+
+    :param stream: Positioned right after the bounds guard.
+    :param counts:
+    :param sections: If given, filled with the cursor at the start of every section.
+    :param mesh_cursors: If given, filled with the cursor at the start of every mesh.
+    :raises :py:`EOFError`:
+    :raises :py:`AssertionError`:
+    """
+    def mark(section):
+        if sections is not None:
+            sections[section] = stream.tell()
+
+    # Nodes, objects, decals (which have no data) and IFL materials
+    mark("nodes")
+    stream.skip32(counts.node * 5)
+    stream.guard()
+    mark("objects")
+    stream.skip32(counts.object * 6)
+    stream.guard()
+    mark("decals")
+    stream.guard()
+    mark("iflmaterials")
+    stream.skip32(counts.ifl * 5)
+    stream.guard()
+
+    # Subshapes
+    mark("subshapes")
+    stream.skip32(counts.subshape * 3)
+    stream.guard()
+    stream.skip32(counts.subshape * 3)
+    stream.guard()
+
+    if stream.dtsVersion < 16:
+        stream.skip32(stream.read32())
+
+    # Default transforms and keyframes
+    mark("keyframes")
+    stream.skip16(counts.node * 4 + counts.noderotation * 4)
+    stream.skip32(counts.node * 3 + counts.nodetranslation * 3)
+    stream.guard()
+
+    if stream.dtsVersion > 21:
+        mark("scales")
+        stream.skip32(counts.nodescaleuniform + counts.nodescalealigned * 3 + counts.nodescalearbitrary * 3)
+        stream.skip16(counts.nodescalearbitrary * 4)
+        stream.guard()
+
+    if stream.dtsVersion > 23:
+        mark("ground")
+        stream.skip32(counts.groundframe * 3)
+        stream.skip16(counts.groundframe * 4)
+        stream.guard()
+
+    # Object states, decal states, triggers and detail levels
+    mark("objectstates")
+    stream.skip32(counts.objectstate * 3)
+    stream.guard()
+    mark("decalstates")
+    stream.skip32(counts.decalstate)
+    stream.guard()
+    mark("triggers")
+    stream.skip32(counts.trigger * 2)
+    stream.guard()
+    mark("detail_levels")
+    stream.skip32(counts.detaillevel * 7)
+    stream.guard()
+
+    mark("meshes")
+    for i in range(counts.mesh):
+        if mesh_cursors is not None:
+            mesh_cursors.append(stream.tell())
+        dts_types.Mesh.skip(stream)
+    mark("meshes_end")
+    stream.guard()
+
+
+def probe(path: str) -> ShapeHeader:
+    """ Read the header, counts, bounds and name table of a DTS file.
+
+    Every other tri-buffer section, including meshes and keyframes, is skipped by moving the
+    stream cursors, and the file is memory-mapped, so only the pages that are touched get read.
+
+    :param path:
+    :raises :py:`EOFError`:
+    :raises :py:`AssertionError`:
+    """
+    with open(path, "rb") as fd, dts_stream.InStream(fd, mapped=True) as stream:
+        counts = read_counts(stream)
+        smallest_size = stream.read_float()
+        smallest_detail_level = stream.read32()
+        stream.guard()
+
+        radius = stream.read_float()
+        radius_tube = stream.read_float()
+        center = stream.read_vec3()
+        bounds = stream.read_box()
+        stream.guard()
+
+        skip_sections(stream, counts)
+
+        names = stream.read_string_table(counts.name)
+        stream.guard()
+
+        # The sequences follow the tri-buffer, which the stream has already consumed
+        sequence_count = dts_codec.read(fd, dts_codec.INT)[0]
+
+    return ShapeHeader(stream.dtsVersion, stream.exporterVersion, counts, smallest_size,
+                       smallest_detail_level, radius, radius_tube, center, bounds, names, sequence_count)
+
+
+def read_materials(buffer: io.BufferedReader, dtsVersion: int) -> list[dts_types.Material]:
+    """ Read the material block that follows the sequences.
+
+    :raises :py:`EOFError`:
+    :raises :py:`AssertionError`:
+    """
+    material_type = dts_codec.read(buffer, dts_codec.BYTE)[0]
+    assert material_type == 0x1
+
+    n_material = dts_codec.read(buffer, dts_codec.INT)[0]
+    materials = [dts_types.Material() for i in range(n_material)]
+
+    for material in materials:
+        if dtsVersion >= 26:
+            length = dts_codec.read(buffer, dts_codec.INT)[0]
+        else:
+            length = buffer.read(1)[0]
+
+        material.name = buffer.read(length).decode("cp1252")
+
+    # The remaining fields are stored column by column, each as one run of values
+    maps = dts_codec.read(buffer, dts_codec.columns(dts_codec.MATERIAL_MAPS, n_material))
+
+    if dtsVersion == 25:
+        buffer.read(4 * n_material)
+
+    factors = dts_codec.read(buffer, dts_codec.columns(dts_codec.MATERIAL_FACTORS, n_material))
+
+    for i, material in enumerate(materials):
+        (material.flags, material.reflectanceMap, material.bumpMap,
+         material.detailMap) = maps[i::n_material]
+        material.detailScale, material.reflectance = factors[i::n_material]
+
+    return materials
+
+
+def pack_materials(materials: list[dts_types.Material], dtsVersion: int) -> bytes:
+    """ The material block as :py:func:`read_materials` reads it. """
+    n_material = len(materials)
+    data = [struct.pack("<bi", 0x1, n_material)]
+
+    for material in materials:
+        name = material.name.encode("cp1252")
+
+        if dtsVersion >= 26:
+            data.append(dts_codec.INT.pack(len(name)))
+        else:
+            data.append(struct.pack("B", len(name)))
+
+        data.append(name)
+
+    data.append(dts_codec.columns(dts_codec.MATERIAL_MAPS, n_material).pack(
+        *[material.flags for material in materials],
+        *[material.reflectanceMap for material in materials],
+        *[material.bumpMap for material in materials],
+        *[material.detailMap for material in materials]))
+
+    if dtsVersion == 25:
+        data.append(bytes(4 * n_material))
+
+    data.append(dts_codec.columns(dts_codec.MATERIAL_FACTORS, n_material).pack(
+        *[material.detailScale for material in materials],
+        *[material.reflectance for material in materials]))
+
+    return b"".join(data)
+
+
+@dataclasses.dataclass
+class ShapeIndex(object):
+    """ Where every section of a DTS file starts, for random access without re-parsing.
+
+    Tri-buffer positions are :py:class:`dts_stream.Cursor` values for an :py:class:`dts_stream.InStream`
+    over the same file; ``sequences`` and ``materials`` are byte offsets into the file. An index is
+    only valid for the file ``size`` and ``mtime_ns`` it was built from.
+    """
+    FORMAT = 1
+
+    size: int
+    mtime_ns: int
+    dtsVersion: int
+    guards: list[dts_stream.Cursor]
+    sections: dict[str, dts_stream.Cursor]
+    meshes: list[dts_stream.Cursor]
+    sequences: int
+    materials: int
+
+    @staticmethod
+    def sidecar_path(path: str) -> str:
+        return os.path.splitext(path)[0] + ".dtsidx"
+
+    @classmethod
+    def build(cls, path: str) -> typing.Self:
+        """ Walk a DTS file once, recording every guard, section, mesh and tail position.
+
+        :raises :py:`EOFError`:
+        :raises :py:`AssertionError`:
+        """
+        sections = {}
+        meshes = []
+
+        with open(path, "rb") as fd, dts_stream.InStream(fd, mapped=True) as stream:
+            st = os.fstat(fd.fileno())
+            stream.guards = []
+
+            sections["header"] = stream.tell()
+            counts = read_counts(stream)
+            stream.skip32(2)
+            stream.guard()
+            sections["bounds"] = stream.tell()
+            stream.skip32(2 + 3 + 6)
+            stream.guard()
+
+            skip_sections(stream, counts, sections, meshes)
+
+            sections["names"] = stream.tell()
+            stream.read_string_table(counts.name)
+            stream.guard()
+
+            sequences = fd.tell()
+            for i in range(dts_codec.read(fd, dts_codec.INT)[0]):
+                dts_types.Sequence.skip(fd)
+            materials = fd.tell()
+
+        return cls(st.st_size, st.st_mtime_ns, stream.dtsVersion, stream.guards, sections, meshes,
+                   sequences, materials)
+
+    @classmethod
+    def load(cls, path: str) -> None | typing.Self:
+        """ Read the sidecar index of a DTS file, or ``None`` if it is missing or out of date. """
+        try:
+            with open(cls.sidecar_path(path), "r") as fd:
+                data = json.load(fd)
+            st = os.stat(path)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("format") != cls.FORMAT or data["size"] != st.st_size or data["mtime_ns"] != st.st_mtime_ns:
+            return None
+
+        cursor = lambda values: dts_stream.Cursor(*values)
+        return cls(data["size"], data["mtime_ns"], data["dtsVersion"],
+                   list(map(cursor, data["guards"])),
+                   {name: cursor(values) for name, values in data["sections"].items()},
+                   list(map(cursor, data["meshes"])),
+                   data["sequences"], data["materials"])
+
+    @classmethod
+    def get(cls, path: str, write: bool=True) -> typing.Self:
+        """ Load the sidecar index of a DTS file, building (and by default writing) it if needed. """
+        index = cls.load(path)
+
+        if index is None:
+            index = cls.build(path)
+
+            if write:
+                index.save(path)
+
+        return index
+
+    def save(self, path: str) -> None:
+        """ Write this index as the sidecar of the DTS file at ``path``. """
+        data = dataclasses.asdict(self)
+        data["format"] = self.FORMAT
+
+        with open(self.sidecar_path(path), "w") as fd:
+            json.dump(data, fd)
+
+    def read_mesh(self, stream: dts_stream.InStream, index: int, mesh_class: type=dts_types.Mesh) -> dts_types.Mesh:
+        """ Decode mesh ``index`` from a stream over the indexed file. """
+        stream.seek(self.meshes[index])
+        return mesh_class.read(stream)
+
+    def read_materials(self, buffer: io.BufferedReader) -> list[dts_types.Material]:
+        """ Decode the materials from the indexed file without touching anything before them. """
+        buffer.seek(self.materials)
+        return read_materials(buffer, self.dtsVersion)
+
+
+def read_meshes(path: str,
+                offset: int,
+                cursors: list[dts_stream.Cursor],
+                mesh_class: type=dts_types.Mesh,
+                enormals: bool=True) -> list[dts_types.Mesh]:
+    """ Decode the meshes at ``cursors`` from the DTS file at ``path``.
+
+    :param offset: Byte offset of the tri-buffer header in the file.
+    :param mesh_class: :py:class:`dts_types.Mesh` or a subclass to decode into.
+    :param enormals: See :py:meth:`dts_types.Mesh.read`.
+    """
+    with open(path, "rb") as fd:
+        fd.seek(offset)
+        stream = dts_stream.InStream(fd, mapped=True)
+
+    meshes = [None] * len(cursors)
+
+    with stream:
+        for i, cursor in enumerate(cursors):
+            stream.seek(cursor)
+            meshes[i] = mesh_class.read(stream, enormals)
+
+    return meshes
+
+
+def read_meshes_parallel(path: str,
+                         offset: int,
+                         cursors: list[dts_stream.Cursor],
+                         workers: int,
+                         mesh_class: type=dts_types.Mesh,
+                         enormals: bool=True) -> list[dts_types.Mesh]:
+    """ Decode the meshes at ``cursors`` with a pool of ``workers`` processes, keeping their order.
+
+    Every worker memory-maps the file itself, so the OS shares its pages between them, and
+    decodes a contiguous run of meshes with :py:func:`read_meshes`. The workers must be able to
+    import this module.
+    """
+    chunk = max(1, -(-len(cursors) // (workers * 4)))
+    chunks = [cursors[i:i + chunk] for i in range(0, len(cursors), chunk)]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(read_meshes, itertools.repeat(path), itertools.repeat(offset), chunks,
+                               itertools.repeat(mesh_class), itertools.repeat(enormals))
+        return list(itertools.chain.from_iterable(results))
+
+
+class LazyMeshes(collections.abc.Sequence):
+    """ Read-only stand-in for :py:attr:`Shape.meshes` that decodes each mesh on first access.
+
+    Only the most recently used ``cache_size`` meshes are kept decoded; evicted meshes are
+    decoded again from the stream when accessed, so changes made to them are not kept.
+    """
+
+    def __init__(self,
+                 stream: dts_stream.InStream,
+                 cursors: list[dts_stream.Cursor],
+                 cache_size: int=64,
+                 mesh_class: type=dts_types.Mesh,
+                 enormals: bool=True) -> None:
+        self.stream = stream
+        self.cursors = cursors
+        self.cache_size = cache_size
+        self.mesh_class = mesh_class
+        self.enormals = enormals
+        self._decoded: collections.OrderedDict[int, dts_types.Mesh] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.cursors)
+
+    def __getitem__(self, index: int | slice) -> typing.Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        index = range(len(self))[index]
+        mesh = self._decoded.get(index)
+
+        if mesh is None:
+            self.stream.seek(self.cursors[index])
+            mesh = self.mesh_class.read(self.stream, self.enormals)
+            self._decoded[index] = mesh
+
+            if len(self._decoded) > self.cache_size:
+                self._decoded.popitem(last=False)
+        else:
+            self._decoded.move_to_end(index)
+
+        return mesh
+
+    def close(self) -> None:
+        """ Close the stream the meshes are decoded from; only already decoded meshes remain usable. """
+        self.stream.close()
+
+
+@dataclasses.dataclass(frozen=True)
+class DecodeProfile(object):
+    """ Which parts of a DTS file :py:meth:`Shape.load` decodes. Skipped parts are stepped over by
+    moving the stream cursors and left empty on the shape, which then cannot be saved.
+
+    The header, bounds and name table are always decoded.
+    """
+    nodes: bool = True
+    """ Nodes, subshapes and the default node transforms. """
+    objects: bool = True
+    """ Objects, decals, IFL materials and detail levels. """
+    keyframes: bool = True
+    """ Keyframe pools, ground frames, object and decal states and triggers. """
+    meshes: bool = True
+    enormals: bool = True
+    """ Encoded mesh normals, which nothing but a re-save needs. """
+    sequences: bool = True
+    materials: bool = True
+
+    @property
+    def complete(self) -> bool:
+        return all(dataclasses.astuple(self))
+
+
+PROFILES: dict[str, DecodeProfile] = {
+    "full": DecodeProfile(),
+    "geometry-only": DecodeProfile(keyframes=False, enormals=False, sequences=False),
+    "skeleton-only": DecodeProfile(objects=False, keyframes=False, meshes=False, sequences=False,
+                                   materials=False),
+    "animation-only": DecodeProfile(objects=False, meshes=False, materials=False),
+    "metadata-only": DecodeProfile(nodes=False, keyframes=False, meshes=False),
+}
+
+
 class Shape(object):
     """  """
     def __init__(self) -> None:
-        self.nodes: list[dts_types.Node] = []
-        self.objects: list[dts_types.Object] = []
+        self.nodes: dts_types.RecordTable = dts_types.RecordTable(dts_types.Node)
+        self.objects: dts_types.RecordTable = dts_types.RecordTable(dts_types.Object)
         self.decals = []
         self.subshapes: list[dts_types.Subshape] = []
-        self.iflmaterials: list[dts_types.IflMaterial] = []
+        self.iflmaterials: dts_types.RecordTable = dts_types.RecordTable(dts_types.IflMaterial)
         self.materials: list[dts_types.Material] = []
-        self.default_rotations: list[None | mathutils.Quaternion] = []
-        self.default_translations: list[None | mathutils.Vector] = []
-        self.node_rotations: list[mathutils.Quaternion] = []
-        self.node_translations: list[mathutils.Vector] = []
-        self.node_uniform_scales: list[float] = []
-        self.node_aligned_scales: list[mathutils.Vector] = []
-        self.node_arbitrary_scale_factors: list[mathutils.Vector] = []
-        self.node_arbitrary_scale_rots: list[mathutils.Quaternion] = []
-        self.ground_translations: list[mathutils.Vector] = []
-        self.ground_rotations: list[mathutils.Quaternion] = []
-        self.objectstates: list[dts_types.ObjectState] = []
+        self.default_rotations: list[None | dts_math.Quaternion] = []
+        self.default_translations: list[None | dts_math.Vector] = []
+        self.node_rotations: dts_types.KeyframePool = dts_types.KeyframePool.rotations()
+        self.node_translations: dts_types.KeyframePool = dts_types.KeyframePool.vectors()
+        self.node_uniform_scales: dts_types.KeyframePool = dts_types.KeyframePool.scalars()
+        self.node_aligned_scales: dts_types.KeyframePool = dts_types.KeyframePool.vectors()
+        self.node_arbitrary_scale_factors: dts_types.KeyframePool = dts_types.KeyframePool.vectors()
+        self.node_arbitrary_scale_rots: dts_types.KeyframePool = dts_types.KeyframePool.rotations()
+        self.ground_translations: list[dts_math.Vector] = []
+        self.ground_rotations: list[dts_math.Quaternion] = []
+        self.objectstates: dts_types.RecordTable = dts_types.RecordTable(dts_types.ObjectState)
         self.decalstates: list[int] = []
-        self.triggers: list[dts_types.Trigger] = []
-        self.detail_levels: list[dts_types.DetailLevel] = []
+        self.triggers: dts_types.RecordTable = dts_types.RecordTable(dts_types.Trigger)
+        self.detail_levels: dts_types.RecordTable = dts_types.RecordTable(dts_types.DetailLevel)
         self.meshes: list[dts_types.Mesh] = []
         self.sequences: list[dts_types.Sequence] = []
         self.names: list[str] = []
@@ -41,8 +552,10 @@ class Shape(object):
         self.smallest_detail_level: int = 0
         self.radius: float = 0.0
         self.radius_tube: float = 0.0
-        self.center: mathutils.Vector = mathutils.Vector()
-        self.bounds: dts_utils.Box = dts_utils.Box(mathutils.Vector(), mathutils.Vector())
+        self.center: dts_math.Vector = dts_math.Vector()
+        self.bounds: dts_utils.Box = dts_utils.Box(dts_math.Vector(), dts_math.Vector())
+        self.profile: DecodeProfile = PROFILES["full"]
+        self.dtsVersion: int = 24
 
     def name(self, string: str) -> int:
         index = self._names_lookup.get(string.lower())
@@ -58,11 +571,11 @@ class Shape(object):
         index = self.name(string)
         return (index, self.names[index])
 
-    def get_world_mat(self, nodeid: int) -> mathutils.Matrix:
-        matrix = mathutils.Matrix()
+    def get_world_mat(self, nodeid: int) -> dts_math.Matrix:
+        matrix = dts_math.Matrix()
 
         while nodeid != -1:
-            cur = mathutils.Matrix.Translation(
+            cur = dts_math.Matrix.Translation(
                 self.default_translations[nodeid]
             ) * self.default_rotations[nodeid].to_matrix()
             matrix = cur * matrix
@@ -70,6 +583,34 @@ class Shape(object):
 
         return matrix
 
+    def track(self, seq: dts_types.Sequence, node: int, channel: str) -> None | memoryview:
+        """ Zero-copy ``(numKeyframes, k)`` view of the keyframes of one node in ``seq``.
+
+        Rotations are quantized int16 ``x, y, z, w`` rows, see :py:func:`dts_stream.dequantize_quats`.
+        Scales come from the uniform, aligned or arbitrary pool depending on the sequence flags.
+
+        :param seq:
+        :param node: Index of the node.
+        :param channel: ``"rotation"``, ``"translation"`` or ``"scale"``.
+        :returns: The view, or ``None`` if the channel is not animated for the node.
+        """
+        if channel == "rotation":
+            return dts_types.keyframe_track(seq, node, seq.rotationMatters, seq.baseRotation, self.node_rotations)
+        elif channel == "translation":
+            return dts_types.keyframe_track(
+                seq, node, seq.translationMatters, seq.baseTranslation, self.node_translations)
+        elif channel == "scale":
+            if seq.flags & dts_types.Sequence.UniformScale:
+                pool = self.node_uniform_scales
+            elif seq.flags & dts_types.Sequence.AlignedScale:
+                pool = self.node_aligned_scales
+            else:
+                pool = self.node_arbitrary_scale_factors
+
+            return dts_types.keyframe_track(seq, node, seq.scaleMatters, seq.baseScale, pool)
+
+        raise ValueError("unknown channel {!r}".format(channel))
+
     def verify(self):
         """  
         
@@ -83,12 +624,12 @@ class Shape(object):
         assert len(self.node_arbitrary_scale_factors) == len(self.node_arbitrary_scale_rots)
         assert len(self.ground_translations) == len(self.ground_rotations)
 
-    def save(self, fd: str, dtsVersion: int=24) -> None:
-        """  
-        
-        :raises :py:`EOFError`:
+    def pack(self, dtsVersion: int=24) -> list[typing.Any]:
+        """ Encode the whole file as a scatter list of bytes-like chunks.
+
         :raises :py:`AssertionError`:
         """
+        assert self.profile.complete, "cannot save a partially decoded shape"
         stream = dts_stream.OutStream(dtsVersion)
 
         # Header
@@ -127,13 +668,11 @@ class Shape(object):
         stream.guard(1)
 
         # Nodes
-        for node in self.nodes:
-            node.write(stream)
+        self.nodes.write(stream)
         stream.guard(2)
 
         # Objects
-        for obj in self.objects:
-            obj.write(stream)
+        self.objects.write(stream)
         stream.guard(3)
 
         # Decals
@@ -142,8 +681,7 @@ class Shape(object):
         stream.guard(4)
 
         # IFL materials
-        for ifl in self.iflmaterials:
-            ifl.write(stream)
+        self.iflmaterials.write(stream)
         stream.guard(5)
 
         # Subshapes
@@ -166,55 +704,44 @@ class Shape(object):
         assert len(self.default_rotations) == len(self.nodes)
         assert len(self.default_translations) == len(self.nodes)
 
-        for i in range(len(self.nodes)):
-            stream.write_quat(self.default_rotations[i])
-            stream.write_vec3(self.default_translations[i])
+        # (quaternions go to the 16-bit buffer and vectors to the 32-bit one,
+        # so writing them as two blocks keeps the per-node interleaving)
+        stream.write_quat_array(self.default_rotations)
+        stream.write_vec3_array(self.default_translations)
 
         # Animation translations and rotations
-        for point in self.node_translations:
-            stream.write_vec3(point)
-        for quat in self.node_rotations:
-            stream.write_quat(quat)
+        stream.write_float_array(self.node_translations.values)
+        stream.write16_array(self.node_rotations.values)
         stream.guard(8)
 
         # Default scales
-        for point in self.node_uniform_scales:
-            stream.write_float(point)
-        for point in self.node_aligned_scales:
-            stream.write_vec3(point)
-        for point in self.node_arbitrary_scale_factors:
-            stream.write_vec3(point)
+        stream.write_float_array(self.node_uniform_scales.values)
+        stream.write_float_array(self.node_aligned_scales.values)
+        stream.write_float_array(self.node_arbitrary_scale_factors.values)
         # if dtsVersion >= 26:
-        for quat in self.node_arbitrary_scale_rots:
-            stream.write_quat(quat)
+        stream.write16_array(self.node_arbitrary_scale_rots.values)
         stream.guard(9)
 
         # Ground transformations
         assert len(self.ground_translations) == len(self.ground_rotations)
-        for point in self.ground_translations:
-            self.write_vec3(point)
-        for quat in self.ground_rotations:
-            self.write_quat(quat)
+        stream.write_vec3_array(self.ground_translations)
+        stream.write_quat_array(self.ground_rotations)
         stream.guard(10)
 
         # dts_types.Object states
-        for state in self.objectstates:
-            state.write(stream)
+        self.objectstates.write(stream)
         stream.guard(11)
 
         # Decal states
-        for state in self.decalstates:
-            state.write(stream)
+        stream.write32_array(self.decalstates)
         stream.guard(12)
 
         # Triggers
-        for trigger in self.triggers:
-            trigger.write(stream)
+        self.triggers.write(stream)
         stream.guard(13)
 
         # Detail levels
-        for lod in self.detail_levels:
-            lod.write(stream)
+        self.detail_levels.write(stream)
         stream.guard(14)
 
         # Meshes
@@ -228,262 +755,282 @@ class Shape(object):
         stream.guard()
 
         # Finished with the 3-buffer section
-        stream.flush(fd)
+        chunks = stream.chunks()
 
         # Sequences
-        dts_stream.ws(fd, "<i", len(self.sequences))
-
-        for seq in self.sequences:
-            seq.write(fd)
+        chunks.append(dts_codec.INT.pack(len(self.sequences)))
+        chunks.extend(seq.pack() for seq in self.sequences)
 
         # Materials
-        dts_stream.ws(fd, "b", 0x1)
-        dts_stream.ws(fd, "i", len(self.materials))
-
-        for mat in self.materials:
-            if dtsVersion >= 26:
-                dts_stream.ws(fd, "i", len(mat.name))
-            else:
-                dts_stream.ws(fd, "b", len(mat.name))
-
-            fd.write(mat.name.encode("cp1252"))
-        for mat in self.materials:
-            dts_stream.ws(fd, "i", mat.flags)
-        for mat in self.materials:
-            dts_stream.ws(fd, "i", mat.reflectanceMap)
-        for mat in self.materials:
-            dts_stream.ws(fd, "i", mat.bumpMap)
-        for mat in self.materials:
-            dts_stream.ws(fd, "i", mat.detailMap)
-        if dtsVersion == 25:
-            for mat in self.materials:
-                fd.write(b"\x00\x00\x00\x00")
-        for mat in self.materials:
-            dts_stream.ws(fd, "f", mat.detailScale)
-        for mat in self.materials:
-            dts_stream.ws(fd, "f", mat.reflectance)
-
-    def load(self, buffer: io.BufferedReader) -> None:
-        stream = dts_stream.InStream(buffer)
+        chunks.append(pack_materials(self.materials, dtsVersion))
 
-        # Header
-        n_node = stream.read32()
-        n_object = stream.read32()
-        n_decal = stream.read32()
-        n_subshape = stream.read32()
-        n_ifl = stream.read32()
-
-        if stream.dtsVersion < 22:
-            n_noderotation = stream.read32()
-            n_noderotation -= n_node
-            n_nodetranslation = n_noderotation
-            n_nodescaleuniform = 0
-            n_nodescalealigned = 0
-            n_nodescalearbitrary = 0
-        else:
-            n_noderotation = stream.read32()
-            n_nodetranslation = stream.read32()
-            n_nodescaleuniform = stream.read32()
-            n_nodescalealigned = stream.read32()
-            n_nodescalearbitrary = stream.read32()
-
-        if stream.dtsVersion > 23:
-            n_groundframe = stream.read32()
-        else:
-            n_groundframe = 0
+        return chunks
 
-        n_objectstate = stream.read32()
-        n_decalstate = stream.read32()
-        n_trigger = stream.read32()
-        n_detaillevel = stream.read32()
-        n_mesh = stream.read32()
+    def save(self, fd: io.BufferedWriter, dtsVersion: int=24) -> None:
+        """ Write the whole file to ``fd`` in one call.
 
-        if stream.dtsVersion < 23:
-            _ = stream.read32()
-
-        n_name = stream.read32()
-        self.smallest_size = stream.read_float()
-        self.smallest_detail_level = stream.read32()
-        stream.guard()
+        :raises :py:`AssertionError`:
+        """
+        fd.write(b"".join(self.pack(dtsVersion)))
 
-        # Misc geometry properties
-        self.radius = stream.read_float()
-        self.radius_tube = stream.read_float()
-        self.center = stream.read_vec3()
-        self.bounds = stream.read_box()
-        stream.guard()
+    def save_file(self, path: str, dtsVersion: int=24) -> None:
+        """ Atomically replace the file at ``path``, see :py:func:`dts_stream.write_file`.
 
-        # Primary data
-        self.nodes = [dts_types.Node.read(stream) for i in range(n_node)]
-        stream.guard()
-        self.objects = [dts_types.Object.read(stream) for i in range(n_object)]
-        stream.guard()
-        self.decals = [dts_types.Decal.read(stream) for i in range(n_decal)]
-        stream.guard()
-        self.iflmaterials = [dts_types.IflMaterial.read(stream) for i in range(n_ifl)]
-        stream.guard()
+        :raises :py:`AssertionError`:
+        """
+        dts_stream.write_file(path, self.pack(dtsVersion))
+
+    def load(self,
+             buffer: io.BufferedReader,
+             mapped: bool=False,
+             lazy: bool=False,
+             mesh_cache_size: int=64,
+             index: None | ShapeIndex=None,
+             workers: int=1,
+             mesh_class: type=dts_types.Mesh,
+             profile: str | DecodeProfile="full") -> None:
+        """  
 
-        # Subshapes
-        self.subshapes = [
-            dts_types.Subshape(0, 0, 0, 0, 0, 0) for i in range(n_subshape)
-        ]
-        for i in range(n_subshape):
-            self.subshapes[i].firstNode = stream.read32()
-        for i in range(n_subshape):
-            self.subshapes[i].firstObject = stream.read32()
-        for i in range(n_subshape):
-            self.subshapes[i].firstDecal = stream.read32()
-        stream.guard()
-        for i in range(n_subshape):
-            self.subshapes[i].numNodes = stream.read32()
-        for i in range(n_subshape):
-            self.subshapes[i].numObjects = stream.read32()
-        for i in range(n_subshape):
-            self.subshapes[i].numDecals = stream.read32()
-        stream.guard()
+        :param buffer:
+        :param mapped: Decode the tri-buffer section straight from a memory map of the file,
+            see :py:class:`dts_stream.InStream`.
+        :param lazy: Only record where each mesh starts and make :py:attr:`meshes` a
+            :py:class:`LazyMeshes` that decodes them on first access. Best combined with ``mapped``.
+        :param mesh_cache_size: How many decoded meshes a lazy :py:attr:`meshes` keeps around.
+        :param index: A :py:class:`ShapeIndex` of the file, which lets a lazy or parallel load skip the
+            mesh pre-scan.
+        :param workers: Decode the meshes across this many processes, see :py:func:`read_meshes_parallel`.
+        :param mesh_class: :py:class:`dts_types.Mesh` or a subclass such as :py:class:`dts_types.ArrayMesh`
+            to decode the meshes into.
+        :param profile: A :py:class:`DecodeProfile` or the name of one in :py:data:`PROFILES`, to decode
+            only the parts of the file a tool needs.
+        :raises :py:`EOFError`:
+        :raises :py:`AssertionError`:
+        """
+        if isinstance(profile, str):
+            profile = PROFILES[profile]
 
-        # MeshIndexList (obsolete data)
-        if stream.dtsVersion < 16:
-            for i in range(stream.read32()):
-                stream.read32()
+        self.profile = profile
 
-        # Default translations and rotations
-        self.default_rotations = [None] * n_node
-        self.default_translations = [None] * n_node
+        # Worker processes re-open the file by name, so anything else is decoded serially
+        if not isinstance(getattr(buffer, "name", None), str):
+            workers = 1
 
-        for i in range(n_node):
-            self.default_rotations[i] = stream.read_quat()
-            self.default_translations[i] = stream.read_vec3()
+        offset = buffer.tell()
+        stream = dts_stream.InStream(buffer, mapped)
 
-        # Animation translations and rotations
-        self.node_translations = [
-            stream.read_vec3() for i in range(n_nodetranslation)
-        ]
-        self.node_rotations = [
-            stream.read_quat() for i in range(n_noderotation)
-        ]
-        stream.guard()
+        try:
+            self.dtsVersion = stream.dtsVersion
 
-        # Default scales
-        if stream.dtsVersion > 21:
-            self.node_uniform_scales = [
-                stream.read_float() for i in range(n_nodescaleuniform)
-            ]
-            self.node_aligned_scales = [
-                stream.read_vec3() for i in range(n_nodescalealigned)
-            ]
-            self.node_arbitrary_scale_factors = [
-                stream.read_vec3() for i in range(n_nodescalearbitrary)
-            ]
-            self.node_arbitrary_scale_rots = [
-                stream.read_quat() for i in range(n_nodescalearbitrary)
-            ]
+            # Header
+            counts = read_counts(stream)
+            self.smallest_size = stream.read_float()
+            self.smallest_detail_level = stream.read32()
             stream.guard()
-        else:
-            self.node_uniform_scales = [None] * n_nodescaleuniform
-            self.node_aligned_scales = [None] * n_nodescalealigned
-            self.node_arbitrary_scale_factors = [None] * n_nodescalearbitrary
-            self.node_arbitrary_scale_rots = [None] * n_nodescalearbitrary
-        # ???
-        # print(stream.dtsVersion)
-        # print(stream.sequence)
-        # if stream.dtsVersion > 21:
-        # 	what1 = stream.read32()
-        # 	what2 = stream.read32()
-        # 	what3 = stream.read32()
-        # 	stream.guard()
 
-        # Ground transformations
-        if stream.dtsVersion > 23:
-            self.ground_translations = [
-                stream.read_vec3() for i in range(n_groundframe)
-            ]
-            self.ground_rotations = [
-                stream.read_quat() for i in range(n_groundframe)
-            ]
+            # Misc geometry properties
+            self.radius = stream.read_float()
+            self.radius_tube = stream.read_float()
+            self.center = stream.read_vec3()
+            self.bounds = stream.read_box()
             stream.guard()
-        else:
-            self.ground_translations = [None] * n_groundframe
-            self.ground_rotations = [None] * n_groundframe
 
-        # dts_types.Object states
-        self.objectstates = [
-            dts_types.ObjectState.read(stream) for i in range(n_objectstate)
-        ]
-        stream.guard()
+            # Primary data
+            if profile.nodes:
+                self.nodes = dts_types.RecordTable.read(dts_types.Node, stream, counts.node)
+            else:
+                stream.skip32(counts.node * 5)
+            stream.guard()
 
-        # Decal states
-        self.decalstates = [stream.read32() for i in range(n_decalstate)]
-        stream.guard()
+            if profile.objects:
+                self.objects = dts_types.RecordTable.read(dts_types.Object, stream, counts.object)
+                stream.guard()
+                self.decals = [dts_types.Decal.read(stream) for i in range(counts.decal)]
+                stream.guard()
+                self.iflmaterials = dts_types.RecordTable.read(dts_types.IflMaterial, stream, counts.ifl)
+            else:
+                stream.skip32(counts.object * 6)
+                stream.guard()
+                stream.guard()
+                stream.skip32(counts.ifl * 5)
+            stream.guard()
 
-        # Triggers
-        self.triggers = [dts_types.Trigger.read(stream) for i in range(n_trigger)]
-        stream.guard()
+            # Subshapes
+            if profile.nodes:
+                self.subshapes = [
+                    dts_types.Subshape(0, 0, 0, 0, 0, 0) for i in range(counts.subshape)
+                ]
+                for i in range(counts.subshape):
+                    self.subshapes[i].firstNode = stream.read32()
+                for i in range(counts.subshape):
+                    self.subshapes[i].firstObject = stream.read32()
+                for i in range(counts.subshape):
+                    self.subshapes[i].firstDecal = stream.read32()
+                stream.guard()
+                for i in range(counts.subshape):
+                    self.subshapes[i].numNodes = stream.read32()
+                for i in range(counts.subshape):
+                    self.subshapes[i].numObjects = stream.read32()
+                for i in range(counts.subshape):
+                    self.subshapes[i].numDecals = stream.read32()
+                stream.guard()
+            else:
+                stream.skip32(counts.subshape * 3)
+                stream.guard()
+                stream.skip32(counts.subshape * 3)
+                stream.guard()
+
+            # MeshIndexList (obsolete data)
+            if stream.dtsVersion < 16:
+                stream.skip32(stream.read32())
+
+            # Default translations and rotations
+            # (quaternions live in the 16-bit buffer and vectors in the 32-bit one,
+            # so the interleaved per-node pairs can be read as two blocks)
+            if profile.nodes:
+                self.default_rotations = dts_stream.quaternions(stream.read_quat_array(counts.node))
+                self.default_translations = dts_stream.vectors(stream.read_vec3_array(counts.node))
+            else:
+                stream.skip16(counts.node * 4)
+                stream.skip32(counts.node * 3)
 
-        # Detail levels
-        self.detail_levels = [
-            dts_types.DetailLevel.read(stream) for i in range(n_detaillevel)
-        ]
-        stream.guard()
+            # Animation translations and rotations
+            if profile.keyframes:
+                self.node_translations = dts_types.KeyframePool.vectors(stream.read_vec3_array(counts.nodetranslation))
+                self.node_rotations = dts_types.KeyframePool.rotations(stream.read_quat_array(counts.noderotation))
+            else:
+                stream.skip32(counts.nodetranslation * 3)
+                stream.skip16(counts.noderotation * 4)
+            stream.guard()
 
-        # Meshes
-        self.meshes = [dts_types.Mesh.read(stream) for i in range(n_mesh)]
-        stream.guard()
+            # Default scales
+            if stream.dtsVersion > 21 and not profile.keyframes:
+                stream.skip32(counts.nodescaleuniform + counts.nodescalealigned * 3 + counts.nodescalearbitrary * 3)
+                stream.skip16(counts.nodescalearbitrary * 4)
+                stream.guard()
+            elif stream.dtsVersion > 21:
+                self.node_uniform_scales = dts_types.KeyframePool.scalars(
+                    stream.read_float_array(counts.nodescaleuniform))
+                self.node_aligned_scales = dts_types.KeyframePool.vectors(
+                    stream.read_vec3_array(counts.nodescalealigned))
+                self.node_arbitrary_scale_factors = dts_types.KeyframePool.vectors(
+                    stream.read_vec3_array(counts.nodescalearbitrary))
+                self.node_arbitrary_scale_rots = dts_types.KeyframePool.rotations(
+                    stream.read_quat_array(counts.nodescalearbitrary))
+                stream.guard()
+            else:
+                # Scales only exist from version 22 on, so their counts are always zero here
+                self.node_uniform_scales = dts_types.KeyframePool.scalars()
+                self.node_aligned_scales = dts_types.KeyframePool.vectors()
+                self.node_arbitrary_scale_factors = dts_types.KeyframePool.vectors()
+                self.node_arbitrary_scale_rots = dts_types.KeyframePool.rotations()
+            # ???
+            # print(stream.dtsVersion)
+            # print(stream.sequence)
+            # if stream.dtsVersion > 21:
+            # 	what1 = stream.read32()
+            # 	what2 = stream.read32()
+            # 	what3 = stream.read32()
+            # 	stream.guard()
+
+            # Ground transformations
+            if stream.dtsVersion > 23 and not profile.keyframes:
+                stream.skip32(counts.groundframe * 3)
+                stream.skip16(counts.groundframe * 4)
+                stream.guard()
+            elif stream.dtsVersion > 23:
+                self.ground_translations = dts_stream.vectors(stream.read_vec3_array(counts.groundframe))
+                self.ground_rotations = dts_stream.quaternions(stream.read_quat_array(counts.groundframe))
+                stream.guard()
+            elif profile.keyframes:
+                self.ground_translations = [None] * counts.groundframe
+                self.ground_rotations = [None] * counts.groundframe
+
+            if profile.keyframes:
+                # dts_types.Object states
+                self.objectstates = dts_types.RecordTable.read(dts_types.ObjectState, stream, counts.objectstate)
+                stream.guard()
+
+                # Decal states
+                self.decalstates = stream.read32_array(counts.decalstate).tolist()
+                stream.guard()
+
+                # Triggers
+                self.triggers = dts_types.RecordTable.read(dts_types.Trigger, stream, counts.trigger)
+                stream.guard()
+            else:
+                stream.skip32(counts.objectstate * 3)
+                stream.guard()
+                stream.skip32(counts.decalstate)
+                stream.guard()
+                stream.skip32(counts.trigger * 2)
+                stream.guard()
+
+            # Detail levels
+            if profile.objects:
+                self.detail_levels = dts_types.RecordTable.read(dts_types.DetailLevel, stream, counts.detaillevel)
+            else:
+                stream.skip32(counts.detaillevel * 7)
+            stream.guard()
 
-        # Names
-        self.names = [None] * n_name
-        self._names_lookup = {}
+            # Meshes
+            if not profile.meshes and index is not None:
+                stream.seek(index.sections["meshes_end"])
+            elif not profile.meshes:
+                for i in range(counts.mesh):
+                    dts_types.Mesh.skip(stream)
+            elif (lazy or workers > 1) and index is not None:
+                cursors = index.meshes
+                stream.seek(index.sections["meshes_end"])
+            elif lazy or workers > 1:
+                cursors = [None] * counts.mesh
+
+                for i in range(counts.mesh):
+                    cursors[i] = stream.tell()
+                    dts_types.Mesh.skip(stream)
+
+            if not profile.meshes:
+                pass
+            elif lazy:
+                self.meshes = LazyMeshes(stream, cursors, mesh_cache_size, mesh_class, profile.enormals)
+            elif workers > 1:
+                self.meshes = read_meshes_parallel(buffer.name, offset, cursors, workers, mesh_class, profile.enormals)
+            else:
+                self.meshes = [mesh_class.read(stream, profile.enormals) for i in range(counts.mesh)]
+            stream.guard()
 
-        for i in range(n_name):
-            self.names[i] = stream.read_string()
-            self._names_lookup[self.names[i]] = i
+            # Names
+            self.names = stream.read_string_table(counts.name)
+            self._names_lookup = {name: i for i, name in enumerate(self.names)}
 
-        stream.guard()
+            stream.guard()
 
-        self.alpha_in = [None] * n_detaillevel
-        self.alpha_out = [None] * n_detaillevel
+            self.alpha_in = [None] * counts.detaillevel
+            self.alpha_out = [None] * counts.detaillevel
 
-        if stream.dtsVersion >= 26:
-            for i in range(n_detaillevel):
-                self.alphaIn[i] = stream.read32()
-            for i in range(n_detaillevel):
-                self.alphaOut[i] = stream.read32()
+            if stream.dtsVersion >= 26:
+                for i in range(counts.detaillevel):
+                    self.alphaIn[i] = stream.read32()
+                for i in range(counts.detaillevel):
+                    self.alphaOut[i] = stream.read32()
+        except BaseException:
+            stream.close()
+            raise
+
+        # Lazy meshes keep reading from the stream
+        if not isinstance(self.meshes, LazyMeshes):
+            stream.close()
 
         # Done with the tribuffer section
-        n_sequence = struct.unpack("i", buffer.read(4))[0]
-        self.sequences = [None] * n_sequence
-
-        for i in range(n_sequence):
-            self.sequences[i] = dts_types.Sequence.read(buffer)
-
-        material_type = struct.unpack("b", buffer.read(1))[0]
-        assert material_type == 0x1
-
-        n_material = struct.unpack("i", buffer.read(4))[0]
-        self.materials = [dts_types.Material() for i in range(n_material)]
-
-        for i in range(n_material):
-            if stream.dtsVersion >= 26:
-                length = struct.unpack("i", buffer.read(4))[0]
-            else:
-                length = struct.unpack("B", buffer.read(1))[0]
-
-            self.materials[i].name = buffer.read(length).decode("cp1252")
-
-        for i in range(n_material):
-            self.materials[i].flags = struct.unpack("I", buffer.read(4))[0]
-        for i in range(n_material):
-            self.materials[i].reflectanceMap = struct.unpack("i", buffer.read(4))[0]
-        for i in range(n_material):
-            self.materials[i].bumpMap = struct.unpack("i", buffer.read(4))[0]
-        for i in range(n_material):
-            self.materials[i].detailMap = struct.unpack("i", buffer.read(4))[0]
-
-        if stream.dtsVersion == 25:
-            for i in range(n_material):
-                buffer.read(4)
-
-        for i in range(n_material):
-            self.materials[i].detailScale = struct.unpack("f", buffer.read(4))[0]
-        for i in range(n_material):
-            self.materials[i].reflectance = struct.unpack("f", buffer.read(4))[0]
+        n_sequence = dts_codec.read(buffer, dts_codec.INT)[0]
+
+        if profile.sequences:
+            self.sequences = [dts_types.Sequence.read(buffer) for i in range(n_sequence)]
+        elif profile.materials and index is not None:
+            buffer.seek(index.materials)
+        elif profile.materials:
+            for i in range(n_sequence):
+                dts_types.Sequence.skip(buffer)
+
+        if profile.materials:
+            self.materials = read_materials(buffer, stream.dtsVersion)
@@ -1,22 +1,266 @@
 """  """
 
 import array
+import copyreg
 import ctypes
 import io
-import mathutils
+import mmap
+import os
+import stat
 import struct
+import tempfile
 import typing
 
+from . import dts_codec
+from . import dts_math
 from . import dts_utils
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# mathutils types cannot be pickled on their own; this lets decoded shapes and meshes cross
+# process boundaries
+copyreg.pickle(dts_math.Vector, lambda v: (dts_math.Vector, (tuple(v), )))
+copyreg.pickle(dts_math.Quaternion, lambda q: (dts_math.Quaternion, (tuple(q), )))
+
+# Per-component scale from a w, x, y, z quaternion to the on-disk x, y, z, w int16 layout
+QUAT_SCALE = (32767, 32767, 32767, -32767)
+
 # Shortcut for reading & writing struct data from & to a file descriptor
 def ws(fd, spec, *values):
     fd.write(struct.pack(spec, *values))
 
 
 def read_multi(buffer: io.BufferedReader, count: int, spec: str) -> tuple[typing.Any, ...]:
+    """ :raises :py:`EOFError`: """
     spec = str(count) + spec
-    return struct.unpack(spec, buffer.read(struct.calcsize(spec)))
+    size = struct.calcsize(spec)
+    data = buffer.read(size)
+
+    if len(data) != size:
+        raise EOFError()
+
+    return struct.unpack(spec, data)
+
+
+def read_array(buffer: io.BufferedReader, count: int, typecode: str) -> array.array:
+    """ Read ``count`` items straight into an :py:class:`array.array` without an intermediate tuple.
+
+    :raises :py:`EOFError`:
+    """
+    data = array.array(typecode)
+    raw = buffer.read(count * data.itemsize)
+
+    if len(raw) != count * data.itemsize:
+        raise EOFError()
+
+    data.frombytes(raw)
+    return data
+
+
+def map_buffer(buffer: io.BufferedReader, size: int) -> tuple[memoryview, None | mmap.mmap]:
+    """ Return a read-only view of the next ``size`` bytes of ``buffer`` and skip past them, and the
+    memory map behind the view, if any, for the caller to close.
+
+    Real files are memory-mapped so nothing is copied until it is actually decoded; anything
+    without a file descriptor is read once into a single bytes object.
+
+    :raises :py:`EOFError`:
+    """
+    offset = buffer.tell()
+    mapping = None
+
+    try:
+        fileno = buffer.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        view = memoryview(buffer.read(size))
+    else:
+        mapping = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapping)[offset:offset + size]
+        buffer.seek(offset + size)
+
+    if len(view) != size:
+        view.release()
+
+        if mapping is not None:
+            mapping.close()
+
+        raise EOFError()
+
+    return view, mapping
+
+
+def typecode(values: typing.Any) -> None | str:
+    """ The element type of a typed array or memoryview, or ``None`` for anything else. """
+    if isinstance(values, array.array):
+        return values.typecode
+    if isinstance(values, memoryview):
+        return values.format
+    return None
+
+
+def vectors(values: array.array | memoryview, size: int=3, kind: type=dts_math.Vector) -> list[dts_math.Vector]:
+    """ Group a flat float array, as returned by the bulk readers, into vectors.
+
+    :param values:
+    :param size: Number of components per vector.
+    :param kind: Type to build each group with.
+    """
+    values = values.tolist()
+    return [kind(values[i:i + size]) for i in range(0, len(values), size)]
+
+
+def flatten(values: typing.Any, size: int=3) -> typing.Any:
+    """ Flat components of a sequence of vectors. Typed arrays and views are already flat and
+    are returned as they are.
+
+    :param values:
+    :param size: Number of components per vector.
+    """
+    if typecode(values) is not None:
+        return values
+    return [v[i] for v in values for i in range(size)]
+
+
+def as_array(values: typing.Any, code: str) -> array.array:
+    """ Copy ``values`` into a new typed array of ``code``.
+
+    Typed arrays and views of the same element width are copied bytewise; for integers this
+    reinterprets the sign, so 16-bit indices read as ``h`` come out unsigned as ``H``.
+    """
+    result = array.array(code)
+    source = typecode(values)
+
+    if source is not None and array.array(source).itemsize == result.itemsize and \
+            (source == code or (source not in "fd" and code not in "fd")):
+        result.frombytes(raw_bytes(values))
+    else:
+        result.fromlist(values.tolist() if source is not None else list(values))
+
+    return result
+
+
+def wrap16(value: int) -> int:
+    """ Wrap an integer into the signed 16-bit range, like a C ``short`` cast. """
+    return ((value + 0x8000) & 0xFFFF) - 0x8000
+
+
+def quantize_quats(quats: typing.Any) -> array.array:
+    """ Quantize a whole block of quaternions to the on-disk ``x, y, z, w`` int16 layout in one call.
+
+    Matches :py:meth:`OutStream.write_quat`: components are scaled by 32767 (-32767 for w),
+    truncated toward zero and wrapped to 16 bits.
+
+    :param quats: ``w, x, y, z`` quaternions, or a flat float array of them.
+    """
+    if typecode(quats) is None:
+        quats = [c for q in quats for c in q]
+
+    out = array.array("h")
+
+    if numpy is not None:
+        wxyz = numpy.asarray(quats, dtype=numpy.float64).reshape(-1, 4)
+        xyzw = wxyz[:, (1, 2, 3, 0)] * QUAT_SCALE
+        out.frombytes(xyzw.astype(numpy.int64).astype(numpy.int16).tobytes())
+    else:
+        sx, sy, sz, sw = QUAT_SCALE
+        out.extend([
+            wrap16(int(c)) for w, x, y, z in zip(quats[0::4], quats[1::4], quats[2::4], quats[3::4])
+            for c in (x * sx, y * sy, z * sz, w * sw)
+        ])
+
+    return out
+
+
+def quantize_quat(q: typing.Any) -> tuple[int, int, int, int]:
+    """ Quantize one ``w, x, y, z`` quaternion, like :py:func:`quantize_quats` does a block. """
+    sx, sy, sz, sw = QUAT_SCALE
+    w, x, y, z = q
+    return (wrap16(int(x * sx)), wrap16(int(y * sy)), wrap16(int(z * sz)), wrap16(int(w * sw)))
+
+
+def dequantize_quats(values: typing.Any) -> array.array:
+    """ Dequantize a flat ``x, y, z, w`` int16 block back to a flat ``w, x, y, z`` float array in one call.
+
+    :param values: As returned by :py:meth:`InStream.read_quat_array` or :py:func:`quantize_quats`.
+    """
+    out = array.array("d")
+
+    if numpy is not None:
+        xyzw = numpy.asarray(values, dtype=numpy.int16).reshape(-1, 4)
+        out.frombytes((xyzw[:, (3, 0, 1, 2)] / QUAT_SCALE[::-1]).tobytes())
+    else:
+        sx, sy, sz, sw = QUAT_SCALE
+        out.extend([
+            c for x, y, z, w in zip(values[0::4], values[1::4], values[2::4], values[3::4])
+            for c in (w / sw, x / sx, y / sy, z / sz)
+        ])
+
+    return out
+
+
+def dequantize_quat(x: int, y: int, z: int, w: int) -> dts_math.Quaternion:
+    """ Dequantize one ``x, y, z, w`` int16 quaternion, like :py:func:`dequantize_quats` does a block. """
+    sx, sy, sz, sw = QUAT_SCALE
+    return dts_math.Quaternion((w / sw, x / sx, y / sy, z / sz))
+
+
+def quaternions(values: typing.Any) -> list[dts_math.Quaternion]:
+    """ Dequantize a flat ``x, y, z, w`` int16 array, as returned by :py:meth:`InStream.read_quat_array`.
+
+    :param values:
+    """
+    return vectors(dequantize_quats(values), 4, dts_math.Quaternion)
+
+
+def raw_bytes(values: array.array | memoryview) -> memoryview:
+    """ A byte view of a typed array or memoryview, suitable for ``array.frombytes``. """
+    return memoryview(values).cast("B")
+
+
+def file_mode(path: str) -> int:
+    """ Permission bits for a new file at ``path``: those of the file already there, or what
+    ``open`` would give a new file under the current umask.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_file(path: str, chunks: typing.Iterable[typing.Any]) -> None:
+    """ Replace the file at ``path`` with the concatenated ``chunks``, all at once.
+
+    The data is written to a temporary file next to ``path`` which is then renamed over it, so a
+    failure part way never leaves a truncated file behind. The new file keeps the permissions of
+    the one it replaces.
+    """
+    data = b"".join(chunks)
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temp = tempfile.mkstemp(prefix="." + name + ".", suffix=".tmp", dir=directory)
+
+    try:
+        try:
+            out = os.fdopen(fd, "wb")
+        except BaseException:
+            os.close(fd)
+            raise
+
+        with out:
+            out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+
+        # mkstemp creates the file readable by its owner only
+        os.chmod(temp, file_mode(path))
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
 
 
 class OutStream(object):
@@ -27,9 +271,10 @@ class OutStream(object):
         self.sequence32 = ctypes.c_int(0)
         self.sequence16 = ctypes.c_short(0)
         self.sequence8 = ctypes.c_byte(0)
-        self.buffer32 = []
-        self.buffer16 = []
-        self.buffer8 = []
+        # array.array range-checks every value it stores, so no per-value asserts are needed
+        self.buffer32 = array.array("i")
+        self.buffer16 = array.array("h")
+        self.buffer8 = array.array("b")
 
     def guard(self, specific=None):
         if specific != None:
@@ -41,7 +286,8 @@ class OutStream(object):
         self.sequence16.value += 1
         self.sequence8.value += 1
 
-    def flush(self, fd):
+    def chunks(self) -> list[typing.Any]:
+        """ The header and the three buffers, padded, as a scatter list ready to be joined or written. """
         # Force all buffers to have a size multiple of 4 bytes
         if len(self.buffer16) % 2 == 1: self.buffer16.append(0)
         while len(self.buffer8) % 4 != 0:
@@ -51,33 +297,35 @@ class OutStream(object):
         end16 = end32 + len(self.buffer16) // 2
         end8 = end16 + len(self.buffer8) // 4
 
-        fd.write(
-            struct.pack("hhiii", self.dtsVersion, self.exporterVersion, end8, end32,
-                 end16))
-        fd.write(struct.pack(str(len(self.buffer32)) + "i", *self.buffer32))
-        fd.write(struct.pack(str(len(self.buffer16)) + "h", *self.buffer16))
-        fd.write(struct.pack(str(len(self.buffer8)) + "b", *self.buffer8))
+        return [struct.pack("hhiii", self.dtsVersion, self.exporterVersion, end8, end32, end16),
+                self.buffer32, self.buffer16, self.buffer8]
+
+    def flush(self, fd):
+        fd.write(b"".join(self.chunks()))
 
     def write32(self, *values):
-        for value in values:
-            assert -2147483648 <= value <= 2147483647, "value {} out of range".format(
-                value)
-            assert type(value) == int, "type is {}, must be {}".format(
-                type(value), int)
+        self.buffer32.extend(values)
+
+    def write32_array(self, values):
+        """ Append a block of 32-bit integers (an :py:class:`array.array` is copied in one go). """
         self.buffer32.extend(values)
 
     def write16(self, *values):
-        #for value in values:
-        #	assert -32768 <= value <= 32767, "value {} out of range".format(value)
-        #	assert type(value) == int, "type is {}, must be {}".format(type(value), int)
-        #self.buffer16.extend(values)
-        self.buffer16.extend(map(lambda v: ctypes.c_short(int(v)).value, values))
+        # Wrap like a C short so unsigned 16-bit indices above 32767 still fit
+        self.buffer16.extend([wrap16(int(v)) for v in values])
+
+    def write16_array(self, values):
+        """ Append a block of 16-bit integers. Typed ``h``/``H`` arrays and views are copied bytewise. """
+        if typecode(values) in ("h", "H"):
+            self.buffer16.frombytes(raw_bytes(values))
+        else:
+            self.write16(*values)
 
     def write8(self, *values):
-        for value in values:
-            assert -128 <= value <= 127, "value {} out of range".format(value)
-            assert type(value) == int, "type is {}, must be {}".format(
-                type(value), int)
+        self.buffer8.extend(values)
+
+    def write8_array(self, values):
+        """ Append a block of signed bytes. """
         self.buffer8.extend(values)
 
     def write_u8(self, num):
@@ -85,17 +333,32 @@ class OutStream(object):
         self.write8(struct.unpack("b", struct.pack("B", num))[0])
 
     def write_float(self, *values):
-        self.write32(*map(lambda f: struct.unpack("i", struct.pack("f", f))[0], values))
+        self.buffer32.frombytes(raw_bytes(array.array("f", values)))
+
+    def write_float_array(self, values):
+        """ Append a block of floats. A typed ``f`` array or view is copied without conversion. """
+        if typecode(values) == "f":
+            self.buffer32.frombytes(raw_bytes(values))
+        else:
+            self.buffer32.frombytes(raw_bytes(array.array("f", values)))
 
     def write_string(self, string):
         self.write8(*string.encode("cp1252"))
         self.write8(0)
 
     def write_vec3(self, v):
-        self.write_float(v.x, v.y, v.z)
+        self.write_float(v[0], v[1], v[2])
 
     def write_vec2(self, v):
-        self.write_float(v.x, v.y)
+        self.write_float(v[0], v[1])
+
+    def write_vec3_array(self, vectors):
+        """ Append a block of 3D vectors, either as vector objects or as a flat float array. """
+        self.write_float_array(flatten(vectors, 3))
+
+    def write_vec2_array(self, vectors):
+        """ Append a block of 2D vectors, either as vector objects or as a flat float array. """
+        self.write_float_array(flatten(vectors, 2))
 
     def write_box(self, box):
         self.write_vec3(box.min)
@@ -103,30 +366,94 @@ class OutStream(object):
 
     def write_quat(self, quat):
         self.write16(
-            ctypes.c_short(int(quat.x * 32767)).value,
-            ctypes.c_short(int(quat.y * 32767)).value,
-            ctypes.c_short(int(quat.z * 32767)).value,
-            ctypes.c_short(int(quat.w * -32767)).value)
+            int(quat.x * 32767),
+            int(quat.y * 32767),
+            int(quat.z * 32767),
+            int(quat.w * -32767))
+
+    def write_quat_array(self, quats):
+        """ Append a block of quaternions, quantized the same way as :py:meth:`write_quat`. """
+        self.write16_array(quantize_quats(quats))
+
+
+class Cursor(typing.NamedTuple):
+    """ A saved :py:class:`InStream` position: the three buffer cursors plus the guard counters. """
+    tell32: int
+    tell16: int
+    tell8: int
+    sequence32: int
+    sequence16: int
+    sequence8: int
 
 
 class InStream(object):
     """  """
-    __slots__ = ('sequence32', 'sequence16', 'sequence8', 'dtsVersion', 'exporterVersion', 'buffer32', 'buffer16', 'buffer8', 'tell32', 'tell16' ,'tell8')
-    def __init__(self, buffer: io.BufferedReader):
+    __slots__ = ('sequence32', 'sequence16', 'sequence8', 'dtsVersion', 'exporterVersion', 'buffer32', 'buffer16', 'buffer8', 'tell32', 'tell16' ,'tell8', 'guards', 'mapping')
+    def __init__(self, buffer: io.BufferedReader, mapped: bool=False):
+        """  
+
+        :param buffer:
+        :param mapped: Build the 32/16/8-bit buffers as typed views over a memory map of the
+            file instead of copying them into arrays. Such a stream should be closed with
+            :py:meth:`close`, or used as a context manager, once nothing more is read from it.
+        :raises :py:`EOFError`:
+        """
+        self.mapping: None | mmap.mmap = None
         self.sequence32 = ctypes.c_int(0)
         self.sequence16 = ctypes.c_short(0)
         self.sequence8 = ctypes.c_byte(0)
-        self.dtsVersion, self.exporterVersion = struct.unpack("hh", buffer.read(4))
-        end8, end32, end16 = struct.unpack("iii", buffer.read(12))
+        self.dtsVersion, self.exporterVersion, end8, end32, end16 = dts_codec.read(buffer, dts_codec.STREAM_HEADER)
         num32 = end32
         num16 = (end16 - end32) * 2
         num8 = (end8 - end16) * 4
-        self.buffer32 = array.array("i", read_multi(buffer, num32, "i"))
-        self.buffer16 = array.array("h", read_multi(buffer, num16, "h"))
-        self.buffer8 = array.array("b", read_multi(buffer, num8, "b"))
+
+        if mapped:
+            view, self.mapping = map_buffer(buffer, num32 * 4 + num16 * 2 + num8)
+            self.buffer32 = view[:num32 * 4].cast("i")
+            self.buffer16 = view[num32 * 4:num32 * 4 + num16 * 2].cast("h")
+            self.buffer8 = view[num32 * 4 + num16 * 2:].cast("b")
+        else:
+            self.buffer32 = read_array(buffer, num32, "i")
+            self.buffer16 = read_array(buffer, num16, "h")
+            self.buffer8 = read_array(buffer, num8, "b")
+
         self.tell32 = 0
         self.tell16 = 0
         self.tell8 = 0
+        # Set to a list to record the position right after every guard
+        self.guards: None | list[Cursor] = None
+
+    def close(self) -> None:
+        """ Release the buffers and the memory map of a mapped stream; nothing can be read after.
+
+        Decoded data normally holds copies, but if a view into the map is still alive somewhere
+        the map cannot be closed yet and is left to the garbage collector.
+        """
+        if self.mapping is None:
+            return
+
+        for view in (self.buffer32, self.buffer16, self.buffer8):
+            try:
+                view.release()
+            except BufferError:
+                pass
+
+        self.buffer32 = array.array("i")
+        self.buffer16 = array.array("h")
+        self.buffer8 = array.array("b")
+
+        try:
+            self.mapping.close()
+        except BufferError:
+            pass
+
+        self.mapping = None
+
+    def __enter__(self) -> typing.Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def guard(self, specific: None | int=None) -> None:
         """  
@@ -143,6 +470,51 @@ class InStream(object):
         self.sequence16.value += 1
         self.sequence8.value += 1
 
+        if self.guards is not None:
+            self.guards.append(self.tell())
+
+    def tell(self) -> Cursor:
+        """ Save the current position so it can be restored with :py:meth:`seek`. """
+        return Cursor(self.tell32, self.tell16, self.tell8,
+                      self.sequence32.value, self.sequence16.value, self.sequence8.value)
+
+    def seek(self, cursor: Cursor) -> None:
+        """ Jump to a position previously returned by :py:meth:`tell`. """
+        self.tell32, self.tell16, self.tell8 = cursor.tell32, cursor.tell16, cursor.tell8
+        self.sequence32.value = cursor.sequence32
+        self.sequence16.value = cursor.sequence16
+        self.sequence8.value = cursor.sequence8
+
+    def skip32(self, count: int) -> None:
+        """ Advance past ``count`` 32-bit words without decoding them.
+
+        :raises :py:`EOFError`:
+        """
+        if self.tell32 + count > len(self.buffer32):
+            raise EOFError()
+
+        self.tell32 += count
+
+    def skip16(self, count: int) -> None:
+        """ Advance past ``count`` 16-bit words without decoding them.
+
+        :raises :py:`EOFError`:
+        """
+        if self.tell16 + count > len(self.buffer16):
+            raise EOFError()
+
+        self.tell16 += count
+
+    def skip8(self, count: int) -> None:
+        """ Advance past ``count`` bytes without decoding them.
+
+        :raises :py:`EOFError`:
+        """
+        if self.tell8 + count > len(self.buffer8):
+            raise EOFError()
+
+        self.tell8 += count
+
     def read32(self) -> int:
         """  
         
@@ -179,6 +551,45 @@ class InStream(object):
         self.tell8 += 1
         return data
 
+    def read32_array(self, count: int) -> memoryview:
+        """ Read ``count`` 32-bit words as a flat view, advancing the cursor once.
+
+        :raises :py:`EOFError`:
+        """
+        start = self.tell32
+
+        if start + count > len(self.buffer32):
+            raise EOFError()
+
+        self.tell32 += count
+        return memoryview(self.buffer32)[start:start + count]
+
+    def read16_array(self, count: int) -> memoryview:
+        """ Read ``count`` 16-bit words as a flat view, advancing the cursor once.
+
+        :raises :py:`EOFError`:
+        """
+        start = self.tell16
+
+        if start + count > len(self.buffer16):
+            raise EOFError()
+
+        self.tell16 += count
+        return memoryview(self.buffer16)[start:start + count]
+
+    def read8_array(self, count: int) -> memoryview:
+        """ Read ``count`` bytes as a flat view, advancing the cursor once.
+
+        :raises :py:`EOFError`:
+        """
+        start = self.tell8
+
+        if start + count > len(self.buffer8):
+            raise EOFError()
+
+        self.tell8 += count
+        return memoryview(self.buffer8)[start:start + count]
+
     def read_float(self):
         """  
         
@@ -186,6 +597,36 @@ class InStream(object):
         """
         return struct.unpack("f", struct.pack("i", self.read32()))[0]
 
+    def read_float_array(self, count: int) -> memoryview:
+        """ Read ``count`` floats from the 32-bit buffer as a flat view, without per-value conversion.
+
+        :raises :py:`EOFError`:
+        """
+        return self.read32_array(count).cast("B").cast("f")
+
+    def read_vec2_array(self, count: int) -> memoryview:
+        """ Read ``count`` 2D vectors as a flat ``x, y, ...`` float view.
+
+        :raises :py:`EOFError`:
+        """
+        return self.read_float_array(count * 2)
+
+    def read_vec3_array(self, count: int) -> memoryview:
+        """ Read ``count`` 3D vectors as a flat ``x, y, z, ...`` float view.
+
+        :raises :py:`EOFError`:
+        """
+        return self.read_float_array(count * 3)
+
+    def read_quat_array(self, count: int) -> memoryview:
+        """ Read ``count`` quantized quaternions as a flat ``x, y, z, w, ...`` int16 view.
+
+        See :py:func:`quaternions` to dequantize them.
+
+        :raises :py:`EOFError`:
+        """
+        return self.read16_array(count * 4)
+
     def read_string(self):
         """  
         
@@ -200,19 +641,49 @@ class InStream(object):
                 buf.append(byte)
         return buf.decode("cp1252")
 
+    def read_string_table(self, count: int) -> list[str]:
+        """ Read ``count`` consecutive null-terminated strings in one pass.
+
+        :raises :py:`EOFError`:
+        """
+        view = memoryview(self.buffer8).cast("B")[self.tell8:]
+
+        # Copy only a window the table is likely to fit in, growing it while it holds too few strings
+        size = min(len(view), 64 * (count + 1))
+        raw = view[:size].tobytes()
+
+        while raw.count(0) < count and size < len(view):
+            size = min(len(view), size * 4)
+            raw = view[:size].tobytes()
+
+        strings = [None] * count
+        pos = 0
+
+        for i in range(count):
+            end = raw.find(0, pos)
+
+            if end == -1:
+                raise EOFError()
+
+            strings[i] = raw[pos:end].decode("cp1252")
+            pos = end + 1
+
+        self.tell8 += pos
+        return strings
+
     def read_vec3(self):
         """  
         
         :raises :py:`EOFError`:
         """
-        return mathutils.Vector((self.read_float(), self.read_float(), self.read_float()))
+        return dts_math.Vector((self.read_float(), self.read_float(), self.read_float()))
 
     def read_vec2(self):
         """  
         
         :raises :py:`EOFError`:
         """
-        return mathutils.Vector((self.read_float(), self.read_float()))
+        return dts_math.Vector((self.read_float(), self.read_float()))
 
     def read_box(self):
         """  
@@ -226,8 +697,9 @@ class InStream(object):
         
         :raises :py:`EOFError`:
         """
-        x = self.read16() / 32767
-        y = self.read16() / 32767
-        z = self.read16() / 32767
-        w = self.read16() / -32767
-        return mathutils.Quaternion((w, x, y, z))
+        if self.tell16 + 4 > len(self.buffer16):
+            raise EOFError()
+
+        quat = dequantize_quat(*self.buffer16[self.tell16:self.tell16 + 4])
+        self.tell16 += 4
+        return quat
@@ -1,13 +1,25 @@
 """  """
 # vim: tabstop=8 noexpandtab
 
+import array
+import collections.abc
 import dataclasses
 import math
-import mathutils
+import operator
 import struct
 import typing
 
-import bpy
+from . import dts_codec
+from . import dts_math
+from . import dts_stream
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if typing.TYPE_CHECKING:
+    import bpy
 
 
 def bit(n: int) -> int:
@@ -16,90 +28,309 @@ def bit(n: int) -> int:
 
 @dataclasses.dataclass
 class Box(object):
-    min: mathutils.Vector
-    max: mathutils.Vector
+    min: dts_math.Vector
+    max: dts_math.Vector
 
     def __repr__(self):
         return "({}, {})".format(self.min, self.max)
 
 
-class Node(object):
-    
-    __slots__ = ('name', 'parent', 'firstObject', 'firstChild', 'nextSibling', 'mat', 'bl_ob')
-    def __init__(self, name: str, parent: int=-1) -> None:
-        self.name: str = name
-        self.parent: int = parent
+class Column(object):
+    """ Descriptor for one field of a :py:class:`Record`, stored in one column array of its table. """
 
-        # Unused
-        self.firstObject: int = -1
-        self.firstChild: int = -1
-        self.nextSibling: int = -1
-        self.mat = mathutils.Matrix.Identity(4)
+    __slots__ = ('offset', 'name', 'real')
 
-        # NOTE:TODO: Reference a Blender object. Might want to figure out a better way to do this.
-        self.bl_ob: None | bpy.types.Object = None
+    def __init__(self, offset: int, name: str, real: bool=False) -> None:
+        self.offset = offset
+        self.name = name
+        self.real = real
+
+    def __get__(self, record, owner=None):
+        if record is None:
+            return self
+
+        return record._table.columns[self.offset][record._index]
+
+    def __set__(self, record, value):
+        if not self.real:
+            value = operator.index(value)
+
+            if not -0x80000000 <= value <= 0x7FFFFFFF:
+                raise ValueError("{}.{} = {} out of range".format(type(record).__name__, self.name, value))
+
+        record._table.columns[self.offset][record._index] = value
+
+
+class Record(object):
+    """ Base for fixed-size records that are stored as rows of a :py:class:`RecordTable`.
+
+    A record is a view of one row: its ``fields`` are read from and written to the table's column
+    arrays, and ``reals`` names the fields that hold floats. Constructing a record directly gives
+    it a detached single-row table of its own, which it leaves when it is added to another table.
+    """
+
+    __slots__ = ('_table', '_index')
+
+    fields: tuple[str, ...] = ()
+    reals: frozenset[str] = frozenset()
+    codec: struct.Struct
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        for offset, name in enumerate(cls.fields):
+            setattr(cls, name, Column(offset, name, name in cls.reals))
+
+    def __init__(self, *values) -> None:
+        self._table = RecordTable(type(self), detached=True)
+        self._index = 0
+
+        for column in self._table.columns:
+            column.append(0)
+
+        self._table._rows.append(self)
+        self.init_row()
+
+        for name, value in zip(self.fields, values):
+            setattr(self, name, value)
+
+    def init_row(self) -> None:
+        """ Set the attributes a row carries besides its fields. Called for every row, including the
+        ones a table creates on first access.
+        """
+
+    def __repr__(self):
+        return "{}({})".format(
+            type(self).__name__, ", ".join("{}={!r}".format(name, getattr(self, name)) for name in self.fields))
 
     def write(self, stream):
-        stream.write32(self.name, self.parent, self.firstObject, self.firstChild, self.nextSibling)
+        stream.write32_array(array.array("i", self.codec.pack(*[getattr(self, name) for name in self.fields])))
 
     @classmethod
     def read(cls, stream):
-        obj = cls(stream.read32(), stream.read32())
-        obj.firstObject = stream.read32()
-        obj.firstChild = stream.read32()
-        obj.nextSibling = stream.read32()
-        return obj
+        table = RecordTable.read(cls, stream, 1)
+        table.detached = True
+        return table[0]
 
 
-class Object(object):
+class RecordTable(collections.abc.MutableSequence):
+    """ A table of :py:class:`Record` rows kept as one typed array per field, ``i`` or ``f`` for reals.
 
-    def __init__(self, name: str, numMeshes: int, firstMesh: int, node: Node) -> None:
-        self.name: str = name
-        self.numMeshes: int = numMeshes
-        self.firstMesh: int = firstMesh
-        self.node: Node = node
+    Rows are handed out as record views, created on first access and then kept, so a row is
+    always the same object and can carry extra attributes. Appending a record created on its own
+    moves it into the table; rows of other tables are copied instead.
 
-        # Unused
-        self.nextSibling: int = -1
-        self.firstDecal: int = -1
+    :param record: The :py:class:`Record` subclass of the rows.
+    :param words: Initial ``i`` array of ``len(record.fields)`` words per row, as stored in the files.
+    """
 
-    def write(self, stream):
-        stream.write32(self.name, self.numMeshes, self.firstMesh, self.node, self.nextSibling, self.firstDecal)
+    def __init__(self, record: type, words: None | array.array=None, detached: bool=False) -> None:
+        self.record = record
+        self.width = len(record.fields)
+        self.detached = detached
+        self.columns: list[array.array] = []
+
+        for offset, name in enumerate(record.fields):
+            column = array.array("i") if words is None else words[offset::self.width]
+
+            if name in record.reals:
+                column = array.array("f", column.tobytes())
+
+            self.columns.append(column)
+
+        self._rows: list[None | Record] = [None] * len(self.columns[0])
 
     @classmethod
-    def read(cls, stream) -> typing.Self:
-        obj = cls(stream.read32(), stream.read32(), stream.read32(), stream.read32())
-        obj.nextSibling = stream.read32()
-        obj.firstDecal = stream.read32()
-        return obj
+    def read(cls, record: type, stream, count: int) -> typing.Self:
+        """ Read ``count`` rows of ``record`` in one go.
 
+        :raises :py:`EOFError`:
+        """
+        return cls(record, dts_stream.as_array(stream.read32_array(count * len(record.fields)), "i"))
 
-class IflMaterial:
+    def words(self) -> array.array:
+        """ The rows as one ``i`` array of 32-bit words, as stored in the files. """
+        words = array.array("i", bytes(4 * self.width * len(self)))
 
-    def __init__(self, name, slot):
-        self.name = name
-        self.slot = slot
+        for offset, column in enumerate(self.columns):
+            words[offset::self.width] = column if column.typecode == "i" else array.array("i", column.tobytes())
 
-        # Unused
-        self.firstFrame = -1
-        self.time = -1
-        self.numFrames = -1
+        return words
 
     def write(self, stream):
-        stream.write32(self.name, self.slot, self.firstFrame, self.time, self.numFrames)
+        stream.write32_array(self.words())
 
-    @classmethod
-    def read(cls, stream):
-        instance = cls(stream.read32(), stream.read32())
-        instance.firstFrame = stream.read32()
-        instance.time = stream.read32()
-        instance.numFrames = stream.read32()
-        return instance
+    def column(self, name: str) -> array.array:
+        """ One field across all rows, as an ``i`` or ``f`` array. This is the table's own storage. """
+        return self.columns[self.record.fields.index(name)]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        index = range(len(self))[index]
+        row = self._rows[index]
+
+        if row is None:
+            row = self.record.__new__(self.record)
+            row._table = self
+            row._index = index
+            row.init_row()
+            self._rows[index] = row
+
+        return row
+
+    def _take(self, index: int, record: Record) -> None:
+        """ Copy ``record`` into row ``index`` and adopt it if it is detached. """
+        source = record._table
+
+        if source is self and record._index == index:
+            return
+
+        for column, source_column in zip(self.columns, source.columns):
+            column[index] = source_column[record._index]
+
+        if source.detached:
+            record._table = self
+            record._index = index
+            self._rows[index] = record
+        else:
+            self._rows[index] = None
+
+    def __setitem__(self, index, record):
+        index = range(len(self))[index]
+        old = self._rows[index]
+
+        if old is not None and old is not record:
+            self._detach(old)
+
+        self._take(index, record)
+
+    def __delitem__(self, index):
+        index = range(len(self))[index]
+        row = self._rows.pop(index)
+
+        if row is not None:
+            self._detach(row)
+
+        for column in self.columns:
+            del column[index]
+
+        self._reindex(index)
+
+    def insert(self, index, record):
+        index = range(len(self) + 1)[index]
+
+        for column in self.columns:
+            column.insert(index, 0)
+
+        self._rows.insert(index, None)
+        self._reindex(index + 1)
+        self._take(index, record)
+
+    def sort(self, key=None, reverse=False):
+        """ Sort the rows in place like :py:meth:`list.sort`; every row keeps its view. """
+        rows = sorted(self, key=key, reverse=reverse)
+        order = [row._index for row in rows]
+
+        self.columns = [array.array(column.typecode, [column[i] for i in order]) for column in self.columns]
+        self._rows = rows
+        self._reindex(0)
+
+    def _reindex(self, start: int) -> None:
+        for index in range(start, len(self._rows)):
+            if self._rows[index] is not None:
+                self._rows[index]._index = index
+
+    def _detach(self, row: Record) -> None:
+        """ Give a row that leaves the table a detached copy of its values. """
+        table = RecordTable(self.record, detached=True)
+
+        for column, source_column in zip(table.columns, self.columns):
+            column.append(source_column[row._index])
+
+        table._rows.append(row)
+        row._table = table
+        row._index = 0
+
+
+class Node(Record):
+    """  """
+
+    __slots__ = ('bl_ob', 'armature', 'bone', 'index', 'matrix', 'matrix_world', 'parent_node')
+
+    fields = ('name', 'parent', 'firstObject', 'firstChild', 'nextSibling')
+    codec = dts_codec.NODE
+
+    def __init__(self, name: int, parent: int=-1) -> None:
+        # firstObject, firstChild and nextSibling are unused
+        super().__init__(name, parent, -1, -1, -1)
+
+    def init_row(self) -> None:
+        # NOTE:TODO: Reference a Blender object. Might want to figure out a better way to do this.
+        self.bl_ob: None | bpy.types.Object = None
+        self.armature = None
+        self.bone = None
+        self.index = None
+        self.matrix = None
+        self.matrix_world = None
+        self.parent_node = None
+
+
+def link_parents(nodes: "RecordTable") -> bool:
+    """ Number exported nodes in table order and set each one's ``parent`` field from its ``parent_node``.
+
+    :return: False if a node comes before its parent node, which is left unlinked.
+    """
+    for index, node in enumerate(nodes):
+        if node.parent_node is not None:
+            if node.parent_node.index is None:
+                return False
+
+            node.parent = node.parent_node.index
+
+        node.index = index
+
+    return True
+
+
+class Object(Record):
+    """  """
+
+    __slots__ = ('has_transparency', )
+
+    fields = ('name', 'numMeshes', 'firstMesh', 'node', 'nextSibling', 'firstDecal')
+    codec = dts_codec.OBJECT
+
+    def __init__(self, name: int, numMeshes: int, firstMesh: int, node: int) -> None:
+        # nextSibling and firstDecal are unused
+        super().__init__(name, numMeshes, firstMesh, node, -1, -1)
+
+    def init_row(self) -> None:
+        self.has_transparency = False
+
+
+class IflMaterial(Record):
+    """  """
+
+    __slots__ = ()
+
+    fields = ('name', 'slot', 'firstFrame', 'time', 'numFrames')
+    codec = dts_codec.IFL_MATERIAL
+
+    def __init__(self, name, slot):
+        # firstFrame, time and numFrames are unused
+        super().__init__(name, slot, -1, -1, -1)
 
 
 class Decal(object):
     """  """
 
+    __slots__ = ()
+
     def write(self, stream):
         pass
 
@@ -108,7 +339,7 @@ class Decal(object):
         pass
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Subshape(object):
     firstNode: int
     firstObject: int
@@ -118,40 +349,41 @@ class Subshape(object):
     numDecals: int
 
 
-class ObjectState:
+class ObjectState(Record):
+    """  """
 
-    def __init__(self, vis, frame, matFrame):
-        self.vis = vis
-        self.frame = frame
-        self.matFrame = matFrame
+    __slots__ = ()
 
-    def write(self, stream):
-        stream.write_float(self.vis)
-        stream.write32(self.frame, self.matFrame)
+    fields = ('vis', 'frame', 'matFrame')
+    reals = frozenset(('vis', ))
+    codec = dts_codec.OBJECT_STATE
 
-    @classmethod
-    def read(cls, stream):
-        return cls(stream.read_float(), stream.read32(), stream.read32())
+    def __init__(self, vis, frame, matFrame):
+        super().__init__(vis, frame, matFrame)
 
 
-class Trigger:
+class Trigger(Record):
     StateOn = bit(31)
     InvertOnReverse = bit(30)
 
+    __slots__ = ()
+
+    fields = ('state', 'pos')
+    reals = frozenset(('pos', ))
+    codec = dts_codec.TRIGGER
+
     def __init__(self, state, pos):
-        self.state = state
-        self.pos = pos
+        super().__init__(state, pos)
 
-    def write(self, stream):
-        stream.write32(self.state)
-        stream.write_float(self.pos)
 
-    @classmethod
-    def read(cls, stream):
-        return cls(stream.read32(), stream.read_float())
+class DetailLevel(Record):
+    """  """
 
+    __slots__ = ()
 
-class DetailLevel:
+    fields = ('name', 'subshape', 'objectDetail', 'size', 'avgError', 'maxError', 'polyCount')
+    reals = frozenset(('size', 'avgError', 'maxError'))
+    codec = dts_codec.DETAIL_LEVEL
 
     def __init__(self,
                  name,
@@ -161,29 +393,8 @@ class DetailLevel:
                  avgError=-1.0,
                  maxError=-1.0,
                  polyCount=0):
-        self.name = name
-        self.subshape = subshape
-        self.objectDetail = objectDetail
-        self.size = size
-
-        # Unused
-        self.avgError = -1.0
-        self.maxError = -1.0
-        self.polyCount = 0
-
-    def write(self, stream):
-        stream.write32(self.name, self.subshape, self.objectDetail)
-        stream.write_float(self.size, self.avgError, self.maxError)
-        stream.write32(self.polyCount)
-
-    @classmethod
-    def read(cls, stream):
-        obj = cls(stream.read32(), stream.read32(), stream.read32(),
-                  stream.read_float())
-        obj.avgError = stream.read_float()
-        obj.maxError = stream.read_float()
-        obj.polyCount = stream.read32()
-        return obj
+        # avgError, maxError and polyCount are unused
+        super().__init__(name, subshape, objectDetail, size, -1.0, -1.0, 0)
 
 
 class Primitive:
@@ -195,6 +406,8 @@ class Primitive:
     NoMaterial = 0x10000000
     MaterialMask = 0x0FFFFFFF
 
+    __slots__ = ('firstElement', 'numElements', 'type')
+
     def __init__(self, firstElement, numElements, type):
         self.firstElement = firstElement
         self.numElements = numElements
@@ -204,10 +417,73 @@ class Primitive:
         stream.write16(self.firstElement, self.numElements)
         stream.write32(self.type)
 
+    def triangle_count(self):
+        if self.type & (Primitive.Strip | Primitive.Fan):
+            return max(0, self.numElements - 2)
+
+        return self.numElements // 3
+
+    def triangles(self, indices):
+        """ Vertex indices of the triangles of this primitive as a flat ``i`` array, three per triangle.
+
+        Triangle lists have each triangle reversed; strips and fans flip the winding of every
+        other triangle, and every triangle of a fan shares the first element.
+
+        :param indices: :py:attr:`Mesh.indices`, which indexed primitives refer to.
+        """
+        first = self.firstElement
+        last = first + self.numElements
+
+        if self.type & Primitive.Indexed:
+            elements = array.array("i", indices[first:last])
+        else:
+            elements = array.array("i", range(first, last))
+
+        n_triangle = self.triangle_count()
+        out = array.array("i", bytes(4 * 3 * n_triangle))
+
+        if not n_triangle:
+            return out
+
+        # Whole columns of the output are assigned from strided slices of the elements
+        if self.type & (Primitive.Strip | Primitive.Fan):
+            a, b = elements[2:], elements[1:-1]
+
+            if self.type & Primitive.Strip:
+                c = elements[:-2]
+            else:
+                c = array.array("i", elements[:1]) * n_triangle
+
+            out[0::6], out[1::6], out[2::6] = a[0::2], b[0::2], c[0::2]
+            out[3::6], out[4::6], out[5::6] = c[1::2], b[1::2], a[1::2]
+        else:
+            elements = elements[:3 * n_triangle]
+            out[0::3], out[1::3], out[2::3] = elements[2::3], elements[1::3], elements[0::3]
+
+        return out
+
     @classmethod
     def read(cls, stream):
         return cls(stream.read16(), stream.read16(), stream.read32())
 
+    @classmethod
+    def write_array(cls, stream, primitives):
+        stream.write16(*[n for prim in primitives for n in (prim.firstElement, prim.numElements)])
+        stream.write32_array([prim.type for prim in primitives])
+
+    @classmethod
+    def read_array(cls, stream, count):
+        elements = stream.read16_array(count * 2).tolist()
+        types = stream.read32_array(count).tolist()
+        return [cls(elements[i * 2], elements[i * 2 + 1], types[i]) for i in range(count)]
+
+
+def triangle_matrix(triangles: array.array) -> "numpy.ndarray":
+    """ The flat triangles of :py:meth:`Mesh.triangles` as a ``(T, 3)`` int32 matrix sharing their
+    memory. Requires numpy.
+    """
+    return numpy.frombuffer(triangles, numpy.int32).reshape(-1, 3)
+
 
 class Mesh:
     StandardType = 0
@@ -225,8 +501,8 @@ class Mesh:
     UseEncodedNormals = bit(28)
 
     def __init__(self, mtype):
-        self.bounds = Box(mathutils.Vector(), mathutils.Vector())
-        self.center = mathutils.Vector()
+        self.bounds = Box(dts_math.Vector(), dts_math.Vector())
+        self.center = dts_math.Vector()
         self.radius = 0
         self.numFrames = 1
         self.numMatFrames = 1
@@ -253,12 +529,61 @@ class Mesh:
     def set_flags(self, flag):
         self.type |= flag
 
+    def vertex_count(self):
+        return len(self.verts)
+
+    def triangle_count(self):
+        return sum(prim.triangle_count() for prim in self.primitives)
+
+    def triangles(self):
+        """ The triangles of all primitives as one flat ``i`` array of three vertex indices per
+        triangle, see :py:meth:`Primitive.triangles`, and the material index of every triangle (-1
+        for none) as an ``i`` array. :py:func:`triangle_matrix` views the triangles as rows.
+        """
+        triangles = array.array("i")
+        materials = array.array("i")
+
+        for prim in self.primitives:
+            triangles.extend(prim.triangles(self.indices))
+
+            if prim.type & Primitive.NoMaterial:
+                material = -1
+            else:
+                material = prim.type & Primitive.MaterialMask
+
+            materials.extend(array.array("i", [material]) * prim.triangle_count())
+
+        return triangles, materials
+
+    def tvertex_count(self):
+        return len(self.tverts)
+
+    def influence_columns(self):
+        """ Vertex indices, bone indices and weights of :py:attr:`influences` as parallel sequences. """
+        return ([vertex_index for vertex_index, _, _ in self.influences],
+                [bone_index for _, bone_index, _ in self.influences],
+                [weight for _, _, weight in self.influences])
+
+    def set_geometry(self, verts, tverts, normals, enormals, indices, mindices):
+        """ Store geometry handed over as flat typed arrays or views by the bulk readers. """
+        self.verts = dts_stream.vectors(verts)
+        self.tverts = dts_stream.vectors(tverts, 2)
+        self.normals = dts_stream.vectors(normals)
+        self.enormals = enormals.tolist()
+        self.indices = indices.tolist()
+        self.mindices = mindices.tolist()
+
+    def set_influences(self, vertex_indices, bone_indices, weights):
+        """ Store influences handed over as parallel typed arrays or views by the bulk readers. """
+        self.influences = [list(influence) for influence in
+                           zip(vertex_indices.tolist(), bone_indices.tolist(), weights.tolist())]
+
     def transformed_verts(self, mat):
         return map(lambda vert: mat * vert, self.verts)
 
     def calculate_bounds_mat(self, mat):
-        box = Box(mathutils.Vector((10e30, 10e30, 10e30)),
-                  mathutils.Vector((-10e30, -10e30, -10e30)))
+        box = Box(dts_math.Vector((10e30, 10e30, 10e30)),
+                  dts_math.Vector((-10e30, -10e30, -10e30)))
 
         for vert in self.transformed_verts(mat):
             box.min.x = min(box.min.x, vert.x)
@@ -283,7 +608,7 @@ class Mesh:
 
         for vert in self.transformed_verts(mat):
             delta = vert - center
-            radius = max(radius, mathutils.Vector((delta.x, delta.y)).length)
+            radius = max(radius, dts_math.Vector((delta.x, delta.y)).length)
 
         return radius
 
@@ -301,64 +626,52 @@ class Mesh:
         stream.write_float(self.radius)
 
         # Geometry data
-        stream.write32(len(self.verts))
-        for vert in self.verts:
-            stream.write_vec3(vert)
-        stream.write32(len(self.tverts))
-        for tvert in self.tverts:
-            stream.write_vec2(tvert)
+        stream.write32(self.vertex_count())
+        stream.write_vec3_array(self.verts)
+        stream.write32(self.tvertex_count())
+        stream.write_vec2_array(self.tverts)
 
         assert len(self.normals) == len(self.verts)
-        assert len(self.enormals) == len(self.verts)
-        for normal in self.normals:
-            stream.write_vec3(normal)
-        for enormal in self.enormals:
-            stream.write8(enormal)
+        assert len(self.enormals) == self.vertex_count()
+        stream.write_vec3_array(self.normals)
+        stream.write8_array(self.enormals)
 
         # Primitives and other stuff
         stream.write32(len(self.primitives))
-        for prim in self.primitives:
-            prim.write(stream)
+        Primitive.write_array(stream, self.primitives)
 
         #if stream.dtsVersion >= 25:
         stream.write32(len(self.indices))
-        stream.write16(*self.indices)
+        stream.write16_array(self.indices)
         stream.write32(len(self.mindices))
-        stream.write16(*self.mindices)
+        stream.write16_array(self.mindices)
         stream.write32(self.vertsPerFrame)
         stream.write32(self.get_flags())
         stream.guard()
 
         if mtype == Mesh.SkinType:
-            stream.write32(len(self.verts))
-            for v in self.verts:
-                stream.write_vec3(v)
-            for v in self.normals:
-                stream.write_vec3(v)
-            stream.write8(*self.enormals)
+            stream.write32(self.vertex_count())
+            stream.write_vec3_array(self.verts)
+            stream.write_vec3_array(self.normals)
+            stream.write8_array(self.enormals)
 
             stream.write32(len(self.bones))
-            for _, initial_transform in self.bones:
-                for f in initial_transform:
-                    stream.write_float(f)
-
-            stream.write32(len(self.influences))
-            for vertex_index, _, _ in self.influences:
-                stream.write32(vertex_index)
-            for _, bone_index, _ in self.influences:
-                stream.write32(bone_index)
-            for _, _, weight in self.influences:
-                stream.write_float(weight)
+            stream.write_float_array([f for _, initial_transform in self.bones for f in initial_transform])
+
+            vertex_indices, bone_indices, weights = self.influence_columns()
+            stream.write32(len(vertex_indices))
+            stream.write32_array(vertex_indices)
+            stream.write32_array(bone_indices)
+            stream.write_float_array(weights)
 
             stream.write32(len(self.bones))
-            for node_index, _ in self.bones:
-                stream.write32(node_index)
+            stream.write32_array([node_index for node_index, _ in self.bones])
 
             stream.guard()
         elif mtype != Mesh.StandardType:
             raise ValueError("cannot write {} mesh".format(mtype))
 
-    def read_standard_mesh(self, stream):
+    def read_standard_mesh(self, stream, enormals=True):
         stream.guard()
 
         self.numFrames = stream.read32()
@@ -370,66 +683,111 @@ class Mesh:
 
         # Geometry data
         n_vert = stream.read32()
-        self.verts = [stream.read_vec3() for i in range(n_vert)]
+        verts = stream.read_vec3_array(n_vert)
         n_tvert = stream.read32()
-        self.tverts = [stream.read_vec2() for i in range(n_tvert)]
-        self.normals = [stream.read_vec3() for i in range(n_vert)]
-        # TODO: don't read this when not relevant
-        self.enormals = [stream.read8() for i in range(n_vert)]
+        tverts = stream.read_vec2_array(n_tvert)
+        normals = stream.read_vec3_array(n_vert)
+
+        if enormals:
+            enormals = stream.read8_array(n_vert)
+        else:
+            stream.skip8(n_vert)
+            enormals = array.array("b")
 
         # Primitives and other stuff
-        self.primitives = [
-            Primitive.read(stream) for i in range(stream.read32())
-        ]
-        self.indices = [stream.read16() for i in range(stream.read32())]
-        self.mindices = [stream.read16() for i in range(stream.read32())]
+        self.primitives = Primitive.read_array(stream, stream.read32())
+        indices = stream.read16_array(stream.read32())
+        mindices = stream.read16_array(stream.read32())
         self.vertsPerFrame = stream.read32()
         self.set_flags(stream.read32())
 
         stream.guard()
+        self.set_geometry(verts, tverts, normals, enormals, indices, mindices)
 
-    def read_skin_mesh(self, stream):
-        self.read_standard_mesh(stream)
+    def read_skin_mesh(self, stream, enormals=True):
+        self.read_standard_mesh(stream, enormals)
 
+        # The skin repeats the vertices, normals and encoded normals read above
         sz = stream.read32()
-        _ = [stream.read_vec3() for i in range(sz)]
-        _ = [stream.read_vec3() for i in range(sz)]
-        _ = [stream.read8() for i in range(sz)]
+        stream.skip32(sz * 6)
+        stream.skip8(sz)
 
         sz = stream.read32()
-        self.bones = [[None, None] for i in range(sz)]
-
-        for i in range(sz):
-            initial_transform = [stream.read_float() for i in range(16)]
-            self.bones[i][1] = initial_transform
+        transforms = stream.read_float_array(sz * 16).tolist()
+        self.bones = [[None, transforms[i * 16:i * 16 + 16]] for i in range(sz)]
 
         sz = stream.read32()
-        self.influences = [[None, None, None] for i in range(sz)]
-
-        for i in range(sz):
-            self.influences[i][0] = stream.read32()
-        for i in range(sz):
-            self.influences[i][1] = stream.read32()
-        for i in range(sz):
-            self.influences[i][2] = stream.read_float()
+        vertex_indices = stream.read32_array(sz)
+        bone_indices = stream.read32_array(sz)
+        weights = stream.read_float_array(sz)
+        self.set_influences(vertex_indices, bone_indices, weights)
 
         sz = stream.read32()
         assert sz == len(self.bones)
 
-        for i in range(sz):
-            self.bones[i][0] = stream.read32()
+        for bone, node_index in zip(self.bones, stream.read32_array(sz).tolist()):
+            bone[0] = node_index
 
         stream.guard()
 
     @classmethod
-    def read(cls, stream):
+    def skip(cls, stream):
+        """ Advance ``stream`` past one mesh without decoding it, mirroring :py:meth:`read`.
+
+        :raises :py:`EOFError`:
+        :raises :py:`AssertionError`:
+        """
+        mtype = stream.read32() & Mesh.TypeMask
+
+        if mtype == Mesh.NullType:
+            return
+        elif mtype != Mesh.StandardType and mtype != Mesh.SkinType:
+            raise ValueError("don't know how to read {} mesh".format(mtype))
+
+        stream.guard()
+
+        # numFrames, numMatFrames, parent, bounds, center, radius
+        stream.skip32(3 + 6 + 3 + 1)
+
+        # Geometry data
+        n_vert = stream.read32()
+        stream.skip32(n_vert * 3)
+        stream.skip32(stream.read32() * 2)
+        stream.skip32(n_vert * 3)
+        stream.skip8(n_vert)
+
+        # Primitives and other stuff
+        n_primitive = stream.read32()
+        stream.skip16(n_primitive * 2)
+        stream.skip32(n_primitive)
+        stream.skip16(stream.read32())
+        stream.skip16(stream.read32())
+        stream.skip32(2)
+        stream.guard()
+
+        if mtype == Mesh.SkinType:
+            sz = stream.read32()
+            stream.skip32(sz * 6)
+            stream.skip8(sz)
+            stream.skip32(stream.read32() * 16)
+            stream.skip32(stream.read32() * 3)
+            stream.skip32(stream.read32())
+            stream.guard()
+
+    @classmethod
+    def read(cls, stream, enormals=True):
+        """ Decode one mesh.
+
+        :param enormals: Decode the encoded normals; when false they are skipped and left empty,
+            and the mesh cannot be written back.
+        """
         mtype = stream.read32() & Mesh.TypeMask
         mesh = cls(mtype)
 
         if mtype == Mesh.StandardType:
-            mesh.read_standard_mesh(stream)
+            mesh.read_standard_mesh(stream, enormals)
         elif mtype == Mesh.SkinType:
-            mesh.read_skin_mesh(stream)
+            mesh.read_skin_mesh(stream, enormals)
         # others here
         elif mtype == Mesh.NullType:
             pass
@@ -439,6 +797,120 @@ class Mesh:
         return mesh
 
 
+class ArrayMesh(Mesh):
+    """ A :py:class:`Mesh` that keeps its geometry in flat typed arrays instead of vector objects.
+
+    ``verts`` and ``normals`` hold three floats per vertex and ``tverts`` two per texture
+    coordinate, as ``f`` arrays (``d`` for :py:class:`PreciseArrayMesh`). ``enormals`` is a ``b``
+    array and ``indices`` and ``mindices`` are ``H`` arrays. Influences are kept as the parallel
+    ``influence_vertices``, ``influence_bones`` and ``influence_weights`` columns.
+
+    All of these support the buffer protocol, so they can be handed to ``foreach_set`` as they
+    are, or viewed as an ``(N, 3)`` matrix without copying through
+    ``numpy.frombuffer(mesh.verts, mesh.float_type).reshape(-1, 3)``.
+    """
+
+    float_type = "f"
+
+    def __init__(self, mtype):
+        super().__init__(mtype)
+        self.verts = array.array(self.float_type)
+        self.tverts = array.array(self.float_type)
+        self.normals = array.array(self.float_type)
+        self.enormals = array.array("b")
+        self.indices = array.array("H")
+        self.mindices = array.array("H")
+
+    @property
+    def influences(self):
+        """ ``[vertex, bone, weight]`` lists built from the influence columns. Assigning splits
+        them back into columns.
+        """
+        return [list(influence) for influence in zip(*self.influence_columns())]
+
+    @influences.setter
+    def influences(self, influences):
+        self.influence_vertices = array.array("i", [vertex_index for vertex_index, _, _ in influences])
+        self.influence_bones = array.array("i", [bone_index for _, bone_index, _ in influences])
+        self.influence_weights = array.array(self.float_type, [weight for _, _, weight in influences])
+
+    def vertex_count(self):
+        return len(self.verts) // 3
+
+    def tvertex_count(self):
+        return len(self.tverts) // 2
+
+    def influence_columns(self):
+        return self.influence_vertices, self.influence_bones, self.influence_weights
+
+    def set_geometry(self, verts, tverts, normals, enormals, indices, mindices):
+        self.verts = dts_stream.as_array(verts, self.float_type)
+        self.tverts = dts_stream.as_array(tverts, self.float_type)
+        self.normals = dts_stream.as_array(normals, self.float_type)
+        self.enormals = dts_stream.as_array(enormals, "b")
+        self.indices = dts_stream.as_array(indices, "H")
+        self.mindices = dts_stream.as_array(mindices, "H")
+
+    def set_influences(self, vertex_indices, bone_indices, weights):
+        self.influence_vertices = dts_stream.as_array(vertex_indices, "i")
+        self.influence_bones = dts_stream.as_array(bone_indices, "i")
+        self.influence_weights = dts_stream.as_array(weights, self.float_type)
+
+    def transformed_columns(self, mat):
+        """ The x, y and z columns of :py:attr:`verts` transformed by the affine matrix ``mat``. """
+        if numpy is not None:
+            points = numpy.frombuffer(self.verts, self.float_type).reshape(-1, 3)
+            mat = numpy.array([tuple(mat[row]) for row in range(3)], dtype=numpy.float64)
+            points = points @ mat[:, :3].T + mat[:, 3]
+            return points[:, 0], points[:, 1], points[:, 2]
+
+        (a, b, c, d), (e, f, g, h), (i, j, k, l) = (tuple(mat[row]) for row in range(3))
+        xs, ys, zs = self.verts[0::3], self.verts[1::3], self.verts[2::3]
+        return ([a * x + b * y + c * z + d for x, y, z in zip(xs, ys, zs)],
+                [e * x + f * y + g * z + h for x, y, z in zip(xs, ys, zs)],
+                [i * x + j * y + k * z + l for x, y, z in zip(xs, ys, zs)])
+
+    def transformed_verts(self, mat):
+        return map(dts_math.Vector, zip(*self.transformed_columns(mat)))
+
+    def calculate_bounds_mat(self, mat):
+        if not self.verts:
+            return super().calculate_bounds_mat(mat)
+
+        xs, ys, zs = self.transformed_columns(mat)
+        return Box(dts_math.Vector((float(min(xs)), float(min(ys)), float(min(zs)))),
+                   dts_math.Vector((float(max(xs)), float(max(ys)), float(max(zs)))))
+
+    def calculate_radius_mat(self, mat, center):
+        if not self.verts:
+            return 0.0
+
+        xs, ys, zs = self.transformed_columns(mat)
+
+        if numpy is not None:
+            return float(numpy.sqrt((xs - center[0]) ** 2 + (ys - center[1]) ** 2 + (zs - center[2]) ** 2).max())
+
+        return max(math.sqrt((x - center[0]) ** 2 + (y - center[1]) ** 2 + (z - center[2]) ** 2)
+                   for x, y, z in zip(xs, ys, zs))
+
+    def calculate_radius_tube_mat(self, mat, center):
+        if not self.verts:
+            return 0
+
+        xs, ys, _ = self.transformed_columns(mat)
+
+        if numpy is not None:
+            return float(numpy.sqrt((xs - center[0]) ** 2 + (ys - center[1]) ** 2).max())
+
+        return max(math.sqrt((x - center[0]) ** 2 + (y - center[1]) ** 2) for x, y in zip(xs, ys))
+
+
+class PreciseArrayMesh(ArrayMesh):
+    """ An :py:class:`ArrayMesh` with double precision floats, for precision-sensitive export. """
+
+    float_type = "d"
+
+
 class Material:
     SWrap = 0x00000001
     TWrap = 0x00000002
@@ -456,6 +928,8 @@ class Material:
     ReflectanceMap = 0x80000000
     AuxiliaryMask = 0xE0000000
 
+    __slots__ = ('name', 'flags', 'reflectanceMap', 'bumpMap', 'detailMap', 'detailScale', 'reflectance', 'bl_mat')
+
     def __init__(self,
                  name="",
                  flags=0,
@@ -473,25 +947,243 @@ class Material:
         self.reflectance = reflectance
 
 
+class BitSet(object):
+    """ A fixed-size set of bits packed into one integer, such as the "matters" sets of a
+    :py:class:`Sequence`. Indexing and iteration behave like a list of bools.
+
+    :param size: Number of bits.
+    :param bits: Initial bits, bit ``i`` being the flag at index ``i``.
+    """
+
+    __slots__ = ('size', 'bits')
+
+    def __init__(self, size: int=0, bits: int=0) -> None:
+        self.size = size
+        self.bits = bits
+
+    @classmethod
+    def from_bools(cls, values: typing.Iterable[bool]) -> typing.Self:
+        bits = 0
+        size = 0
+
+        for size, value in enumerate(values, 1):
+            if value:
+                bits |= 1 << (size - 1)
+
+        return cls(size, bits)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> bool:
+        return (self.bits >> range(self.size)[index]) & 1 == 1
+
+    def __setitem__(self, index: int, value: bool) -> None:
+        mask = 1 << range(self.size)[index]
+
+        if value:
+            self.bits |= mask
+        else:
+            self.bits &= ~mask
+
+    def __iter__(self) -> typing.Iterator[bool]:
+        bits = self.bits
+        return ((bits >> i) & 1 == 1 for i in range(self.size))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, BitSet):
+            return self.size == other.size and self.bits == other.bits
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return "BitSet({}, {:#x})".format(self.size, self.bits)
+
+    def count(self) -> int:
+        """ Number of set bits. """
+        return self.bits.bit_count()
+
+    def indices(self) -> typing.Iterator[int]:
+        """ Indices of the set bits, in increasing order. """
+        bits = self.bits
+
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def rank(self, index: int) -> int:
+        """ Number of set bits below ``index``; for a set bit this is its position among the set
+        bits, e.g. the keyframe track of an animated node.
+        """
+        return (self.bits & ((1 << index) - 1)).bit_count()
+
+    def select(self, items: typing.Sequence) -> list:
+        """ The ``items`` whose bit is set, in order. Bits past the end of ``items`` are ignored. """
+        return [items[i] for i in self.indices() if i < len(items)]
+
+
+class KeyframePool(collections.abc.MutableSequence):
+    """ Animation keyframes of one kind, packed into a single flat typed array of ``width`` values
+    per keyframe.
+
+    Rotations are kept as quantized ``x, y, z, w`` int16 values, exactly as they are stored in the
+    files; translations and scales as float32. Items read and assign as dts_math vectors (plain
+    floats for scalar pools), slicing decodes a whole run at once and :py:meth:`rows` gives a
+    zero-copy view.
+
+    :param typecode: ``h`` or ``f``.
+    :param width: Values per keyframe.
+    :param values: Initial flat values.
+    """
+
+    def __init__(self, typecode: str, width: int, values: typing.Any=()) -> None:
+        self.values = dts_stream.as_array(values, typecode)
+        self.width = width
+
+    @classmethod
+    def rotations(cls, values: typing.Any=()) -> typing.Self:
+        """ A pool of quaternions, from flat quantized ``x, y, z, w`` values. """
+        return cls("h", 4, values)
+
+    @classmethod
+    def vectors(cls, values: typing.Any=()) -> typing.Self:
+        """ A pool of 3D vectors, from flat float values. """
+        return cls("f", 3, values)
+
+    @classmethod
+    def scalars(cls, values: typing.Any=()) -> typing.Self:
+        return cls("f", 1, values)
+
+    def pack(self, items: typing.Iterable) -> array.array:
+        """ Flat values of ``items`` as stored in this pool. """
+        if self.values.typecode == "h":
+            return dts_stream.quantize_quats(items)
+        if self.width == 1:
+            return array.array("f", items)
+        return array.array("f", dts_stream.flatten(list(items), self.width))
+
+    def pack_item(self, item: typing.Any) -> array.array:
+        """ Flat values of one item, without the bulk path of :py:meth:`pack`. """
+        if self.values.typecode == "h":
+            return array.array("h", dts_stream.quantize_quat(item))
+        if self.width == 1:
+            return array.array("f", (item, ))
+        return array.array("f", item)
+
+    def unpack(self, values: typing.Any) -> list:
+        """ Items of the flat ``values``, as dts_math vectors or floats. """
+        if self.values.typecode == "h":
+            return dts_stream.quaternions(values)
+        if self.width == 1:
+            return values.tolist()
+        return dts_stream.vectors(values, self.width)
+
+    def floats(self, start: int, count: int) -> array.array:
+        """ Flat float values of keyframes ``start`` onwards, up to ``count`` of them. Rotations are
+        dequantized to ``w, x, y, z``, ready for the track functions of :py:mod:`dts_math`.
+        """
+        values = self.values[start * self.width:(start + count) * self.width]
+
+        if values.typecode == "h":
+            return dts_stream.dequantize_quats(values)
+        return values
+
+    def rows(self, start: int, count: int) -> memoryview:
+        """ A zero-copy ``(count, width)`` view of keyframes ``start`` onwards (flat when empty or
+        for scalar pools). The pool cannot grow or shrink while such a view is alive.
+        """
+        width = self.width
+        view = memoryview(self.values)[start * width:(start + count) * width]
+
+        if len(view) != count * width:
+            raise IndexError("keyframe rows out of range")
+        if count and width > 1:
+            return view.cast("B").cast(self.values.typecode, (count, width))
+        return view
+
+    def __len__(self) -> int:
+        return len(self.values) // self.width
+
+    def __getitem__(self, index):
+        width = self.width
+
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return self.unpack(self.values[start * width:max(start, stop) * width])
+
+        index = range(len(self))[index]
+        values = self.values[index * width:(index + 1) * width]
+
+        # One item is cheaper to decode directly than through the bulk path
+        if values.typecode == "h":
+            return dts_stream.dequantize_quat(*values)
+        if width == 1:
+            return values[0]
+        return dts_math.Vector(values)
+
+    def __setitem__(self, index, item):
+        index = range(len(self))[index]
+        self.values[index * self.width:(index + 1) * self.width] = self.pack_item(item)
+
+    def __delitem__(self, index):
+        index = range(len(self))[index]
+        del self.values[index * self.width:(index + 1) * self.width]
+
+    def insert(self, index, item):
+        index = range(len(self) + 1)[index]
+        self.values[index * self.width:index * self.width] = self.pack_item(item)
+
+    def append(self, item):
+        self.values.extend(self.pack_item(item))
+
+    def extend(self, items):
+        if isinstance(items, KeyframePool) and items.values.typecode == self.values.typecode:
+            self.values.extend(items.values)
+        else:
+            self.values.extend(self.pack(items))
+
+
+def keyframe_track(seq, node: int, matters: BitSet, base: int, pool: KeyframePool) -> None | memoryview:
+    """ The keyframes of ``node`` in one channel of ``seq``, or ``None`` if the channel is not animated
+    for that node. See :py:meth:`dts_shape.Shape.track`.
+    """
+    if node >= len(matters) or not matters[node]:
+        return None
+    return pool.rows(base + matters.rank(node) * seq.numKeyframes, seq.numKeyframes)
+
+
 def read_bit_set(fd):
-    dummy, numWords = struct.unpack("<ii", fd.read(8))
-    words = struct.unpack(str(numWords) + "i", fd.read(4 * numWords))
-    total = len(words) * 32
-    return [(words[i >> 5] & (1 << (i & 31))) != 0 for i in range(total)]
+    """ 
 
+    :raises :py:`EOFError`:
+    :raises :py:`ValueError`:
+    """
+    dummy, numWords = dts_codec.read(fd, dts_codec.BIT_SET_HEADER)
+
+    if numWords < 0:
+        raise ValueError("bit set of {} words".format(numWords))
+
+    data = fd.read(4 * numWords)
+
+    if len(data) != 4 * numWords:
+        raise EOFError()
+
+    return BitSet(numWords * 32, int.from_bytes(data, "little"))
 
-def write_bit_set(fd, bits):
-    numWords = int(math.ceil(len(bits) / 32.0))
-    words = [0] * numWords
 
-    for i, bit in enumerate(bits):
-        if bit:
-            words[i >> 5] |= 1 << (i & 31)
+def pack_bit_set(bits):
+    if not isinstance(bits, BitSet):
+        bits = BitSet.from_bools(bits)
+
+    numWords = int(math.ceil(len(bits) / 32.0))
+    return dts_codec.BIT_SET_HEADER.pack(numWords, numWords) + bits.bits.to_bytes(4 * numWords, "little")
 
-    fd.write(struct.pack("<ii", numWords, numWords))
 
-    for word in words:
-        fd.write(struct.pack("<i", word))
+def write_bit_set(fd, bits):
+    fd.write(pack_bit_set(bits))
 
 
 class Sequence:
@@ -504,6 +1196,15 @@ class Sequence:
     IflInit = bit(6)
     HasTranslucency = bit(7)
 
+    Matters = ('rotationMatters', 'translationMatters', 'scaleMatters', 'decalMatters', 'iflMatters',
+               'visMatters', 'frameMatters', 'matFrameMatters')
+
+    __slots__ = ('nameIndex', 'name', 'flags', 'numKeyframes', 'duration', 'priority', 'firstGroundFrame',
+                 'numGroundFrames', 'baseRotation', 'baseTranslation', 'baseScale', 'baseObjectState',
+                 'baseDecalState', 'firstTrigger', 'numTriggers', 'toolBegin', 'rotationMatters',
+                 'translationMatters', 'scaleMatters', 'decalMatters', 'iflMatters', 'visMatters',
+                 'frameMatters', 'matFrameMatters')
+
     def __init__(self):
         # todo: get rid of this
         self.nameIndex = -1
@@ -523,41 +1224,27 @@ class Sequence:
         self.numTriggers = 0
         self.toolBegin = 0
 
-        self.rotationMatters = []
-        self.translationMatters = []
-        self.scaleMatters = []
-        self.decalMatters = []
-        self.iflMatters = []
-        self.visMatters = []
-        self.frameMatters = []
-        self.matFrameMatters = []
+        self.rotationMatters = BitSet()
+        self.translationMatters = BitSet()
+        self.scaleMatters = BitSet()
+        self.decalMatters = BitSet()
+        self.iflMatters = BitSet()
+        self.visMatters = BitSet()
+        self.frameMatters = BitSet()
+        self.matFrameMatters = BitSet()
+
+    def pack(self, writeIndex=True):
+        """ The sequence as stored in a file: the header followed by the "matters" bit sets. """
+        if writeIndex:
+            header = dts_codec.SEQUENCE.pack(*[getattr(self, name) for name in dts_codec.SEQUENCE_FIELDS])
+        else:
+            header = dts_codec.SEQUENCE_NO_INDEX.pack(
+                *[getattr(self, name) for name in dts_codec.SEQUENCE_FIELDS[1:]])
+
+        return b"".join([header] + [pack_bit_set(getattr(self, name)) for name in Sequence.Matters])
 
     def write(self, fd, writeIndex=True):
-        if writeIndex:
-            fd.write(struct.pack("<i", self.nameIndex))
-        fd.write(struct.pack("<I", self.flags))
-        fd.write(struct.pack("<i", self.numKeyframes))
-        fd.write(struct.pack("<f", self.duration))
-        fd.write(struct.pack("<i", self.priority))
-        fd.write(struct.pack("<i", self.firstGroundFrame))
-        fd.write(struct.pack("<i", self.numGroundFrames))
-        fd.write(struct.pack("<i", self.baseRotation))
-        fd.write(struct.pack("<i", self.baseTranslation))
-        fd.write(struct.pack("<i", self.baseScale))
-        fd.write(struct.pack("<i", self.baseObjectState))
-        fd.write(struct.pack("<i", self.baseDecalState))
-        fd.write(struct.pack("<i", self.firstTrigger))
-        fd.write(struct.pack("<i", self.numTriggers))
-        fd.write(struct.pack("<f", self.toolBegin))
-
-        write_bit_set(fd, self.rotationMatters)
-        write_bit_set(fd, self.translationMatters)
-        write_bit_set(fd, self.scaleMatters)
-        write_bit_set(fd, self.decalMatters)
-        write_bit_set(fd, self.iflMatters)
-        write_bit_set(fd, self.visMatters)
-        write_bit_set(fd, self.frameMatters)
-        write_bit_set(fd, self.matFrameMatters)
+        fd.write(self.pack(writeIndex))
 
     @classmethod
     def read_bit_set(cls, fd):
@@ -565,34 +1252,31 @@ class Sequence:
         numWords = struct.unpack("i", fd.read(4))[0]
         return struct.unpack(str(numWords) + "i", fd.read(4 * numWords))
 
+    @classmethod
+    def skip(cls, fd, readIndex=True):
+        """ Seek ``fd`` past one sequence without decoding it, mirroring :py:meth:`read`.
+
+        :raises :py:`EOFError`:
+        """
+        fd.seek((dts_codec.SEQUENCE if readIndex else dts_codec.SEQUENCE_NO_INDEX).size, 1)
+
+        for name in Sequence.Matters:
+            dummy, numWords = dts_codec.read(fd, dts_codec.BIT_SET_HEADER)
+            fd.seek(4 * numWords, 1)
+
     @classmethod
     def read(cls, fd, readIndex=True):
         seq = cls()
 
         if readIndex:
-            seq.nameIndex = struct.unpack("i", fd.read(4))[0]
-        seq.flags = struct.unpack("I", fd.read(4))[0]
-        seq.numKeyframes = struct.unpack("i", fd.read(4))[0]
-        seq.duration = struct.unpack("f", fd.read(4))[0]
-        seq.priority = struct.unpack("i", fd.read(4))[0]
-        seq.firstGroundFrame = struct.unpack("i", fd.read(4))[0]
-        seq.numGroundFrames = struct.unpack("i", fd.read(4))[0]
-        seq.baseRotation = struct.unpack("i", fd.read(4))[0]
-        seq.baseTranslation = struct.unpack("i", fd.read(4))[0]
-        seq.baseScale = struct.unpack("i", fd.read(4))[0]
-        seq.baseObjectState = struct.unpack("i", fd.read(4))[0]
-        seq.baseDecalState = struct.unpack("i", fd.read(4))[0]
-        seq.firstTrigger = struct.unpack("i", fd.read(4))[0]
-        seq.numTriggers = struct.unpack("i", fd.read(4))[0]
-        seq.toolBegin = struct.unpack("f", fd.read(4))[0]
-
-        seq.rotationMatters = read_bit_set(fd)
-        seq.translationMatters = read_bit_set(fd)
-        seq.scaleMatters = read_bit_set(fd)
-        seq.decalMatters = read_bit_set(fd)
-        seq.iflMatters = read_bit_set(fd)
-        seq.visMatters = read_bit_set(fd)
-        seq.frameMatters = read_bit_set(fd)
-        seq.matFrameMatters = read_bit_set(fd)
+            header = zip(dts_codec.SEQUENCE_FIELDS, dts_codec.read(fd, dts_codec.SEQUENCE))
+        else:
+            header = zip(dts_codec.SEQUENCE_FIELDS[1:], dts_codec.read(fd, dts_codec.SEQUENCE_NO_INDEX))
+
+        for name, value in header:
+            setattr(seq, name, value)
+
+        for name in Sequence.Matters:
+            setattr(seq, name, read_bit_set(fd))
 
         return seq
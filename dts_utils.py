@@ -1,13 +1,14 @@
 """  """
 import dataclasses
-import mathutils
+
+from . import dts_math
 
 
 @dataclasses.dataclass
 class Box(object):
     """  """
-    min: mathutils.Vector
-    max: mathutils.Vector
+    min: dts_math.Vector
+    max: dts_math.Vector
 
     def __repr__(self):
         return "({}, {})".format(self.min, self.max)
@@ -0,0 +1,331 @@
+""" Structural checks of decoded shapes, for export and as a batch tool over many files.
+
+Run as ``python -m <package>.dts_validate [--workers N] [--json] PATH...`` to check every DTS file
+under the given files and directories.
+"""
+
+import argparse
+import array
+import concurrent.futures
+import dataclasses
+import json
+import os
+import sys
+import typing
+
+from . import dts_shape
+from . import dts_types
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@dataclasses.dataclass(slots=True)
+class Finding(object):
+    """ One problem found in a shape. """
+    severity: str
+    """ ``"error"`` for data the engine cannot load safely, ``"warning"`` for suspicious data. """
+    section: str
+    """ Attribute of :py:class:`dts_shape.Shape` the problem is in, such as ``"meshes"``. """
+    index: int
+    """ Index of the offending item in that section, or -1 for the section as a whole. """
+    message: str
+
+    def __str__(self) -> str:
+        return "{}: {}[{}]: {}".format(self.severity, self.section, self.index, self.message)
+
+
+def out_of_range(values: typing.Any, size: int, allow_none: bool=False) -> list[int]:
+    """ Positions of the ``values`` outside ``0 <= value < size`` (``-1`` is allowed with ``allow_none``). """
+    if not len(values):
+        return []
+
+    low = -1 if allow_none else 0
+
+    # Most tables are fine, so test the bounds of the whole column before looking for culprits
+    if low <= min(values) and max(values) < size:
+        return []
+
+    return [i for i, value in enumerate(values) if not low <= value < size]
+
+
+def check_names(shape: dts_shape.Shape, findings: list[Finding]) -> None:
+    n_name = len(shape.names)
+
+    for section in ("nodes", "objects", "iflmaterials", "detail_levels"):
+        table = getattr(shape, section)
+
+        for i in out_of_range(table.column("name"), n_name):
+            findings.append(Finding("error", section, i, "name index out of range"))
+
+    for i in out_of_range([seq.nameIndex for seq in shape.sequences], n_name):
+        findings.append(Finding("error", "sequences", i, "name index out of range"))
+
+
+def cycles(parents: typing.Sequence[int]) -> list[int]:
+    """ The smallest node of every cycle of ``parents`` links, in ascending order. ``-1`` is a root. """
+    n = len(parents)
+
+    if numpy is not None:
+        # Pointer doubling: after ``steps >= n`` jumps every node has reached the root sentinel ``n``
+        # or a node on a cycle, and ``low`` is the smallest node seen along the way
+        up = numpy.append(numpy.asarray(parents, dtype=numpy.intp), n)
+        up[up < 0] = n
+        low = numpy.arange(n + 1)
+        steps = 1
+
+        while steps < n:
+            low = numpy.minimum(low, low[up])
+            up = up[up]
+            steps *= 2
+
+        on_cycle = up[:n][up[:n] != n]
+        return numpy.unique(low[on_cycle]).tolist()
+
+    # 0: not visited, 1: on the current path, 2: done
+    state = array.array("b", bytes(n))
+    found = []
+
+    for start in range(n):
+        path = []
+        node = start
+
+        while node != -1 and state[node] == 0:
+            state[node] = 1
+            path.append(node)
+            node = parents[node]
+
+        if node != -1 and state[node] == 1:
+            smallest = member = node
+
+            while parents[member] != node:
+                member = parents[member]
+                smallest = min(smallest, member)
+
+            found.append(smallest)
+
+        for node in path:
+            state[node] = 2
+
+    return sorted(found)
+
+
+def check_nodes(shape: dts_shape.Shape, findings: list[Finding]) -> None:
+    parents = shape.nodes.column("parent")
+    bad = out_of_range(parents, len(parents), allow_none=True)
+
+    for i in bad:
+        findings.append(Finding("error", "nodes", i, "parent {} out of range".format(parents[i])))
+
+    if bad:
+        return
+
+    for node in cycles(parents):
+        findings.append(Finding("error", "nodes", node, "parent chain forms a cycle"))
+
+
+def check_ranges(shape: dts_shape.Shape, findings: list[Finding]) -> None:
+    n_node = len(shape.nodes)
+    n_object = len(shape.objects)
+    n_decal = len(shape.decals)
+
+    for i, subshape in enumerate(shape.subshapes):
+        for first, count, size, what in ((subshape.firstNode, subshape.numNodes, n_node, "node"),
+                                         (subshape.firstObject, subshape.numObjects, n_object, "object"),
+                                         (subshape.firstDecal, subshape.numDecals, n_decal, "decal")):
+            if count < 0 or first < 0 or first + count > size:
+                findings.append(Finding("error", "subshapes", i, "{} range {}+{} out of {}".format(
+                    what, first, count, size)))
+
+    firsts = shape.objects.column("firstMesh")
+    counts = shape.objects.column("numMeshes")
+
+    for i, (first, count) in enumerate(zip(firsts, counts)):
+        if count < 0 or (count and (first < 0 or first + count > len(shape.meshes))):
+            findings.append(Finding("error", "objects", i, "mesh range {}+{} out of {}".format(
+                first, count, len(shape.meshes))))
+
+    for i in out_of_range(shape.objects.column("node"), n_node, allow_none=True):
+        findings.append(Finding("error", "objects", i, "node index out of range"))
+
+    for i in out_of_range(shape.detail_levels.column("subshape"), len(shape.subshapes), allow_none=True):
+        findings.append(Finding("error", "detail_levels", i, "subshape index out of range"))
+
+
+def check_primitives(primitives: list[dts_types.Primitive], n_index: int, n_vert: int) -> tuple[list[int], list[int]]:
+    """ Positions of the ``primitives`` whose elements lie outside the indices (for indexed primitives)
+    or vertices (for the others), and of the triangle lists that are not a whole number of triangles.
+    """
+    if not primitives:
+        return [], []
+
+    firsts = array.array("i", [prim.firstElement for prim in primitives])
+    counts = array.array("i", [prim.numElements for prim in primitives])
+    # Types are read as signed words but built from unsigned flags
+    types = array.array("I", [prim.type & 0xFFFFFFFF for prim in primitives])
+
+    if numpy is not None:
+        firsts, counts, types = (numpy.frombuffer(column, column.typecode) for column in (firsts, counts, types))
+        limits = numpy.where(types & dts_types.Primitive.Indexed, n_index, n_vert)
+        bad = (firsts < 0) | (counts < 0) | (firsts.astype(numpy.int64) + counts > limits)
+        ragged = (types & dts_types.Primitive.TypeMask == dts_types.Primitive.Triangles) & (counts % 3 != 0)
+        return numpy.flatnonzero(bad).tolist(), numpy.flatnonzero(ragged).tolist()
+
+    bad = [j for j, (first, count, kind) in enumerate(zip(firsts, counts, types))
+           if first < 0 or count < 0 or first + count > (n_index if kind & dts_types.Primitive.Indexed else n_vert)]
+    ragged = [j for j, (count, kind) in enumerate(zip(counts, types))
+              if kind & dts_types.Primitive.TypeMask == dts_types.Primitive.Triangles and count % 3]
+    return bad, ragged
+
+
+def check_meshes(shape: dts_shape.Shape, findings: list[Finding]) -> None:
+    n_node = len(shape.nodes)
+
+    for i, mesh in enumerate(shape.meshes):
+        if mesh.get_type() == dts_types.Mesh.NullType:
+            continue
+
+        n_vert = mesh.vertex_count()
+        n_index = len(mesh.indices)
+
+        if n_index and max(mesh.indices) >= n_vert:
+            findings.append(Finding("error", "meshes", i, "vertex index {} out of {} vertices".format(
+                max(mesh.indices), n_vert)))
+
+        bad, ragged = check_primitives(mesh.primitives, n_index, n_vert)
+
+        for j in bad:
+            primitive = mesh.primitives[j]
+            size, what = (n_index, "indices") if primitive.type & dts_types.Primitive.Indexed else (n_vert, "vertices")
+            findings.append(Finding("error", "meshes", i, "primitive {} range {}+{} out of {} {}".format(
+                j, primitive.firstElement, primitive.numElements, size, what)))
+
+        for j in ragged:
+            findings.append(Finding("warning", "meshes", i, "primitive {} has {} elements, {}".format(
+                j, mesh.primitives[j].numElements, "not a whole number of triangles")))
+
+        if mesh.get_type() != dts_types.Mesh.SkinType:
+            continue
+
+        vertex_indices, bone_indices, weights = mesh.influence_columns()
+
+        if out_of_range(vertex_indices, n_vert):
+            findings.append(Finding("error", "meshes", i, "influence vertex index out of range"))
+        if out_of_range(bone_indices, len(mesh.bones)):
+            findings.append(Finding("error", "meshes", i, "influence bone index out of range"))
+        if out_of_range([node_index for node_index, _ in mesh.bones], n_node):
+            findings.append(Finding("error", "meshes", i, "bone node index out of range"))
+
+
+def check_sequences(shape: dts_shape.Shape, findings: list[Finding]) -> None:
+    for i, seq in enumerate(shape.sequences):
+        if seq.flags & dts_types.Sequence.UniformScale:
+            scales = shape.node_uniform_scales
+        elif seq.flags & dts_types.Sequence.AlignedScale:
+            scales = shape.node_aligned_scales
+        elif seq.flags & dts_types.Sequence.ArbitraryScale:
+            scales = shape.node_arbitrary_scale_factors
+        else:
+            scales = None
+
+        if scales is None and seq.scaleMatters.count():
+            findings.append(Finding("error", "sequences", i, "animates scale without a scale type flag"))
+
+        animated_objects = (seq.visMatters.bits | seq.frameMatters.bits | seq.matFrameMatters.bits).bit_count()
+
+        for base, count, size, what in (
+                (seq.baseRotation, seq.rotationMatters.count(), len(shape.node_rotations), "rotation"),
+                (seq.baseTranslation, seq.translationMatters.count(), len(shape.node_translations), "translation"),
+                (seq.baseScale, seq.scaleMatters.count() if scales is not None else 0, len(scales or ()), "scale"),
+                (seq.baseObjectState, animated_objects, len(shape.objectstates), "object state")):
+            if count and (base < 0 or base + count * seq.numKeyframes > size):
+                findings.append(Finding("error", "sequences", i, "{} keyframes {}+{}*{} out of {}".format(
+                    what, base, count, seq.numKeyframes, size)))
+
+        if seq.numTriggers and (seq.firstTrigger < 0 or seq.firstTrigger + seq.numTriggers > len(shape.triggers)):
+            findings.append(Finding("error", "sequences", i, "trigger range {}+{} out of {}".format(
+                seq.firstTrigger, seq.numTriggers, len(shape.triggers))))
+
+        if seq.numGroundFrames and (seq.firstGroundFrame < 0 or
+                                    seq.firstGroundFrame + seq.numGroundFrames > len(shape.ground_translations)):
+            findings.append(Finding("error", "sequences", i, "ground frame range {}+{} out of {}".format(
+                seq.firstGroundFrame, seq.numGroundFrames, len(shape.ground_translations))))
+
+
+def validate(shape: dts_shape.Shape) -> list[Finding]:
+    """ Check the indices and ranges that tie the tables of ``shape`` together. """
+    findings = []
+
+    check_names(shape, findings)
+    check_nodes(shape, findings)
+    check_ranges(shape, findings)
+    check_meshes(shape, findings)
+    check_sequences(shape, findings)
+
+    return findings
+
+
+def validate_file(path: str) -> list[Finding]:
+    """ Decode and check the DTS file at ``path``. A file that cannot be decoded is one finding. """
+    shape = dts_shape.Shape()
+
+    try:
+        with open(path, "rb") as fd:
+            shape.load(fd, mapped=True, mesh_class=dts_types.ArrayMesh)
+    except (OSError, EOFError, AssertionError, ValueError, IndexError) as e:
+        return [Finding("error", "file", -1, "cannot be decoded: {!r}".format(e))]
+
+    return validate(shape)
+
+
+def collect(future: concurrent.futures.Future) -> list[Finding]:
+    """ The findings a worker produced for one file, or one finding if the worker itself failed. """
+    try:
+        return future.result()
+    except Exception as e:
+        return [Finding("error", "file", -1, "cannot be checked: {!r}".format(e))]
+
+
+def find_shapes(paths: typing.Iterable[str]) -> typing.Iterator[str]:
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for directory, _, names in os.walk(path):
+            for name in sorted(names):
+                if name.lower().endswith(".dts"):
+                    yield os.path.join(directory, name)
+
+
+def main(argv: None | list[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Check DTS files for broken indices and ranges.")
+    parser.add_argument("paths", nargs="+", help="DTS files or directories to search for them")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes to check files with")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per finding")
+    args = parser.parse_args(argv)
+
+    paths = list(find_shapes(args.paths))
+    failed = 0
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(validate_file, path) for path in paths]
+
+        for path, findings in zip(paths, map(collect, futures)):
+            if any(finding.severity == "error" for finding in findings):
+                failed += 1
+
+            for finding in findings:
+                if args.json:
+                    print(json.dumps(dict(dataclasses.asdict(finding), path=path)))
+                else:
+                    print("{}: {}".format(path, finding))
+
+    print("{} of {} files failed".format(failed, len(paths)), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -129,14 +129,14 @@ def save(operator, context, filepath, select_marker=False, debug_report=False):
         seq.baseDecalState = 0
         seq.firstTrigger = len(dsq.triggers)
 
-        seq.rotationMatters = [False] * len(dsq.nodes)
-        seq.translationMatters = [False] * len(dsq.nodes)
-        seq.scaleMatters = [False] * len(dsq.nodes)
-        seq.decalMatters = [False] * len(dsq.nodes)
-        seq.iflMatters = [False] * len(dsq.nodes)
-        seq.visMatters = [False] * len(dsq.nodes)
-        seq.frameMatters = [False] * len(dsq.nodes)
-        seq.matFrameMatters = [False] * len(dsq.nodes)
+        seq.rotationMatters = dts_types.BitSet(len(dsq.nodes))
+        seq.translationMatters = dts_types.BitSet(len(dsq.nodes))
+        seq.scaleMatters = dts_types.BitSet(len(dsq.nodes))
+        seq.decalMatters = dts_types.BitSet(len(dsq.nodes))
+        seq.iflMatters = dts_types.BitSet(len(dsq.nodes))
+        seq.visMatters = dts_types.BitSet(len(dsq.nodes))
+        seq.frameMatters = dts_types.BitSet(len(dsq.nodes))
+        seq.matFrameMatters = dts_types.BitSet(len(dsq.nodes))
 
         dsq.sequences.append(seq)
 
@@ -177,24 +177,30 @@ def save(operator, context, filepath, select_marker=False, debug_report=False):
 
             # Write the data where it matters
             # This assumes that animated_nodes is in the same order as shape.nodes
+            # Keys are collected per track and quantized in one go
+            translations, rotations, scales = [], [], []
+
             for frame in frame_indices:
                 translation, rotation, scale = animation_data[frame][ob]
 
                 if seq.translationMatters[index]:
                     if seq.flags & dts_types.Sequence.Blend:
                         translation -= base_translation
-                    dsq.translations.append(translation)
+                    translations.append(translation)
 
                 if seq.rotationMatters[index]:
                     if seq.flags & dts_types.Sequence.Blend:
                         rotation = base_rotation.inverted() * rotation
-                    dsq.rotations.append(rotation)
+                    rotations.append(rotation)
 
                 if seq.scaleMatters[index]:
-                    dsq.aligned_scales.append(scale)
+                    scales.append(scale)
+
+            dsq.translations.extend(translations)
+            dsq.rotations.extend(rotations)
+            dsq.aligned_scales.extend(scales)
 
-    with open(filepath, "wb") as fd:
-        dsq.write(fd)
+    dsq.save(filepath)
 
     if debug_report:
         with open(filepath + ".txt", "w") as fd:
@@ -13,6 +13,7 @@ import bmesh
 from . import dts_shape
 from . import dts_types
 from . import dts_utils
+from . import dts_validate
 from . import write_report
 from . import util
 from . import shared_export
@@ -144,7 +145,7 @@ def seq_float_eq(a, b):
     return all(abs(i - j) < 0.000001 for i, j in zip(a, b))
 
 
-def export_empty_node(lookup, shape: dts_shape.Shape, select_object, ob, parent=-1):
+def export_empty_node(lookup, shape: dts_shape.Shape, select_object, ob, parent=None):
     if select_object and not ob.select:
         lookup[ob] = False
         return
@@ -154,11 +155,12 @@ def export_empty_node(lookup, shape: dts_shape.Shape, select_object, ob, parent=
     else:
         name = undup_name(ob.name)
 
-    node = dts_types.Node(shape.name(name), parent)
+    node = dts_types.Node(shape.name(name))
 
+    node.parent_node = parent
     node.armature = None
     node.bl_ob = ob
-    node.mat = ob.matrix_local
+    node.matrix = ob.matrix_local
 
     shape.nodes.append(node)
     lookup[ob] = node
@@ -168,9 +170,10 @@ def export_empty_node(lookup, shape: dts_shape.Shape, select_object, ob, parent=
             export_empty_node(lookup, shape, select_object, child, node)
 
 
-def export_bones(lookup, shape, armature, bones, parent=-1):
+def export_bones(lookup, shape, armature, bones, parent=None):
     for bone in bones:
-        node = dts_types.Node(shape.name(bone.name), parent)
+        node = dts_types.Node(shape.name(bone.name))
+        node.parent_node = parent
         node.bone = bone
         node.bl_ob = bone
 
@@ -215,16 +218,13 @@ def save_nodes(scene, shape, select_object, dsq_compat):
         shape.nodes.sort(key=lambda n: order_key.get(
             shape.names[n.name], n.bl_ob.get("nodeIndex", sys.maxsize)))
 
-    for index, node in enumerate(shape.nodes):
-        if not isinstance(node.parent, int):
-            if not hasattr(node.parent, "index") and dsq_compat:
-                node_lookup = {
-                    "fail":
-                    "DSQ compatibility export failed due to new node structure."
-                }
-                break
-            node.parent = node.parent.index
+    if not dts_types.link_parents(shape.nodes):
+        if dsq_compat:
+            return {"fail": "DSQ compatibility export failed due to new node structure."}
+
+        return {"fail": "Node parents could not be exported before their children."}
 
+    for node in shape.nodes:
         location, rotation, scale = node.matrix.decompose()
 
         if not seq_float_eq((1, 1, 1), scale):
@@ -232,7 +232,6 @@ def save_nodes(scene, shape, select_object, dsq_compat):
                 "Warning: '{}' uses scale, which cannot be exported to DTS nodes"
                 .format(shape.names[node.name]))
 
-        node.index = index
         node.matrix_world = dts_types.Matrix.Translation(
             location) * rotation.to_matrix().to_4x4()
 
@@ -345,6 +344,7 @@ def save_meshes(scene, shape, node_lookup, select_object):
                 auto_root_index = len(shape.nodes)
 
                 node = dts_types.Node(shape.name("__auto_root__"))
+                node.parent_node = None
                 node.bl_ob = None
                 node.armature = None
                 node.index = auto_root_index
@@ -727,14 +727,14 @@ def save(operator,
         seq.baseDecalState = len(shape.decalstates)
         seq.firstTrigger = len(shape.triggers)
 
-        seq.rotationMatters = [False] * len(shape.nodes)
-        seq.translationMatters = [False] * len(shape.nodes)
-        seq.scaleMatters = [False] * len(shape.nodes)
-        seq.decalMatters = [False] * len(shape.nodes)
-        seq.iflMatters = [False] * len(shape.nodes)
-        seq.visMatters = [False] * len(shape.nodes)
-        seq.frameMatters = [False] * len(shape.nodes)
-        seq.matFrameMatters = [False] * len(shape.nodes)
+        seq.rotationMatters = dts_types.BitSet(len(shape.nodes))
+        seq.translationMatters = dts_types.BitSet(len(shape.nodes))
+        seq.scaleMatters = dts_types.BitSet(len(shape.nodes))
+        seq.decalMatters = dts_types.BitSet(len(shape.nodes))
+        seq.iflMatters = dts_types.BitSet(len(shape.nodes))
+        seq.visMatters = dts_types.BitSet(len(shape.nodes))
+        seq.frameMatters = dts_types.BitSet(len(shape.nodes))
+        seq.matFrameMatters = dts_types.BitSet(len(shape.nodes))
 
         shape.sequences.append(seq)
 
@@ -789,21 +789,28 @@ def save(operator,
                 seq.scaleMatters[index] = True
 
             # Write the data where it matters
+            # Keys are collected per track and quantized in one go
+            translations, rotations, scales = [], [], []
+
             for frame in frame_indices:
                 translation, rotation, scale = animation_data[frame][node]
 
                 if seq.translationMatters[index]:
                     if seq.flags & dts_types.Sequence.Blend:
                         translation -= base_translation
-                    shape.node_translations.append(translation)
+                    translations.append(translation)
 
                 if seq.rotationMatters[index]:
                     if seq.flags & dts_types.Sequence.Blend:
                         rotation = base_rotation.inverted() * rotation
-                    shape.node_rotations.append(rotation)
+                    rotations.append(rotation)
 
                 if seq.scaleMatters[index]:
-                    shape.node_aligned_scales.append(scale)
+                    scales.append(scale)
+
+            shape.node_translations.extend(translations)
+            shape.node_rotations.extend(rotations)
+            shape.node_aligned_scales.extend(scales)
 
     if debug_report:
         print("Writing debug report")
@@ -811,8 +818,18 @@ def save(operator,
 
     shape.verify()
 
-    with open(filepath, "wb") as fd:
-        shape.save(fd)
+    findings = dts_validate.validate(shape)
+
+    for finding in findings:
+        print(finding)
+
+    errors = [finding for finding in findings if finding.severity == "error"]
+
+    if errors:
+        return util.fail(operator, "The exported shape is broken ({} problems, see the console): {}".format(
+            len(errors), errors[0]))
+
+    shape.save_file(filepath)
 
     write_material_textures(generate_texture, filepath, shape, raw_colors)
 
@@ -1,11 +1,12 @@
 """  """
 
 import math
-import mathutils
 
 import bpy
 
 from . import dsq_file
+from . import dts_cache
+from . import dts_math
 from . import dts_types
 from . import util
 
@@ -25,11 +26,14 @@ def get_free_name(name, taken):
         suffix += 1
 
 
-def load(operator, context, filepath, debug_report=False):
-    dsq = dsq_file.DsqFile()
+def load(operator, context, filepath, use_cache=False, debug_report=False):
+    if use_cache:
+        dsq = dts_cache.ShapeCache().load_dsq(filepath)
+    else:
+        dsq = dsq_file.DsqFile()
 
-    with open(filepath, "rb") as fd:
-        dsq.read(fd)
+        with open(filepath, "rb") as fd:
+            dsq.read(fd)
 
     if debug_report:
         with open(filepath + ".txt", "w") as fd:
@@ -101,6 +105,11 @@ def load(operator, context, filepath, debug_report=False):
     sequences_text = []
     reference_frame = util.find_reference(context.scene)
 
+    # Every sequence looks up the curves of the same nodes, so index them once
+    curve_cache = util.FCurveCache()
+    # Keyframes of all sequences are written to their curves at once, after the last one
+    keyframes = util.KeyframeBatch()
+
     # Create Blender keyframes and markers for each sequence
     for seq in dsq.sequences:
         name = get_free_name(seq.name, scene_sequences)
@@ -120,92 +129,70 @@ def load(operator, context, filepath, debug_report=False):
         if flags:
             sequences_text.append(name + ": " + ", ".join(flags))
 
-        nodesRotation = tuple(
-            map(lambda p: p[0],
-                filter(lambda p: p[1], zip(nodes, seq.rotationMatters))))
-        nodesTranslation = tuple(
-            map(lambda p: p[0],
-                filter(lambda p: p[1], zip(nodes, seq.translationMatters))))
-        nodesScale = tuple(
-            map(lambda p: p[0],
-                filter(lambda p: p[1], zip(nodes, seq.scaleMatters))))
+        nodesRotation = seq.rotationMatters.select(nodes)
+        nodesTranslation = seq.translationMatters.select(nodes)
+        nodesScale = seq.scaleMatters.select(nodes)
 
         step = 1
 
         for mattersIndex, ob in enumerate(nodesTranslation):
-            curves = util.ob_location_curves(ob)
-
-            for frameIndex in range(seq.numKeyframes):
-                vec = dsq.translations[seq.baseTranslation +
-                                       mattersIndex * seq.numKeyframes +
-                                       frameIndex]
-                if seq.flags & dts_types.Sequence.Blend:
-                    if reference_frame is None:
-                        return util.fail(
-                            operator,
-                            "Missing 'reference' marker for blend animation '{}'"
-                            .format(name))
-                    ref_vec = mathutils.Vector(util.evaluate_all(curves, reference_frame))
-                    vec = ref_vec + vec
-
-                for curve in curves:
-                    curve.keyframe_points.add(1)
-                    key = curve.keyframe_points[-1]
-                    key.interpolation = "LINEAR"
-                    key.co = (last_frame + frameIndex * step,
-                              vec[curve.array_index])
+            curves = util.ob_location_curves(ob, curve_cache)
+            start = seq.baseTranslation + mattersIndex * seq.numKeyframes
+            track = dsq.translations.floats(start, seq.numKeyframes)
+
+            if track and seq.flags & dts_types.Sequence.Blend:
+                if reference_frame is None:
+                    # Earlier sequences keep the keyframes collected for them
+                    keyframes.flush()
+                    return util.fail(
+                        operator,
+                        "Missing 'reference' marker for blend animation '{}'"
+                        .format(name))
+                track = dts_math.translate_vectors(curve_cache.evaluate_all(curves, reference_frame), track)
+
+            frames = [last_frame + frameIndex * step for frameIndex in range(len(track) // len(curves))]
+            keyframes.add(curves, frames, track)
 
         for mattersIndex, ob in enumerate(nodesRotation):
-            mode, curves = util.ob_rotation_curves(ob)
-
-            for frameIndex in range(seq.numKeyframes):
-                rot = dsq.rotations[seq.baseRotation +
-                                    mattersIndex * seq.numKeyframes +
-                                    frameIndex]
-                if seq.flags & dts_types.Sequence.Blend:
-                    if reference_frame is None:
-                        return util.fail(
-                            operator,
-                            "Missing 'reference' marker for blend animation '{}'"
-                            .format(name))
-                    ref_rot = mathutils.Quaternion(util.evaluate_all(curves, reference_frame))
-                    rot = ref_rot * rot
-                if mode == 'AXIS_ANGLE':
-                    rot = rot.to_axis_angle()
-                elif mode != 'QUATERNION':
-                    rot = rot.to_euler(mode)
-
-                for curve in curves:
-                    curve.keyframe_points.add(1)
-                    key = curve.keyframe_points[-1]
-                    key.interpolation = "LINEAR"
-                    key.co = (last_frame + frameIndex * step,
-                              rot[curve.array_index])
+            mode, curves = util.ob_rotation_curves(ob, curve_cache)
+            start = seq.baseRotation + mattersIndex * seq.numKeyframes
+            track = dsq.rotations.floats(start, seq.numKeyframes)
+
+            if track and seq.flags & dts_types.Sequence.Blend:
+                if reference_frame is None:
+                    keyframes.flush()
+                    return util.fail(
+                        operator,
+                        "Missing 'reference' marker for blend animation '{}'"
+                        .format(name))
+                ref_rot = util.rotation_to_quaternion(mode, curve_cache.evaluate_all(curves, reference_frame))
+                track = dts_math.multiply_quaternions(ref_rot, track)
+
+            if mode == 'AXIS_ANGLE':
+                track = dts_math.quaternions_to_axis_angle(track)
+            elif mode != 'QUATERNION':
+                track = dts_math.quaternions_to_euler(track, mode)
+
+            frames = [last_frame + frameIndex * step for frameIndex in range(len(track) // len(curves))]
+            keyframes.add(curves, frames, track)
 
         for mattersIndex, ob in enumerate(nodesScale):
-            curves = util.ob_scale_curves(ob)
-
-            for frameIndex in range(seq.numKeyframes):
-                index = seq.baseScale + mattersIndex * seq.numKeyframes + frameIndex
-
-                if seq.flags & dts_types.Sequence.UniformScale:
-                    s = dsq.uniform_scales[index]
-                    scale = s, s, s
-                elif seq.flags & dts_types.Sequence.AlignedScale:
-                    scale = dsq.aligned_scales[index]
-                elif seq.flags & dts_types.Sequence.ArbitraryScale:
-                    print("Warning: Arbitrary scale animation not implemented")
-                    break
-                else:
-                    print("Warning: Invalid scale flags found in sequence")
-                    break
-
-                for curve in curves:
-                    curve.keyframe_points.add(1)
-                    key = curve.keyframe_points[-1]
-                    key.interpolation = "LINEAR"
-                    key.co = (last_frame + frameIndex * step,
-                              scale[curve.array_index])
+            curves = util.ob_scale_curves(ob, curve_cache)
+            start = seq.baseScale + mattersIndex * seq.numKeyframes
+
+            if seq.flags & dts_types.Sequence.UniformScale:
+                track = [(s, s, s) for s in dsq.uniform_scales[start:start + seq.numKeyframes]]
+            elif seq.flags & dts_types.Sequence.AlignedScale:
+                track = dsq.aligned_scales[start:start + seq.numKeyframes]
+            elif seq.flags & dts_types.Sequence.ArbitraryScale:
+                print("Warning: Arbitrary scale animation not implemented")
+                continue
+            else:
+                print("Warning: Invalid scale flags found in sequence")
+                continue
+
+            frames = [last_frame + frameIndex * step for frameIndex in range(len(track))]
+            keyframes.add(curves, frames, track)
 
         context.scene.timeline_markers.new(name + ":start", last_frame)
         context.scene.timeline_markers.new(name + ":end",
@@ -213,6 +200,8 @@ def load(operator, context, filepath, debug_report=False):
 
         last_frame += seq.numKeyframes + 10
 
+    keyframes.flush()
+
     if "Sequences" in bpy.data.texts:
         sequences_buf = bpy.data.texts["Sequences"]
     else:
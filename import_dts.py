@@ -1,17 +1,25 @@
 """  """
 
+import array
 import itertools
 import mathutils
 import os
 
 import bpy
-from bpy_extras import io_utils
 
+from . import dts_cache
+from . import dts_math
 from . import dts_shape
+from . import dts_stream
 from . import dts_types
 from . import util
 from . import write_report
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 def grouper(iterable, n, fillvalue=None):
     """  
@@ -115,101 +123,69 @@ def import_material(color_source, dmat: dts_types.Material, filepath: str) -> bp
     return bmat
 
 
-class index_pass:
-
-    def __getitem__(self, item):
-        return item
-
+def create_bmesh(dmesh: dts_types.Mesh,
+                 materials: dts_types.Material,
+                 shape: dts_shape.Shape,
+                 validate: bool=False) -> bpy.types.Mesh:
+    """ Build a Blender mesh from the triangulated primitives of ``dmesh``, filling every
+    attribute with one ``foreach_set`` call.
 
-def create_bmesh(dmesh: dts_types.Mesh, materials: dts_types.Material, shape: dts_shape.Shape) -> bpy.types.Mesh:
-    """ TODO
-    
     :param dmesh:
     :param materials:
     :param shape:
+    :param validate: Run :py:meth:`bpy.types.Mesh.validate` on the result, which is slow.
 
     :meta public:
     """
     me = bpy.data.meshes.new("Mesh")
 
-    # TODO: This code doesn't generate a proper mesh.
+    # Loop vertex indices, three per face
+    loops, face_materials = dmesh.triangles()
+    n_face = len(loops) // 3
 
-    faces = []
-    material_indices = {}
+    me.vertices.add(dmesh.vertex_count())
+    me.vertices.foreach_set("co", dts_stream.flatten(dmesh.verts))
+    me.vertices.foreach_set("normal", dts_stream.flatten(dmesh.normals))
 
-    indices_pass = index_pass()
+    me.loops.add(len(loops))
+    me.loops.foreach_set("vertex_index", loops)
 
-    for prim in dmesh.primitives:
-        if prim.type & dts_types.Primitive.Indexed:
-            indices = dmesh.indices
-        else:
-            indices = indices_pass
+    me.polygons.add(n_face)
+    me.polygons.foreach_set("loop_start", array.array("i", range(0, len(loops), 3)))
+    # DTS geometry is always smooth shaded
+    me.polygons.foreach_set("use_smooth", [True] * n_face)
 
-        dmat: None | dts_types.Material = None
+    # One slot per DTS material used by the mesh that has a Blender material, by material index
+    slots = {}
 
-        if False and not (prim.type & dts_types.Primitive.NoMaterial):
-            dmat = shape.materials[prim.type & dts_types.Primitive.MaterialMask]
+    for index in sorted(set(face_materials) - {-1}):
+        bmat = materials.get(shape.materials[index]) if index < len(shape.materials) else None
 
-            if dmat not in material_indices:
-                material_indices[dmat] = len(me.materials)
-                me.materials.append(materials[dmat])
+        if bmat is not None:
+            slots[index] = len(me.materials)
+            me.materials.append(bmat)
 
-        if prim.type & dts_types.Primitive.Strip:
-            even = True
-            for i in range(prim.firstElement + 2,
-                           prim.firstElement + prim.numElements):
-                if even:
-                    faces.append(
-                        ((indices[i], indices[i - 1], indices[i - 2]), dmat))
-                else:
-                    faces.append(
-                        ((indices[i - 2], indices[i - 1], indices[i]), dmat))
-                even = not even
-        elif prim.type & dts_types.Primitive.Fan:
-            even = True
-            for i in range(prim.firstElement + 2,
-                           prim.firstElement + prim.numElements):
-                if even:
-                    faces.append(
-                        ((indices[i], indices[i - 1], indices[0]), dmat))
-                else:
-                    faces.append(
-                        ((indices[0], indices[i - 1], indices[i]), dmat))
-                even = not even
-        else:  # Default to Triangle Lists (prim.type & Primitive.Triangles)
-            for i in range(prim.firstElement + 2,
-                           prim.firstElement + prim.numElements, 3):
-                faces.append(
-                    ((indices[i], indices[i - 1], indices[i - 2]), dmat))
-
-    me.vertices.add(len(dmesh.verts))
-    me.vertices.foreach_set("co", io_utils.unpack_list(dmesh.verts))
-    me.vertices.foreach_set("normal", io_utils.unpack_list(dmesh.normals))
-
-    me.polygons.add(len(faces))
-    me.loops.add(len(faces) * 3)
-
-    # TODO: Crashes Blender.
-    if False:
-        me.uv_layers.new()
-        uvs = me.uv_layers[0]
+    if slots:
+        me.polygons.foreach_set("material_index", array.array("i", [slots.get(index, 0) for index in face_materials]))
 
-    for i, ((verts, dmat), poly) in enumerate(zip(faces, me.polygons)):
-        poly.use_smooth = True  # DTS geometry is always smooth shaded
-        # poly.loop_total = 3
-        poly.loop_start = i * 3
+    # Texture coordinates are stored per vertex, Blender wants them per loop
+    if len(loops) and dmesh.tvertex_count() >= dmesh.vertex_count():
+        tverts = dts_stream.flatten(dmesh.tverts, 2)
 
-        if False:
-            if dmat:
-                poly.material_index = material_indices[dmat]
+        if numpy is not None:
+            uvs = numpy.asarray(tverts, dtype=numpy.float32).reshape(-1, 2)[numpy.frombuffer(loops, numpy.int32)]
+            uvs[:, 1] = 1 - uvs[:, 1]
+            uvs = uvs.ravel()
+        else:
+            uvs = array.array("f", bytes(4 * 2 * len(loops)))
+            uvs[0::2] = array.array("f", [tverts[index * 2] for index in loops])
+            uvs[1::2] = array.array("f", [1 - tverts[index * 2 + 1] for index in loops])
+
+        me.uv_layers.new().data.foreach_set("uv", uvs)
 
-        for j, index in zip(poly.loop_indices, verts):
-            me.loops[j].vertex_index = index
-            if False:
-                uv = dmesh.tverts[index]
-                uvs.data[j].uv = (uv.x, 1 - uv.y)
+    if validate:
+        me.validate(verbose=True)
 
-    me.validate(verbose=True)
     me.update()
 
     return me
@@ -225,38 +201,21 @@ def file_base_name(filepath: str) -> str:
     return os.path.basename(filepath).rsplit(".", 1)[0]
 
 
-def insert_reference(frame, shape_nodes: list[bpy.types.Object]):
+def insert_reference(frame, shape_nodes: list[bpy.types.Object], curve_cache: None | util.FCurveCache=None):
     """  
     
     :param frame:
     :param shape_nodes:
+    :param curve_cache:
 
     :meta public:
     """
-    for node in shape_nodes:
-        ob = node.bl_ob
-
-        curves = util.ob_location_curves(ob)
-        for curve in curves:
-            curve.keyframe_points.add(1)
-            key = curve.keyframe_points[-1]
-            key.interpolation = "LINEAR"
-            key.co = (frame, ob.location[curve.array_index])
-
-        curves = util.ob_scale_curves(ob)
-        for curve in curves:
-            curve.keyframe_points.add(1)
-            key = curve.keyframe_points[-1]
-            key.interpolation = "LINEAR"
-            key.co = (frame, ob.scale[curve.array_index])
-
-        _, curves = util.ob_rotation_curves(ob)
-        rot = util.ob_rotation_data(ob)
-        for curve in curves:
-            curve.keyframe_points.add(1)
-            key = curve.keyframe_points[-1]
-            key.interpolation = "LINEAR"
-            key.co = (frame, rot[curve.array_index])
+    for ob in shape_nodes:
+        util.insert_keyframes(util.ob_location_curves(ob, curve_cache), [frame], [ob.location])
+        util.insert_keyframes(util.ob_scale_curves(ob, curve_cache), [frame], [ob.scale])
+
+        _, curves = util.ob_rotation_curves(ob, curve_cache)
+        util.insert_keyframes(curves, [frame], [util.ob_rotation_data(ob)])
 
 
 def load(operator: bpy.types.Operator,
@@ -265,6 +224,8 @@ def load(operator: bpy.types.Operator,
          reference_keyframe: bool=True,
          import_sequences: bool=True,
          use_armature: bool=False,
+         use_cache: bool=False,
+         validate_meshes: bool=False,
          debug_report: bool=False) -> None:
     """  
     
@@ -274,19 +235,23 @@ def load(operator: bpy.types.Operator,
     :param reference_keyframe:
     :param import_sequences:
     :param use_armature:
+    :param use_cache: Reuse the decoded shape from :py:class:`dts_cache.ShapeCache` if the file is unchanged.
+    :param validate_meshes: Check and repair every created mesh, see :py:func:`create_bmesh`.
     :param debug_report:
 
     :meta public:
     """
-    shape = dts_shape.Shape()
+    if use_cache:
+        shape = dts_cache.ShapeCache().load_shape(filepath, mesh_class=dts_types.ArrayMesh)
+    else:
+        shape = dts_shape.Shape()
 
-    with open(filepath, "rb") as shapefile:
-        shape.load(shapefile)
+        with open(filepath, "rb") as shapefile:
+            shape.load(shapefile, mapped=True, mesh_class=dts_types.ArrayMesh)
 
     if debug_report:
         write_report.write_debug_report(filepath + ".txt", shape)
-        with open(filepath + ".pass.dts", "wb") as fd:
-            shape.save(fd)
+        shape.save_file(filepath + ".pass.dts")
 
     # Create a Blender material for each DTS material
     materials = {}
@@ -315,6 +280,11 @@ def load(operator: bpy.types.Operator,
     node_obs = []
     node_obs_val = {}
 
+    # Every sequence looks up the curves of the same nodes, so index them once
+    curve_cache = util.FCurveCache()
+    # Keyframes of all sequences are written to their curves at once, after the last one
+    keyframes = util.KeyframeBatch()
+
     if use_armature:
         root_arm = bpy.data.armatures.new(file_base_name(filepath))
         root_ob = bpy.data.objects.new(root_arm.name, root_arm)
@@ -324,12 +294,15 @@ def load(operator: bpy.types.Operator,
         context.scene.collection.objects.active = root_ob
 
         # Calculate armature-space matrix, head and tail for each node
+        node_mats = [mathutils.Matrix.Identity(4)] * len(shape.nodes)
+
         for i, node in enumerate(shape.nodes):
-            node.mat = shape.default_rotations[i].to_matrix()
-            node.mat = mathutils.Matrix.Translation(
-                shape.default_translations[i]) * node.mat.to_4x4()
+            mat = shape.default_rotations[i].to_matrix()
+            mat = mathutils.Matrix.Translation(
+                shape.default_translations[i]) * mat.to_4x4()
             if node.parent != -1:
-                node.mat = shape.nodes[node.parent].mat * node.mat
+                mat = node_mats[node.parent] * mat
+            node_mats[i] = mat
             # node.head = node.mat.to_translation()
             # node.tail = node.head + Vector((0, 0, 0.25))
             # node.tail = node.mat.to_translation()
@@ -351,7 +324,7 @@ def load(operator: bpy.types.Operator,
             if node.parent != -1:
                 bone.parent = edit_bone_table[node.parent]
 
-            bone.matrix = node.mat
+            bone.matrix = node_mats[i]
             bone["nodeIndex"] = i
 
             edit_bone_table.append(bone)
@@ -373,7 +346,6 @@ def load(operator: bpy.types.Operator,
         for i, node in enumerate(shape.nodes):
             ob = bpy.data.objects.new(
                 dedup_name(bpy.data.objects, shape.names[node.name]), None)
-            node.bl_ob = ob
             ob["nodeIndex"] = i
             ob.empty_display_type = "SINGLE_ARROW"
             ob.empty_display_size = 0.5
@@ -394,7 +366,7 @@ def load(operator: bpy.types.Operator,
             node_obs_val[node] = ob
 
         if reference_keyframe:
-            insert_reference(reference_frame, shape.nodes)
+            insert_reference(reference_frame, node_obs, curve_cache)
 
     # Try animation?
     if import_sequences:
@@ -421,108 +393,75 @@ def load(operator: bpy.types.Operator,
             if flags:
                 sequences_text.append(name + ": " + ", ".join(flags))
 
-            nodesRotation = tuple(
-                map(
-                    lambda p: p[0],
-                    filter(lambda p: p[1], zip(shape.nodes,
-                                               seq.rotationMatters))))
-            nodesTranslation = tuple(
-                map(
-                    lambda p: p[0],
-                    filter(lambda p: p[1],
-                           zip(shape.nodes, seq.translationMatters))))
-            nodesScale = tuple(
-                map(lambda p: p[0],
-                    filter(lambda p: p[1], zip(shape.nodes,
-                                               seq.scaleMatters))))
+            nodesRotation = seq.rotationMatters.select(shape.nodes)
+            nodesTranslation = seq.translationMatters.select(shape.nodes)
+            nodesScale = seq.scaleMatters.select(shape.nodes)
 
             step = 1
 
             for mattersIndex, node in enumerate(nodesTranslation):
                 ob = node_obs_val[node]
-                curves = util.ob_location_curves(ob)
-
-                for frameIndex in range(seq.numKeyframes):
-                    vec = shape.node_translations[seq.baseTranslation +
-                                                  mattersIndex *
-                                                  seq.numKeyframes +
-                                                  frameIndex]
-                    if seq.flags & dts_types.Sequence.Blend:
-                        if reference_frame is None:
-                            return util.fail(
-                                operator,
-                                "Missing 'reference' marker for blend animation '{}'"
-                                .format(name))
-                        ref_vec = mathutils.Vector(util.evaluate_all(curves, reference_frame))
-                        vec = ref_vec + vec
-
-                    for curve in curves:
-                        curve.keyframe_points.add(1)
-                        key = curve.keyframe_points[-1]
-                        key.interpolation = "LINEAR"
-                        key.co = (globalToolIndex + frameIndex * step,
-                                  vec[curve.array_index])
+                curves = util.ob_location_curves(ob, curve_cache)
+                start = seq.baseTranslation + mattersIndex * seq.numKeyframes
+                track = shape.node_translations.floats(start, seq.numKeyframes)
+
+                if track and seq.flags & dts_types.Sequence.Blend:
+                    if reference_frame is None:
+                        # Earlier sequences keep the keyframes collected for them
+                        keyframes.flush()
+                        return util.fail(
+                            operator,
+                            "Missing 'reference' marker for blend animation '{}'"
+                            .format(name))
+                    track = dts_math.translate_vectors(curve_cache.evaluate_all(curves, reference_frame), track)
+
+                frames = [globalToolIndex + frameIndex * step for frameIndex in range(len(track) // len(curves))]
+                keyframes.add(curves, frames, track)
 
             for mattersIndex, node in enumerate(nodesRotation):
                 ob = node_obs_val[node]
-                mode, curves = util.ob_rotation_curves(ob)
-
-                for frameIndex in range(seq.numKeyframes):
-                    rot = shape.node_rotations[seq.baseRotation +
-                                               mattersIndex * seq.numKeyframes
-                                               + frameIndex]
-                    if seq.flags & dts_types.Sequence.Blend:
-                        if reference_frame is None:
-                            return util.fail(
-                                operator,
-                                "Missing 'reference' marker for blend animation '{}'"
-                                .format(name))
-                        ref_rot = mathutils.Quaternion(
-                            util.evaluate_all(curves, reference_frame))
-                        rot = ref_rot * rot
-                    if mode == 'AXIS_ANGLE':
-                        rot = rot.to_axis_angle()
-                    elif mode != 'QUATERNION':
-                        rot = rot.to_euler(mode)
-
-                    for curve in curves:
-                        curve.keyframe_points.add(1)
-                        key = curve.keyframe_points[-1]
-                        key.interpolation = "LINEAR"
-                        key.co = (globalToolIndex + frameIndex * step,
-                                  rot[curve.array_index])
+                mode, curves = util.ob_rotation_curves(ob, curve_cache)
+                start = seq.baseRotation + mattersIndex * seq.numKeyframes
+                track = shape.node_rotations.floats(start, seq.numKeyframes)
+
+                if track and seq.flags & dts_types.Sequence.Blend:
+                    if reference_frame is None:
+                        keyframes.flush()
+                        return util.fail(
+                            operator,
+                            "Missing 'reference' marker for blend animation '{}'"
+                            .format(name))
+                    ref_rot = util.rotation_to_quaternion(mode, curve_cache.evaluate_all(curves, reference_frame))
+                    track = dts_math.multiply_quaternions(ref_rot, track)
+
+                if mode == 'AXIS_ANGLE':
+                    track = dts_math.quaternions_to_axis_angle(track)
+                elif mode != 'QUATERNION':
+                    track = dts_math.quaternions_to_euler(track, mode)
+
+                frames = [globalToolIndex + frameIndex * step for frameIndex in range(len(track) // len(curves))]
+                keyframes.add(curves, frames, track)
 
             for mattersIndex, node in enumerate(nodesScale):
                 ob = node_obs_val[node]
-                curves = util.ob_scale_curves(ob)
-
-                for frameIndex in range(seq.numKeyframes):
-                    index = seq.baseScale + mattersIndex * seq.numKeyframes + frameIndex
-                    vec = shape.node_translations[seq.baseTranslation +
-                                                  mattersIndex *
-                                                  seq.numKeyframes +
-                                                  frameIndex]
-
-                    if seq.flags & dts_types.Sequence.UniformScale:
-                        s = shape.node_uniform_scales[index]
-                        vec = (s, s, s)
-                    elif seq.flags & dts_types.Sequence.AlignedScale:
-                        vec = shape.node_aligned_scales[index]
-                    elif seq.flags & dts_types.Sequence.ArbitraryScale:
-                        print(
-                            "Warning: Arbitrary scale animation not implemented"
-                        )
-                        break
-                    else:
-                        print("Warning: Invalid scale flags found in sequence")
-                        break
-
-                    for curve in curves:
-                        curve.keyframe_points.add(1)
-                        key = curve.keyframe_points[-1]
-                        key.interpolation = "LINEAR"
-                        key.co = (globalToolIndex + frameIndex * step,
-                                  vec[curve.array_index])
+                curves = util.ob_scale_curves(ob, curve_cache)
+                start = seq.baseScale + mattersIndex * seq.numKeyframes
+
+                if seq.flags & dts_types.Sequence.UniformScale:
+                    track = [(s, s, s) for s in shape.node_uniform_scales[start:start + seq.numKeyframes]]
+                elif seq.flags & dts_types.Sequence.AlignedScale:
+                    track = shape.node_aligned_scales[start:start + seq.numKeyframes]
+                elif seq.flags & dts_types.Sequence.ArbitraryScale:
+                    print(
+                        "Warning: Arbitrary scale animation not implemented"
+                    )
+                    continue
+                else:
+                    print("Warning: Invalid scale flags found in sequence")
+                    continue
+
+                frames = [globalToolIndex + frameIndex * step for frameIndex in range(len(track))]
+                keyframes.add(curves, frames, track)
 
             # Insert a reference frame immediately before the animation
             # insert_reference(globalToolIndex - 2, shape.nodes)
@@ -533,6 +472,8 @@ def load(operator: bpy.types.Operator,
                 name + ":end", globalToolIndex + seq.numKeyframes * step - 1)
             globalToolIndex += seq.numKeyframes * step + 30
 
+        keyframes.flush()
+
         if "Sequences" in bpy.data.texts:
             sequences_buf = bpy.data.texts["Sequences"]
         else:
@@ -560,7 +501,7 @@ def load(operator: bpy.types.Operator,
                     .format(meshIndex + 1, mtype, shape.names[obj.name]))
                 continue
 
-            bmesh = create_bmesh(mesh, materials, shape)
+            bmesh = create_bmesh(mesh, materials, shape, validate_meshes)
             bobj = bpy.data.objects.new(
                 dedup_name(bpy.data.objects, shape.names[obj.name]), bmesh)
             context.scene.collection.objects.link(bobj)
@@ -571,7 +512,7 @@ def load(operator: bpy.types.Operator,
                 bobj.parent = root_ob
                 bobj.parent_bone = bone_names[obj.node]
                 bobj.parent_type = 'BONE'
-                bobj.matrix_world = shape.nodes[obj.node].mat
+                bobj.matrix_world = node_mats[obj.node]
 
                 if mtype == dts_types.Mesh.SkinType:
                     modifier = bobj.modifiers.new('Armature', 'ARMATURE')
@@ -619,5 +560,5 @@ def add_vertex_groups(mesh: dts_types.Mesh, ob: bpy.types.Object, shape: dts_sha
         # TODO: Handle initial_transform
         ob.vertex_groups.new(shape.names[shape.nodes[node].name])
 
-    for vertex, bone, weight in mesh.influences:
+    for vertex, bone, weight in zip(*mesh.influence_columns()):
         ob.vertex_groups[bone].add((vertex, ), weight, 'REPLACE')
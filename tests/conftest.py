@@ -0,0 +1,16 @@
+""" Import the add-on as the ``io_scene_dts`` package from the repository root, whatever the checkout
+is called, so the tests can use it without Blender.
+"""
+
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "io_scene_dts" not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        "io_scene_dts", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules["io_scene_dts"] = package
+    spec.loader.exec_module(package)
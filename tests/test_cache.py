@@ -0,0 +1,63 @@
+""" Snapshots of decoded shapes in the on-disk cache. Runs without Blender. """
+
+import json
+
+import pytest
+
+from io_scene_dts import dts_cache
+from io_scene_dts import dts_shape
+from io_scene_dts import dts_types
+
+
+def packed(shape):
+    return b"".join(bytes(chunk) for chunk in shape.pack(24))
+
+
+@pytest.fixture
+def shape_path(tmp_path):
+    path = tmp_path / "shape.dts"
+    path.write_bytes(packed(dts_shape.Shape()))
+    return str(path)
+
+
+@pytest.mark.parametrize("mesh_class", [dts_types.Mesh, dts_types.ArrayMesh])
+def test_hit_decodes_to_an_equal_shape(tmp_path, shape_path, mesh_class):
+    cache = dts_cache.ShapeCache(str(tmp_path / "cache"))
+
+    first = cache.load_shape(shape_path, mesh_class)
+    second = cache.load_shape(shape_path, mesh_class)
+
+    assert first is not second
+    assert packed(first) == packed(second)
+
+
+def test_snapshot_keeps_shared_objects_shared():
+    table = dts_types.RecordTable(dts_types.Node)
+    table.append(dts_types.Node(3))
+    node = table[0]
+
+    restored = dts_cache.load_snapshot(b"".join(dts_cache.dump_snapshot([node, table])))
+
+    assert restored[0] is restored[1][0]
+    assert restored[0].name == 3
+
+
+def test_snapshot_refuses_other_types():
+    with pytest.raises(TypeError):
+        dts_cache.dump_snapshot(object())
+
+
+def test_unreadable_entries_are_misses(tmp_path, shape_path):
+    cache = dts_cache.ShapeCache(str(tmp_path / "cache"))
+    cache.load_shape(shape_path, dts_types.ArrayMesh)
+    key = cache.key(shape_path, "dts:ArrayMesh")
+
+    header = json.dumps({"version": dts_cache.format_version(), "root": {"ref": 0},
+                         "objects": [{"class": "os.system", "state": {}}], "blobs": []}).encode("utf-8")
+
+    for data in (b"", b"garbage", dts_cache.SNAPSHOT_HEADER.pack(dts_cache.SNAPSHOT_MAGIC, len(header)) + header):
+        with open(cache.entry_path(key), "wb") as fd:
+            fd.write(data)
+
+        assert cache.get(key) is None
+        assert not (tmp_path / "cache" / (key + dts_cache.SNAPSHOT_SUFFIX)).exists()
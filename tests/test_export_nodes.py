@@ -0,0 +1,45 @@
+""" Linking exported nodes to their parents, see :py:func:`dts_types.link_parents`. """
+
+import array
+
+from io_scene_dts import dts_types
+
+
+def hierarchy():
+    """ A root with a child, which has a child of its own, in parent-first order. """
+    root = dts_types.Node(0)
+    child = dts_types.Node(1)
+    child.parent_node = root
+    grandchild = dts_types.Node(2)
+    grandchild.parent_node = child
+
+    nodes = dts_types.RecordTable(dts_types.Node)
+
+    for node in (root, child, grandchild):
+        nodes.append(node)
+
+    return nodes
+
+
+def test_parents_first():
+    nodes = hierarchy()
+
+    assert dts_types.link_parents(nodes)
+    assert list(nodes.column("parent")) == [-1, 0, 1]
+    assert [node.index for node in nodes] == [0, 1, 2]
+
+
+def test_child_before_parent_fails_cleanly():
+    nodes = hierarchy()
+    # Sorting for DSQ compatibility can put a node before its parent
+    nodes.sort(key=lambda node: -node.name)
+
+    assert not dts_types.link_parents(nodes)
+
+
+def test_loaded_nodes_start_unlinked():
+    # Rows of a table read from a file are created on first access
+    nodes = dts_types.RecordTable(dts_types.Node, array.array("i", [0, -1, -1, -1, -1]))
+
+    assert nodes[0].index is None
+    assert nodes[0].parent_node is None
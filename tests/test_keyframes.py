@@ -0,0 +1,43 @@
+""" Single keyframes take the scalar path of KeyframePool, blocks the bulk one. Runs without Blender. """
+
+import random
+
+from io_scene_dts import dts_stream
+from io_scene_dts import dts_types
+
+
+def random_quats(count):
+    rng = random.Random(7)
+    return [tuple(rng.uniform(-1.2, 1.2) for _ in range(4)) for _ in range(count)] + [(1.0, 0.0, -0.0, 1.0)]
+
+
+def test_scalar_quantize_matches_the_bulk_path():
+    quats = random_quats(200)
+    assert [c for q in quats for c in dts_stream.quantize_quat(q)] == dts_stream.quantize_quats(quats).tolist()
+
+
+def test_append_matches_extend():
+    quats = random_quats(50)
+    vectors = [q[:3] for q in quats]
+
+    for pool, items in ((dts_types.KeyframePool.rotations, quats),
+                        (dts_types.KeyframePool.vectors, vectors),
+                        (dts_types.KeyframePool.scalars, [v[0] for v in vectors])):
+        one, bulk = pool(), pool()
+
+        for item in items:
+            one.append(item)
+        bulk.extend(items)
+
+        assert one.values == bulk.values
+        assert len(one) == len(items)
+
+
+def test_insert_and_assign_single_items():
+    pool = dts_types.KeyframePool.vectors()
+    pool.extend([(1, 2, 3), (7, 8, 9)])
+
+    pool.insert(1, (4, 5, 6))
+    pool[0] = (0, 0, 0)
+
+    assert pool.values.tolist() == [0, 0, 0, 4, 5, 6, 7, 8, 9]
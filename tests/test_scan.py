@@ -0,0 +1,54 @@
+""" Manifest records of files that are cut short. Runs without Blender. """
+
+import json
+
+from io_scene_dts import dts_scan
+from io_scene_dts import dts_shape
+
+
+def write_shape(path, size=None):
+    data = b"".join(bytes(chunk) for chunk in dts_shape.Shape().pack(24))
+    path.write_bytes(data if size is None else data[:size])
+    return len(data)
+
+
+def scan(path):
+    st = path.stat()
+    return dts_scan.scan_file(str(path), st.st_size, st.st_mtime_ns)
+
+
+def test_complete_shape_has_no_error(tmp_path):
+    path = tmp_path / "shape.dts"
+    write_shape(path)
+
+    record = scan(path)
+
+    assert "error" not in record
+    assert record["version"] == 24
+
+
+def test_truncated_shape_is_an_error_record(tmp_path):
+    path = tmp_path / "shape.dts"
+    full = write_shape(path)
+
+    for size in range(full):
+        write_shape(path, size)
+        assert "EOFError" in scan(path)["error"], size
+
+
+def test_truncated_sequences_are_an_error_record(tmp_path):
+    path = tmp_path / "anim.dsq"
+    path.write_bytes(b"\x18\x00")
+
+    assert "EOFError" in scan(path)["error"]
+
+
+def test_main_writes_one_record_per_file(tmp_path):
+    write_shape(tmp_path / "good.dts")
+    write_shape(tmp_path / "bad.dts", 10)
+    manifest = tmp_path / "manifest.ndjson"
+
+    assert dts_scan.main(["--workers", "1", "--output", str(manifest), str(tmp_path)]) == 1
+
+    records = [json.loads(line) for line in manifest.read_text().splitlines()]
+    assert [(record["path"].endswith("bad.dts"), "error" in record) for record in records] == [(True, True), (False, False)]
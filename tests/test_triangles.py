@@ -0,0 +1,71 @@
+""" Winding of the triangles built from list, strip and fan primitives. Runs without Blender. """
+
+import pytest
+
+from io_scene_dts import dts_types
+
+Primitive = dts_types.Primitive
+
+
+def triangles(primitive, indices=()):
+    flat = primitive.triangles(indices).tolist()
+    return [tuple(flat[i:i + 3]) for i in range(0, len(flat), 3)]
+
+
+def test_list_reverses_every_triangle():
+    primitive = Primitive(0, 6, Primitive.Triangles)
+    assert primitive.triangle_count() == 2
+    assert triangles(primitive) == [(2, 1, 0), (5, 4, 3)]
+
+
+def test_list_ignores_trailing_elements():
+    assert triangles(Primitive(0, 5, Primitive.Triangles)) == [(2, 1, 0)]
+
+
+def test_strip_flips_every_other_triangle():
+    primitive = Primitive(0, 5, Primitive.Strip)
+    assert primitive.triangle_count() == 3
+    assert triangles(primitive) == [(2, 1, 0), (1, 2, 3), (4, 3, 2)]
+
+
+def test_fan_shares_its_first_element():
+    primitive = Primitive(3, 5, Primitive.Fan)
+    assert primitive.triangle_count() == 3
+    assert triangles(primitive) == [(5, 4, 3), (3, 5, 6), (7, 6, 3)]
+
+
+def test_indexed_primitives_read_mesh_indices():
+    indices = [9, 8, 7, 6, 5, 4]
+    assert triangles(Primitive(1, 4, Primitive.Strip | Primitive.Indexed), indices) == [(6, 7, 8), (7, 6, 5)]
+    assert triangles(Primitive(0, 4, Primitive.Fan | Primitive.Indexed), indices) == [(7, 8, 9), (9, 7, 6)]
+
+
+def test_degenerate_primitives_have_no_triangles():
+    for kind in (Primitive.Triangles, Primitive.Strip, Primitive.Fan):
+        assert triangles(Primitive(0, 2, kind)) == []
+        assert triangles(Primitive(0, 0, kind)) == []
+
+
+def test_mesh_triangles_and_materials():
+    mesh = dts_types.Mesh(dts_types.Mesh.StandardType)
+    mesh.indices = [0, 1, 2, 3, 4]
+    mesh.primitives = [Primitive(0, 3, Primitive.Triangles | Primitive.Indexed | 2),
+                       Primitive(1, 4, Primitive.Strip | Primitive.Indexed | Primitive.NoMaterial)]
+
+    found, materials = mesh.triangles()
+
+    assert found.typecode == "i" and materials.typecode == "i"
+    assert mesh.triangle_count() == 3
+    assert found.tolist() == [2, 1, 0, 3, 2, 1, 2, 3, 4]
+    assert materials.tolist() == [2, -1, -1]
+
+
+def test_triangle_matrix_shares_the_flat_array():
+    pytest.importorskip("numpy")
+    flat = Primitive(0, 6, Primitive.Triangles).triangles(())
+
+    rows = dts_types.triangle_matrix(flat)
+    flat[0] = 9
+
+    assert rows.shape == (2, 3)
+    assert rows.tolist() == [[9, 1, 0], [5, 4, 3]]
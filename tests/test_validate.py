@@ -0,0 +1,76 @@
+""" Structural checks of decoded shapes and of files that cannot be decoded. Runs without Blender. """
+
+import pytest
+
+from io_scene_dts import dts_shape
+from io_scene_dts import dts_types
+from io_scene_dts import dts_validate
+
+
+def write_shape(path, size=None):
+    data = b"".join(bytes(chunk) for chunk in dts_shape.Shape().pack(24))
+    path.write_bytes(data if size is None else data[:size])
+    return len(data)
+
+
+def test_complete_shape_has_no_findings(tmp_path):
+    path = tmp_path / "shape.dts"
+    write_shape(path)
+
+    assert dts_validate.validate_file(str(path)) == []
+
+
+def test_truncated_shape_is_one_finding(tmp_path):
+    path = tmp_path / "shape.dts"
+    full = write_shape(path)
+
+    for size in (0, 2, 15, full // 2, full - 1):
+        write_shape(path, size)
+        findings = dts_validate.validate_file(str(path))
+
+        assert [(f.severity, f.section, f.index) for f in findings] == [("error", "file", -1)], size
+        assert "EOFError" in findings[0].message
+
+
+def test_main_reports_truncated_files(tmp_path, capsys):
+    write_shape(tmp_path / "good.dts")
+    write_shape(tmp_path / "bad.dts", 10)
+
+    assert dts_validate.main(["--workers", "1", str(tmp_path)]) == 1
+
+    out = capsys.readouterr()
+    assert "bad.dts: error: file[-1]: cannot be decoded" in out.out
+    assert "good.dts" not in out.out
+    assert "1 of 2 files failed" in out.err
+
+
+@pytest.fixture(params=["numpy", "fallback"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        if dts_validate.numpy is None:
+            pytest.skip("numpy is not installed")
+    else:
+        monkeypatch.setattr(dts_validate, "numpy", None)
+
+
+def test_cycles_report_their_smallest_node(backend):
+    assert dts_validate.cycles([]) == []
+    assert dts_validate.cycles([-1, 0, 1, 1]) == []
+    assert dts_validate.cycles([0]) == [0]
+    # 5 -> 3 -> 4 -> 3 and 1 -> 2 -> 1, with 0 and 6 hanging off them
+    assert dts_validate.cycles([1, 2, 1, 4, 3, 3, 5, -1]) == [1, 3]
+
+
+def test_primitives_are_checked_against_what_they_index(backend):
+    Primitive = dts_types.Primitive
+    primitives = [Primitive(0, 6, Primitive.Triangles | Primitive.Indexed),
+                  Primitive(4, 3, Primitive.Triangles | Primitive.Indexed),
+                  Primitive(0, 8, Primitive.Strip),
+                  Primitive(6, 4, Primitive.Fan - (1 << 32)),
+                  Primitive(0, 4, Primitive.Triangles),
+                  Primitive(-1, 3, Primitive.Strip | Primitive.Indexed)]
+
+    bad, ragged = dts_validate.check_primitives(primitives, 6, 10)
+
+    assert bad == [1, 5]
+    assert ragged == [4]
@@ -1,5 +1,8 @@
+import array
 import os
+import typing
 import bpy
+import mathutils
 from colorsys import hsv_to_rgb
 from itertools import count
 from fractions import Fraction
@@ -100,17 +103,71 @@ def action_get_or_new(ob: bpy.types.Object) -> bpy.types.Action:
     return action
 
 
-def ob_curves_array(ob: bpy.types.Object, data_path: str, array_count: int) -> list[bpy.types.FCurve]:
+class FCurveCache(object):
+    """ F-curves by ``(action, data_path, array_index)``, for importers that look up the same curves many times.
+
+    The F-curves of an action are indexed the first time it is seen, and curves created through
+    the cache are added as they are made. Curves added to an action by other means are not seen.
+    """
+
+    def __init__(self) -> None:
+        self.curves = {}
+        self.actions = set()
+        self.evaluated = {}
+
+    def index(self, action: bpy.types.Action) -> int:
+        key = action.as_pointer()
+
+        if key not in self.actions:
+            self.actions.add(key)
+
+            # Later curves win, like the scan ob_curves_array does without a cache
+            for curve in action.fcurves:
+                self.curves[(key, curve.data_path, curve.array_index)] = curve
+
+        return key
+
+    def get_or_new(self, action: bpy.types.Action, data_path: str, index: int) -> bpy.types.FCurve:
+        key = (self.index(action), data_path, index)
+        curve = self.curves.get(key)
+
+        if curve is None:
+            curve = self.curves[key] = action.fcurves.new(data_path, index=index)
+
+        return curve
+
+    def evaluate_all(self, curves: list[bpy.types.FCurve], frame: float) -> tuple[float, ...]:
+        """ Like :py:func:`evaluate_all`, but evaluates the same curves at the same frame only once,
+        for the reference pose of blend sequences.
+        """
+        key = (frame, ) + tuple(curve.as_pointer() for curve in curves)
+        values = self.evaluated.get(key)
+
+        if values is None:
+            values = self.evaluated[key] = evaluate_all(curves, frame)
+
+        return values
+
+
+def ob_curves_array(ob: bpy.types.Object,
+                    data_path: str,
+                    array_count: int,
+                    cache: None | FCurveCache=None) -> list[bpy.types.FCurve]:
     """ TODO
     
     :param ob:
     :param data_path:
     :param array_count:
+    :param cache: Look the curves up in this instead of scanning every F-curve of the action.
     :return:
 
     :meta public:
     """
     action = action_get_or_new(ob)
+
+    if cache is not None:
+        return [cache.get_or_new(action, data_path, index) for index in range(array_count)]
+
     curves = [None] * array_count
 
     for curve in action.fcurves:
@@ -129,26 +186,28 @@ def ob_curves_array(ob: bpy.types.Object, data_path: str, array_count: int) -> l
     return curves
 
 
-def ob_location_curves(ob: bpy.types.Object) -> list[bpy.types.FCurve]:
+def ob_location_curves(ob: bpy.types.Object, cache: None | FCurveCache=None) -> list[bpy.types.FCurve]:
     """ TODO
     
     :param ob:
+    :param cache: See :py:func:`ob_curves_array`.
     :return:
 
     :meta public:
     """
-    return ob_curves_array(ob, "location", 3)
+    return ob_curves_array(ob, "location", 3, cache)
 
 
-def ob_scale_curves(ob: bpy.types.Object) -> list[bpy.types.FCurve]:
+def ob_scale_curves(ob: bpy.types.Object, cache: None | FCurveCache=None) -> list[bpy.types.FCurve]:
     """ TODO
     
     :param ob:
+    :param cache: See :py:func:`ob_curves_array`.
     :return:
 
     :meta public:
     """
-    return ob_curves_array(ob, "scale", 3)
+    return ob_curves_array(ob, "scale", 3, cache)
 
 
 def fcurves_path_from_rotation(ob: bpy.types.Object) -> tuple[str, int]:
@@ -183,9 +242,110 @@ def ob_rotation_data(ob: bpy.types.Object):
         return ob.rotation_euler
 
 
-def ob_rotation_curves(ob):
+def ob_rotation_curves(ob, cache=None):
     data_path, array_count = fcurves_path_from_rotation(ob)
-    return ob.rotation_mode, ob_curves_array(ob, data_path, array_count)
+    return ob.rotation_mode, ob_curves_array(ob, data_path, array_count, cache)
+
+
+def rotation_to_quaternion(mode: str, values: typing.Sequence[float]) -> mathutils.Quaternion:
+    """ The rotation stored as ``values`` in ``mode``, an :py:attr:`bpy.types.Object.rotation_mode`. """
+    if mode == 'QUATERNION':
+        return mathutils.Quaternion(values)
+    elif mode == 'AXIS_ANGLE':
+        return mathutils.Quaternion(values[1:], values[0])
+    else:
+        return mathutils.Euler(values, mode).to_quaternion()
+
+
+class KeyframeBatch(object):
+    """ Keyframes to append to F-curves, collected over a whole import.
+
+    :py:meth:`flush` grows each curve once with ``keyframe_points.add`` and writes its ``co`` and
+    ``interpolation`` columns with one ``foreach_set`` each, however many tracks were added to it.
+    Curves do not see the collected keyframes before then.
+
+    :param interpolation: Interpolation of every keyframe.
+    """
+
+    def __init__(self, interpolation: str="LINEAR") -> None:
+        self.interpolation = interpolation
+        self.pending = {}
+
+    def add(self, curves: list[bpy.types.FCurve], frames: list[float], values: typing.Any) -> None:
+        """ Collect one keyframe per frame for every curve of an array property.
+
+        :param curves: F-curves of the property, as returned by :py:func:`ob_curves_array`.
+        :param frames: Frame of every keyframe.
+        :param values: Value of the property at every frame, indexed by :py:attr:`bpy.types.FCurve.array_index`,
+            or a flat typed array of those values, as returned by the track functions of :py:mod:`dts_math`.
+        """
+        count = len(frames)
+
+        if not count:
+            return
+
+        frames = array.array("f", frames)
+        width = len(values) // count if isinstance(values, array.array) else None
+
+        for curve in curves:
+            key = curve.as_pointer()
+
+            if key not in self.pending:
+                self.pending[key] = (curve, array.array("f"))
+
+            added = array.array("f", bytes(4 * 2 * count))
+            added[0::2] = frames
+
+            if width is None:
+                added[1::2] = array.array("f", [value[curve.array_index] for value in values])
+            else:
+                added[1::2] = array.array("f", values[curve.array_index::width])
+
+            self.pending[key][1].extend(added)
+
+    def flush(self) -> None:
+        """ Append the collected keyframes to their curves. """
+        mode = bpy.types.Keyframe.bl_rna.properties["interpolation"].enum_items[self.interpolation].value
+
+        for curve, added in self.pending.values():
+            points = curve.keyframe_points
+            existing = len(points)
+
+            # foreach_set writes whole columns, so start from the keyframes that are already there
+            co = array.array("f", bytes(4 * 2 * existing))
+            modes = [0] * existing
+
+            if existing:
+                points.foreach_get("co", co)
+                points.foreach_get("interpolation", modes)
+
+            co.extend(added)
+            modes.extend([mode] * (len(added) // 2))
+
+            points.add(len(added) // 2)
+            points.foreach_set("co", co)
+            points.foreach_set("interpolation", modes)
+            curve.update()
+
+        self.pending.clear()
+
+
+def insert_keyframes(curves: list[bpy.types.FCurve],
+                     frames: list[float],
+                     values: typing.Any,
+                     interpolation: str="LINEAR") -> None:
+    """ Append keyframes to the curves right away, see :py:class:`KeyframeBatch`.
+
+    :param curves:
+    :param frames:
+    :param values:
+    :param interpolation:
+
+    :meta public:
+    """
+    batch = KeyframeBatch(interpolation)
+    batch.add(curves, frames, values)
+    batch.flush()
 
 
 def evaluate_all(curves, frame):
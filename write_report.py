@@ -23,9 +23,7 @@ def write_debug_report(filepath, shape):
             return ", ".join(map(each, range(first, first + count)))
 
         def show_matters(matters):
-            return ' '.join(
-                map(lambda p: gn(p[0].name),
-                    filter(lambda p: p[1], zip(shape.nodes, matters))))
+            return ' '.join(gn(node.name) for node in matters.select(shape.nodes))
 
         p("smallest_size = " + str(shape.smallest_size))
         p("smallest_detail_level = " + str(shape.smallest_detail_level))
@@ -171,10 +169,11 @@ def write_debug_report(filepath, shape):
                 p("      " + str(prim.firstElement) + "->" +
                   str(prim.firstElement + prim.numElements - 1) + " " +
                   str(prim.type) + flags)
-            p("    + Vertices (" + str(len(mesh.verts)) + "): <omitted>")
+            p("    + Triangles (" + str(mesh.triangle_count()) + "): <omitted>")
+            p("    + Vertices (" + str(mesh.vertex_count()) + "): <omitted>")
             # for i in range(len(mesh.verts)):
             #     p("      vert" + str(i) + " " + str(mesh.verts[i]) + " normal " + str(mesh.normals[i]) + " encoded " + str(mesh.enormals[i]))
-            p("    + Texture coords (" + str(len(mesh.tverts)) +
+            p("    + Texture coords (" + str(mesh.tvertex_count()) +
               "): <omitted>")
             # for i in range(len(mesh.tverts)):
             #     p("      tvert" + str(i) + " " + str(mesh.tverts[i]))
@@ -186,7 +185,7 @@ def write_debug_report(filepath, shape):
                     p("      bone{} node={} initial_transform={}".format(
                         i, node_index, initial_transform))
                 p("    + Influences ({}): <omitted>".format(
-                    len(mesh.influences)))
+                    len(mesh.influence_columns()[0])))
                 # for vi, bi, w in mesh.influences:
                 #     p
                 #     p("      influence vert{} bone{} weight={}".format(vi, bi, w))